@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Complaint, Profile, SMSLog
+from .models import (
+    Complaint, ComplaintStatusHistory, EngineerServiceArea, ExportJob, NotificationOutbox, Profile, SMSLog,
+)
 
 # 🔹 SMS Log Admin (read-only)
 @admin.register(SMSLog)
@@ -11,6 +13,37 @@ class SMSLogAdmin(admin.ModelAdmin):
     ordering = ('-sent_at',)
 
 
+# 🔹 Notification Outbox Admin (read-only, filled by the submission views)
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('channel', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('channel', 'status')
+    search_fields = ('recipient', 'complaint__ticket_number')
+    readonly_fields = (
+        'complaint', 'channel', 'recipient', 'subject', 'body', 'status',
+        'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at',
+    )
+
+
+# 🔹 Complaint Status History Admin (read-only)
+@admin.register(ComplaintStatusHistory)
+class ComplaintStatusHistoryAdmin(admin.ModelAdmin):
+    list_display = ('complaint__ticket_number', 'old_status', 'new_status', 'reason', 'changed_by', 'changed_at')
+    list_filter = ('new_status', 'reason')
+    search_fields = ('complaint__ticket_number',)
+    list_select_related = ('complaint', 'changed_by')
+    readonly_fields = ('complaint', 'old_status', 'new_status', 'changed_by', 'reason', 'changed_at')
+
+
+# 🔹 Engineer Service Areas (pincodes used for automatic assignment)
+@admin.register(EngineerServiceArea)
+class EngineerServiceAreaAdmin(admin.ModelAdmin):
+    list_display = ('pincode_prefix', 'engineer')
+    list_filter = ('engineer',)
+    search_fields = ('pincode_prefix', 'engineer__username', 'engineer__first_name', 'engineer__last_name')
+    list_select_related = ('engineer',)
+
+
 # 🔹 Complaint Admin with Image Previews
 @admin.register(Complaint)
 class ComplaintAdmin(admin.ModelAdmin):
@@ -64,3 +97,14 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'role')
     list_filter = ('role',)
     search_fields = ('user__username',)
+
+
+# 🔹 Export Job Admin
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'role', 'file_format', 'status', 'rows_processed', 'total_rows', 'requested_by', 'created_at')
+    list_filter = ('status', 'role', 'file_format')
+    readonly_fields = (
+        'requested_by', 'role', 'file_format', 'filters', 'filters_hash', 'status',
+        'rows_processed', 'total_rows', 'file', 'error', 'created_at', 'started_at', 'finished_at',
+    )
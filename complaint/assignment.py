@@ -0,0 +1,258 @@
+# complaint/assignment.py
+"""
+Automatic engineer assignment by pincode and workload.
+
+Engineers serve pincode prefixes (EngineerServiceArea). A complaint goes to
+the least-loaded engineer of the longest prefix matching its pincode, so a
+'400001' complaint prefers engineers serving '40000' over those serving
+'400'. Ties go to the lowest engineer id: the same areas, counts and
+complaints always give the same decisions.
+
+AssignmentEngine keeps one min-heap of ``(open tickets, engineer id)`` per
+prefix. Heap entries are never changed in place; a new count pushes a new
+entry and outdated ones are dropped when they reach the top, so choosing an
+engineer and recording the new count costs O(log n).
+
+The auto_assign_complaints command assigns or rebalances the backlog. With
+--loop it is the worker that assigns new complaints shortly after they are
+submitted, keeping one engine between passes; the engine is rebuilt when
+engineers or service areas change or when its open-ticket counts are older
+than AUTO_ASSIGN_REFRESH_SECONDS.
+"""
+
+import heapq
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from .engineers import directory_version, load_open_tickets
+from .models import Complaint, EngineerServiceArea
+from .transitions import ACTIVE_STATUSES, assign, reassign
+from .utils import normalize_pincode
+
+# Engineers with this many open tickets get no more (None: no limit)
+MAX_OPEN_TICKETS = getattr(settings, 'COMPLAINT_AUTO_ASSIGN_MAX_OPEN_TICKETS', None)
+AUTO_ASSIGN_REFRESH_SECONDS = getattr(settings, 'COMPLAINT_AUTO_ASSIGN_REFRESH_SECONDS', 60)
+# Rebalancing only moves a complaint if its engineer has at least this many
+# more open tickets than the new one
+REBALANCE_MIN_GAP = 2
+APPLY_CHUNK_SIZE = 500
+
+
+class AssignmentEngine:
+    """
+    In-memory index of engineers by served pincode prefix.
+
+    ``service_areas`` are ``(engineer id, pincode prefix)`` pairs and
+    ``open_tickets`` maps engineer ids to their open-ticket counts.
+    """
+
+    def __init__(self, service_areas, open_tickets=None, max_open_tickets=MAX_OPEN_TICKETS):
+        self.max_open_tickets = max_open_tickets
+        self.open_tickets = dict(open_tickets or {})
+        self.prefixes = defaultdict(set)
+        for engineer_id, prefix in service_areas:
+            self.prefixes[engineer_id].add(prefix)
+
+        self._heaps = defaultdict(list)
+        for engineer_id, prefixes in self.prefixes.items():
+            count = self.open_tickets.setdefault(engineer_id, 0)
+            for prefix in prefixes:
+                self._heaps[prefix].append((count, engineer_id))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._longest_prefix = max(map(len, self._heaps), default=0)
+
+    @classmethod
+    def from_database(cls, max_open_tickets=MAX_OPEN_TICKETS):
+        service_areas = EngineerServiceArea.objects.filter(
+            engineer__profile__role='engineer'
+        ).values_list('engineer_id', 'pincode_prefix')
+        return cls(service_areas, load_open_tickets(), max_open_tickets)
+
+    def _least_loaded(self, prefix, exclude=None):
+        heap = self._heaps.get(prefix)
+        held = []
+        found = None
+        while heap:
+            count, engineer_id = heap[0]
+            if count != self.open_tickets[engineer_id]:
+                heapq.heappop(heap)  # outdated entry
+                continue
+            if engineer_id == exclude:
+                held.append(heapq.heappop(heap))
+                continue
+            if self.max_open_tickets is None or count < self.max_open_tickets:
+                found = engineer_id
+            break
+        for entry in held:
+            heapq.heappush(heap, entry)
+        return found
+
+    def match(self, pincode, exclude=None):
+        """
+        Returns ``(prefix, engineer id)`` of the least-loaded engineer with
+        room for a complaint at ``pincode`` (other than ``exclude``), or None.
+        """
+        pincode = normalize_pincode(pincode)
+        for length in range(min(len(pincode), self._longest_prefix), 0, -1):
+            engineer_id = self._least_loaded(pincode[:length], exclude)
+            if engineer_id is not None:
+                return pincode[:length], engineer_id
+        return None
+
+    def coverage(self, engineer_id, pincode):
+        """
+        Length of the longest prefix ``engineer_id`` serves that matches
+        ``pincode`` (0 if none).
+        """
+        pincode = normalize_pincode(pincode)
+        return max((len(prefix) for prefix in self.prefixes.get(engineer_id, ()) if pincode.startswith(prefix)), default=0)
+
+    def record(self, engineer_id, change=1):
+        """
+        Adds ``change`` to an engineer's open-ticket count.
+        """
+        count = self.open_tickets[engineer_id] = self.open_tickets.get(engineer_id, 0) + change
+        for prefix in self.prefixes.get(engineer_id, ()):
+            heapq.heappush(self._heaps[prefix], (count, engineer_id))
+
+    def choose(self, pincode):
+        """
+        Like match(), but also counts the complaint against the engineer.
+        """
+        found = self.match(pincode)
+        if found is not None:
+            self.record(found[1])
+        return found
+
+
+# 🔹 Planning and applying batches
+# A decision is (complaint id, ticket number, current engineer id or None, new engineer id, prefix)
+def plan_backlog(engine, complaints):
+    """
+    Plans the assignment of unassigned ``(pk, ticket_number, pincode)``
+    complaints, in the given order. Returns ``(decisions, unmatched ticket
+    numbers)``.
+    """
+    decisions = []
+    unmatched = []
+    for pk, ticket_number, pincode in complaints:
+        found = engine.choose(pincode)
+        if found is None:
+            unmatched.append(ticket_number)
+            continue
+        prefix, engineer_id = found
+        decisions.append((pk, ticket_number, None, engineer_id, prefix))
+    return decisions, unmatched
+
+
+def plan_rebalance(engine, complaints, min_gap=REBALANCE_MIN_GAP):
+    """
+    Plans moving assigned ``(pk, ticket_number, pincode, engineer id)``
+    complaints to a less-loaded engineer serving the same pincode at least
+    as specifically. Returns the decisions.
+    """
+    decisions = []
+    for pk, ticket_number, pincode, engineer_id in complaints:
+        found = engine.match(pincode, exclude=engineer_id)
+        if found is None:
+            continue
+        prefix, candidate = found
+        if len(prefix) < engine.coverage(engineer_id, pincode):
+            continue
+        if engine.open_tickets.get(engineer_id, 0) - engine.open_tickets[candidate] < min_gap:
+            continue
+        engine.record(engineer_id, -1)
+        engine.record(candidate)
+        decisions.append((pk, ticket_number, engineer_id, candidate, prefix))
+    return decisions
+
+
+def backlog_complaints():
+    # Oldest first, so they are the first to get an engineer under a limit
+    return (
+        Complaint.objects.filter(status__in=ACTIVE_STATUSES, assigned_engineer__isnull=True)
+        .order_by('created_at', 'pk')
+        .values_list('pk', 'ticket_number', 'pincode')
+    )
+
+
+def assigned_complaints():
+    # Most recently assigned first: the least likely to have been started
+    return (
+        Complaint.objects.filter(status__in=('in_progress', 'pending'), assigned_engineer__isnull=False)
+        .order_by('-assigned_date', '-pk')
+        .values_list('pk', 'ticket_number', 'pincode', 'assigned_engineer_id')
+    )
+
+
+def apply_decisions(decisions, changed_by=None):
+    """
+    Carries out planned decisions with the assign and reassign transitions,
+    one set-based update per (old, new) engineer pair and chunk. Complaints
+    assigned or changed since planning are left alone. Returns the changed
+    ``(pk, ticket_number, old_status)`` rows.
+    """
+    groups = defaultdict(list)
+    for pk, _, old_engineer, new_engineer, _ in decisions:
+        groups[old_engineer, new_engineer].append(pk)
+
+    changed = []
+    for (old_engineer, new_engineer), pks in sorted(groups.items(), key=lambda item: (item[0][0] or 0, item[0][1])):
+        for start in range(0, len(pks), APPLY_CHUNK_SIZE):
+            chunk = Complaint.objects.filter(pk__in=pks[start:start + APPLY_CHUNK_SIZE])
+            if old_engineer is None:
+                changed += assign(chunk, new_engineer, changed_by, name='auto_assign')
+            else:
+                chunk = chunk.filter(assigned_engineer_id=old_engineer)
+                changed += reassign(chunk, new_engineer, changed_by, name='auto_rebalance')
+    return changed
+
+
+# 🔹 Worker
+# Unassigned complaints are the queue: the submitting request only saves the
+# complaint and ``auto_assign_complaints --loop`` picks it up.
+_worker = {'engine': None, 'version': None, 'built_at': 0.0}
+
+
+def _worker_engine(max_open_tickets):
+    # Rebuilt when engineers or service areas change, or its counts get old
+    version = directory_version()
+    rebuilt = (_worker['engine'] is None or _worker['version'] != version
+               or time.monotonic() - _worker['built_at'] > AUTO_ASSIGN_REFRESH_SECONDS)
+    if rebuilt:
+        _worker.update(engine=AssignmentEngine.from_database(max_open_tickets), version=version, built_at=time.monotonic())
+    return _worker['engine'], rebuilt
+
+
+def assign_new_complaints(after_pk=0, max_open_tickets=MAX_OPEN_TICKETS):
+    """
+    One worker pass: assigns the unassigned complaints with a primary key
+    above ``after_pk``. When the engine has just been rebuilt the whole
+    backlog is planned instead, so complaints that no engineer served
+    before are retried after service areas change.
+
+    Returns ``(changed rows, unmatched ticket numbers, highest pk seen)``.
+    """
+    engine, rebuilt = _worker_engine(max_open_tickets)
+    backlog = backlog_complaints()
+    if not rebuilt:
+        backlog = backlog.filter(pk__gt=after_pk)
+    backlog = list(backlog)
+    if not backlog:
+        return [], [], after_pk
+
+    decisions, unmatched = plan_backlog(engine, backlog)
+    try:
+        changed = apply_decisions(decisions)
+    except Exception:
+        _worker['engine'] = None  # its counts include the planned decisions; rebuild next pass
+        raise
+    # Complaints assigned by hand since planning were left alone; uncount them
+    changed_ids = {row[0] for row in changed}
+    for pk, _, _, engineer_id, _ in decisions:
+        if pk not in changed_ids:
+            engine.record(engineer_id, -1)
+    return changed, unmatched, max(after_pk, max(row[0] for row in backlog))
@@ -0,0 +1,148 @@
+# complaint/bulk.py
+"""
+Bulk actions on the admin and manager complaint lists.
+
+An action runs over all selected complaints with set-based updates (see
+complaint.transitions) and reports, per complaint, whether it was changed
+or why it was skipped.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .counters import update_complaints
+from .engineers import EngineerChoiceField
+from .models import Complaint
+from .queries import complaint_filters_from, complaints_for_role
+from .transitions import assign, blocked_reason, reassign, resolve
+
+BULK_ACTION_LIMIT = 1000
+BULK_ACTIONS = [
+    ('assign', 'Assign to engineer'),
+    ('set_service_cost', 'Set service cost'),
+    ('resolve', 'Mark resolved'),
+]
+# Roles allowed to run bulk actions -> list view they return to
+BULK_ACTION_LISTS = {
+    'admin': 'complaint_list',
+    'manager': 'show_manager_complaints',
+}
+
+
+class ComplaintIdsField(forms.Field):
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            ids = sorted({int(pk) for pk in value})
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid complaint selection.")
+        if len(ids) > BULK_ACTION_LIMIT:
+            raise ValidationError(f"Select at most {BULK_ACTION_LIMIT} complaints at a time.")
+        return ids
+
+
+# 📋 Bulk action toolbar
+class BulkActionForm(forms.Form):
+    action = forms.ChoiceField(choices=BULK_ACTIONS)
+    complaint_ids = ComplaintIdsField(required=False)
+    # Apply to every complaint matching the list filters instead of the ticked rows
+    select_all = forms.BooleanField(required=False)
+    engineer = EngineerChoiceField(required=False, empty_label="Engineer...")
+    service_cost = forms.DecimalField(
+        required=False,
+        min_value=0,
+        max_digits=10,
+        decimal_places=2,
+        error_messages={'min_value': 'Service cost cannot be negative.'}
+    )
+
+    def __init__(self, *args, role=None, **kwargs):
+        self.role = role
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+        if action == 'assign' and not cleaned_data.get('engineer'):
+            self.add_error('engineer', "Choose the engineer to assign.")
+        if action == 'set_service_cost' and cleaned_data.get('service_cost') is None:
+            self.add_error('service_cost', "Enter the service cost to set.")
+
+        if cleaned_data.get('select_all'):
+            # The list filters travel with the form as hidden fields
+            ids = list(
+                complaints_for_role(self.role, complaint_filters_from(self.data))
+                .order_by('pk')
+                .values_list('pk', flat=True)[:BULK_ACTION_LIMIT + 1]
+            )
+            if len(ids) > BULK_ACTION_LIMIT:
+                raise ValidationError(
+                    f"More than {BULK_ACTION_LIMIT} complaints match the filters; narrow them down first."
+                )
+            cleaned_data['complaint_ids'] = ids
+        if not cleaned_data.get('complaint_ids'):
+            raise ValidationError("Select at least one complaint.")
+        return cleaned_data
+
+
+@transaction.atomic
+def _set_service_cost(queryset, service_cost, overwrite=False):
+    if not overwrite:
+        # Like the manager edit form: a service cost, once set, is not changed
+        queryset = queryset.filter(service_cost__isnull=True)
+    rows = list(queryset.select_for_update().order_by('pk').values_list('pk', 'ticket_number', 'status'))
+    if rows:
+        update_complaints(Complaint.objects.filter(pk__in=[row[0] for row in rows]), service_cost=service_cost)
+    return rows
+
+
+def _skip_reason(action, status, engineer_id, service_cost, engineer=None):
+    if action == 'set_service_cost':
+        return f"Service cost already set ({service_cost})."
+    if action == 'assign':
+        return blocked_reason('assign' if engineer_id is None else 'reassign', status, engineer_id, engineer)
+    return blocked_reason(action, status, engineer_id)
+
+
+def run_bulk_action(action, complaint_ids, *, engineer=None, service_cost=None, changed_by=None, overwrite_cost=False):
+    """
+    Applies ``action`` to the complaints with the given ids and returns a
+    JSON-serialisable summary: ``{'action', 'updated': [ticket numbers],
+    'skipped': [[ticket number, reason]], 'missing': count}``.
+    """
+    selected = Complaint.objects.filter(pk__in=complaint_ids)
+    # Versions as selected: a skipped complaint whose version moved on was
+    # changed by someone else, otherwise its state ruled the action out
+    versions = dict(selected.values_list('pk', 'version'))
+    if action == 'assign':
+        # Unassigned complaints are assigned, others moved to this engineer
+        changed = assign(selected, engineer, changed_by) + reassign(selected, engineer, changed_by)
+    elif action == 'resolve':
+        changed = resolve(selected, changed_by)
+    elif action == 'set_service_cost':
+        changed = _set_service_cost(selected, service_cost, overwrite_cost)
+    else:
+        raise ValueError(f"Unknown bulk action '{action}'.")
+
+    changed_ids = {row[0] for row in changed}
+    skipped = [
+        [ticket_number, (
+            "Changed by someone else meanwhile; try again." if version != versions.get(pk)
+            else _skip_reason(action, status, engineer_id, cost, engineer)
+        )]
+        for pk, ticket_number, version, status, engineer_id, cost in (
+            Complaint.objects.filter(pk__in=set(complaint_ids) - changed_ids)
+            .order_by('ticket_number')
+            .values_list('pk', 'ticket_number', 'version', 'status', 'assigned_engineer_id', 'service_cost')
+        )
+    ]
+    return {
+        'action': dict(BULK_ACTIONS)[action],
+        'updated': sorted(row[1] for row in changed),
+        'skipped': skipped,
+        'missing': len(complaint_ids) - len(changed) - len(skipped),
+    }
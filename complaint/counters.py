@@ -0,0 +1,183 @@
+# complaint/counters.py
+"""
+Incremental complaint counters backing the dashboards.
+
+ComplaintCounter holds one row per (assigned engineer, status, payment
+status) combination. Every write path that can move a complaint between
+buckets (Complaint.save, deletes, update_complaints) adjusts the counters in
+the same transaction, so dashboards only ever read a handful of rows.
+"""
+
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Complaint, ComplaintCounter
+from .sla import SLA_STATUSES
+
+BUCKET_FIELDS = ('assigned_engineer', 'status', 'payment_status')
+UPDATE_CHUNK_SIZE = 500
+
+# Returned by bucket_before_save when a save cannot change the bucket
+UNCHANGED = object()
+
+
+def bucket_of(complaint):
+    return (complaint.assigned_engineer_id or 0, complaint.status, complaint.payment_status)
+
+
+def apply_deltas(deltas):
+    """
+    Adds each ``{(engineer_key, status, payment_status): delta}`` to the
+    counter table. Must run inside the transaction making the change.
+    """
+    for (engineer_key, status, payment_status), delta in deltas.items():
+        if not delta:
+            continue
+        bucket = ComplaintCounter.objects.filter(engineer_key=engineer_key, status=status, payment_status=payment_status)
+        if bucket.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                ComplaintCounter.objects.create(
+                    engineer_key=engineer_key, status=status, payment_status=payment_status, count=delta
+                )
+        except IntegrityError:
+            # Another transaction created the row first
+            bucket.update(count=F('count') + delta)
+
+
+def bucket_before_save(complaint, update_fields=None):
+    """
+    Returns the bucket a complaint is in before it is saved: None for a new
+    row, UNCHANGED if the save cannot move it. The stored row is read (and
+    locked) rather than trusting the in-memory copy, which may be stale.
+    """
+    if complaint._state.adding:
+        return None
+    if update_fields is not None and not {
+        'assigned_engineer', 'assigned_engineer_id', 'status', 'payment_status'
+    } & set(update_fields):
+        return UNCHANGED
+
+    return _stored_bucket(complaint.pk)
+
+
+def _stored_bucket(pk):
+    # Locks the row until the caller's transaction ends; None if it is gone
+    row = (
+        Complaint.objects.select_for_update()
+        .filter(pk=pk)
+        .values_list('assigned_engineer_id', 'status', 'payment_status')
+        .first()
+    )
+    if row is None:
+        return None
+    return (row[0] or 0, row[1], row[2])
+
+
+def record_save(complaint, old_bucket, update_fields=None):
+    if old_bucket is UNCHANGED:
+        return
+    new_bucket = bucket_of(complaint)
+    if old_bucket == new_bucket:
+        return
+
+    deltas = Counter({new_bucket: 1})
+    if old_bucket is not None:
+        deltas[old_bucket] -= 1
+    apply_deltas(deltas)
+
+
+def record_delete(complaint):
+    """
+    Takes a complaint about to be deleted out of its bucket. Called before
+    the DELETE, in the same transaction, so the stored row can be read: the
+    in-memory copy may be stale, and a row already deleted is not counted.
+    """
+    bucket = _stored_bucket(complaint.pk)
+    if bucket is not None:
+        apply_deltas({bucket: -1})
+
+
+def update_complaints(queryset, **values):
+    """
+    ``queryset.update(**values)`` that keeps the dashboard counters in step.
+
+    Values for ``status``, ``payment_status`` and ``assigned_engineer`` must
+    be literals (not F expressions). Moving rows to a status without an SLA
+    clears ``sla_due_at``; callers moving them to 'open' or 'in_progress'
+    must pass the new deadline themselves. Each row's ``version`` is bumped.
+    Rows are locked and updated by primary
+    key in chunks inside one transaction. Returns the number of rows updated.
+    """
+    if 'assigned_engineer' in values:
+        engineer = values.pop('assigned_engineer')
+        values['assigned_engineer_id'] = getattr(engineer, 'pk', engineer)
+    if values.get('status', 'open') not in SLA_STATUSES:
+        # Only open and in-progress complaints have an SLA deadline
+        values.setdefault('sla_due_at', None)
+    # Copies read before this update can no longer be saved (optimistic locking)
+    values.setdefault('version', F('version') + 1)
+
+    touches_bucket = any(key in values for key in ('assigned_engineer_id', 'status', 'payment_status'))
+    if not touches_bucket:
+        return queryset.update(**values)
+
+    updated = 0
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update()
+            .order_by('pk')
+            .values_list('pk', 'assigned_engineer_id', 'status', 'payment_status')
+        )
+        deltas = Counter()
+        for pk, engineer_id, status, payment_status in rows:
+            old_bucket = (engineer_id or 0, status, payment_status)
+            new_bucket = (
+                values.get('assigned_engineer_id', engineer_id) or 0,
+                values.get('status', status),
+                values.get('payment_status', payment_status),
+            )
+            if old_bucket != new_bucket:
+                deltas[old_bucket] -= 1
+                deltas[new_bucket] += 1
+
+        pks = [row[0] for row in rows]
+        for start in range(0, len(pks), UPDATE_CHUNK_SIZE):
+            updated += Complaint.objects.filter(pk__in=pks[start:start + UPDATE_CHUNK_SIZE]).update(**values)
+        apply_deltas(deltas)
+
+    return updated
+
+
+def reassign_engineer_counters(engineer_id):
+    """
+    Folds a deleted engineer's counters into the unassigned bucket (their
+    complaints are set to NULL by ``on_delete=SET_NULL``).
+    """
+    deltas = Counter()
+    for status, payment_status, count in ComplaintCounter.objects.filter(engineer_key=engineer_id).values_list(
+        'status', 'payment_status', 'count'
+    ):
+        deltas[(0, status, payment_status)] += count
+        deltas[(engineer_id, status, payment_status)] -= count
+    apply_deltas(deltas)
+
+
+def rebuild_complaint_counters():
+    """
+    Recomputes every counter from the complaint table with one GROUP BY.
+    """
+    with transaction.atomic():
+        ComplaintCounter.objects.all().delete()
+        ComplaintCounter.objects.bulk_create([
+            ComplaintCounter(
+                engineer_key=row['assigned_engineer'] or 0,
+                status=row['status'],
+                payment_status=row['payment_status'],
+                count=row['n'],
+            )
+            for row in Complaint.objects.order_by().values(*BUCKET_FIELDS).annotate(n=Count('id'))
+        ])
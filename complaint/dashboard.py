@@ -0,0 +1,67 @@
+# complaint/dashboard.py
+"""
+Dashboard tiles for each role, read from the ComplaintCounter table with a
+single conditional-aggregation query.
+"""
+
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from product.models import Product
+from .models import ComplaintCounter, Profile
+
+
+def _total(condition=None):
+    return Coalesce(Sum('count', filter=condition), 0)
+
+
+def complaint_tiles(engineer=None):
+    """
+    Returns complaint counts by status (plus unassigned and unpaid-resolved
+    totals), optionally restricted to one engineer, in one query.
+    """
+    counters = ComplaintCounter.objects.all()
+    if engineer is not None:
+        counters = counters.filter(engineer_key=engineer.pk)
+
+    return counters.aggregate(
+        total=_total(),
+        open=_total(Q(status='open')),
+        in_progress=_total(Q(status='in_progress')),
+        resolved=_total(Q(status='resolved')),
+        pending=_total(Q(status='pending')),
+        unassigned=_total(Q(engineer_key=0)),
+        unpaid_resolved=_total(Q(status='resolved', payment_status='unpaid')),
+    )
+
+
+def dashboard_stats(role, user=None):
+    """
+    Returns the template context for ``role``'s dashboard.
+    """
+    if role == 'engineer':
+        tiles = complaint_tiles(engineer=user)
+        return {
+            'total_assigned': tiles['total'],
+            'pending_count': tiles['pending'],
+            'resolved_count': tiles['resolved'],
+            'pending_payments': tiles['unpaid_resolved'],
+        }
+
+    tiles = complaint_tiles()
+    if role == 'admin':
+        return {
+            'total_complaints': tiles['total'],
+            'pending_complaints': tiles['pending'],
+            'not_assigned_complaints': tiles['unassigned'],
+            'total_staff': Profile.objects.count(),
+            'total_products': Product.objects.count(),
+        }
+
+    # manager, accountant and tally dashboards share the same tiles
+    return {
+        'total_complaints': tiles['total'],
+        'pending_complaints': tiles['pending'],
+        'inprogress_complaints': tiles['in_progress'],
+        'resolved_complaints': tiles['resolved'],
+    }
@@ -0,0 +1,136 @@
+# complaint/engineers.py
+"""
+Cached engineer directory behind every "assign engineer" dropdown.
+
+Each process keeps its own copy of the engineer names, tagged with the
+directory version: a counter in the TicketSequence table, bumped (in the
+same transaction) whenever users, profiles or service areas change (see
+complaint.signals). A process re-reads the version at most every
+VERSION_CHECK_INTERVAL seconds, so a warm dropdown costs no queries and a
+change made by another process shows up within that time. Open-ticket
+counts come from the dashboard counters and are kept for a short time,
+since they change with every assignment.
+"""
+
+import time
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import ComplaintCounter, TicketSequence
+
+DIRECTORY_TIMEOUT = getattr(settings, 'ENGINEER_DIRECTORY_TIMEOUT', 60 * 60)
+OPEN_TICKETS_TIMEOUT = getattr(settings, 'ENGINEER_OPEN_TICKETS_TIMEOUT', 60)
+VERSION_CHECK_INTERVAL = getattr(settings, 'ENGINEER_DIRECTORY_VERSION_CHECK_INTERVAL', 5)
+OPEN_STATUSES = ('open', 'in_progress', 'pending')
+
+VERSION_SEQUENCE_NAME = 'engineer-directory'
+
+# This process's copies: (value, monotonic time loaded) and the names' version
+_local = {'version': None, 'names': None, 'names_version': None, 'open_tickets': None}
+
+
+def _fresh(entry, timeout):
+    return entry is not None and time.monotonic() - entry[1] < timeout
+
+
+def engineer_queryset():
+    return User.objects.filter(profile__role='engineer')
+
+
+def directory_version():
+    """
+    Current version of the engineer directory. It changes whenever
+    engineers, their profiles or service areas change, so anything built
+    from them (see complaint.assignment) can tell when to rebuild.
+    Re-read from the database at most every VERSION_CHECK_INTERVAL seconds.
+    """
+    if not _fresh(_local['version'], VERSION_CHECK_INTERVAL):
+        version = (
+            TicketSequence.objects.filter(name=VERSION_SEQUENCE_NAME)
+            .values_list('next_value', flat=True)
+            .first()
+        )
+        _local['version'] = (version or 0, time.monotonic())
+    return _local['version'][0]
+
+
+def invalidate_engineer_directory():
+    bumped = TicketSequence.objects.filter(name=VERSION_SEQUENCE_NAME).update(next_value=F('next_value') + 1)
+    if not bumped:
+        # Version row missing: create it (another process may just have)
+        try:
+            with transaction.atomic():
+                TicketSequence.objects.create(name=VERSION_SEQUENCE_NAME, next_value=1)
+        except IntegrityError:
+            TicketSequence.objects.filter(name=VERSION_SEQUENCE_NAME).update(next_value=F('next_value') + 1)
+    # This process sees its own change at once
+    _local.update(version=None, names=None, names_version=None)
+
+
+def _load_names():
+    engineers = engineer_queryset().only('username', 'first_name', 'last_name')
+    return sorted(
+        ((user.pk, user.get_full_name() or user.username) for user in engineers),
+        key=lambda entry: entry[1].lower(),
+    )
+
+
+def load_open_tickets():
+    """
+    Returns ``{engineer id: open tickets}`` read from the dashboard counters
+    (engineers without open tickets are left out). Uncached.
+    """
+    return dict(
+        ComplaintCounter.objects.filter(engineer_key__gt=0, status__in=OPEN_STATUSES)
+        .values('engineer_key')
+        .annotate(total=Sum('count'))
+        .values_list('engineer_key', 'total')
+    )
+
+
+def engineer_directory():
+    """
+    Returns ``[{'id', 'name', 'open_tickets'}, ...]`` for every engineer,
+    sorted by name. No queries while this process's copy is current.
+    """
+    version = directory_version()
+    if _local['names_version'] != version or not _fresh(_local['names'], DIRECTORY_TIMEOUT):
+        _local.update(names=(_load_names(), time.monotonic()), names_version=version)
+    names = _local['names'][0]
+
+    if not _fresh(_local['open_tickets'], OPEN_TICKETS_TIMEOUT):
+        _local['open_tickets'] = (load_open_tickets(), time.monotonic())
+    open_tickets = _local['open_tickets'][0]
+
+    return [{'id': pk, 'name': name, 'open_tickets': open_tickets.get(pk, 0)} for pk, name in names]
+
+
+class EngineerChoiceIterator(forms.models.ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for engineer in engineer_directory():
+            yield (engineer['id'], f"{engineer['name']} ({engineer['open_tickets']} open)")
+
+    def __len__(self):
+        return len(engineer_directory()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(engineer_directory())
+
+
+class EngineerChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField over engineers whose options come from the cached
+    directory. The submitted value is still validated against the database.
+    """
+
+    iterator = EngineerChoiceIterator
+
+    def __init__(self, **kwargs):
+        kwargs['queryset'] = engineer_queryset()
+        super().__init__(**kwargs)
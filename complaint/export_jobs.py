@@ -0,0 +1,130 @@
+# complaint/export_jobs.py
+"""
+Background complaint exports.
+
+List pages queue an ExportJob for the current filter set; the
+``run_export_jobs`` command writes the file under MEDIA_ROOT/exports/ in
+chunks, reporting progress as it goes, and the user downloads it when done.
+"""
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from .exports import complaint_export_columns, iter_complaint_rows, write_csv, write_xlsx
+from .models import ExportJob
+from .queries import complaints_for_role
+
+# Identical requests within this window share one artifact
+REUSE_WINDOW = timedelta(seconds=getattr(settings, 'EXPORT_JOB_REUSE_SECONDS', 600))
+PROGRESS_EVERY = 1000
+
+EXPORT_ROLES = ('admin', 'manager', 'accountant')
+
+
+def filters_hash(role, file_format, filters):
+    payload = json.dumps({'role': role, 'format': file_format, 'filters': filters}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def queue_export_job(user, role, filters, file_format='xlsx'):
+    """
+    Queues an export of ``role``'s complaint list with ``filters``.
+
+    Returns ``(job, created)``. A queued, running or finished job for the
+    same role, format and filters created within REUSE_WINDOW is returned
+    instead of queueing a duplicate.
+    """
+    digest = filters_hash(role, file_format, filters)
+    existing = (
+        ExportJob.objects
+        .filter(filters_hash=digest, created_at__gte=now() - REUSE_WINDOW)
+        .exclude(status='failed')
+        .order_by('-created_at')
+        .first()
+    )
+    if existing:
+        return existing, False
+
+    job = ExportJob.objects.create(
+        requested_by=user,
+        role=role,
+        file_format=file_format,
+        filters=filters,
+        filters_hash=digest,
+    )
+    return job, True
+
+
+def claim_next_job():
+    """
+    Marks the oldest queued job as running and returns it (or None).
+    """
+    with transaction.atomic():
+        job = (
+            ExportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def _with_progress(job, rows):
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % PROGRESS_EVERY == 0:
+            ExportJob.objects.filter(pk=job.pk).update(rows_processed=count)
+    job.rows_processed = count
+
+
+def run_export_job(job):
+    """
+    Writes the export file for ``job`` and records the result.
+    """
+    queryset = complaints_for_role(job.role, job.filters)
+    columns = complaint_export_columns(job.role)
+    headers = [header for header, _ in columns]
+
+    ExportJob.objects.filter(pk=job.pk).update(total_rows=queryset.count())
+
+    relative_name = os.path.join(
+        'exports', f"{job.role}_export_{job.pk}_{now().strftime('%Y%m%d_%H%M')}.{job.file_format}"
+    )
+    path = os.path.join(settings.MEDIA_ROOT, relative_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    rows = _with_progress(job, iter_complaint_rows(queryset, job.role))
+    try:
+        if job.file_format == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as fileobj:
+                write_csv(fileobj, headers, rows)
+        else:
+            with open(path, 'wb') as fileobj:
+                write_xlsx(fileobj, headers, rows, title="Complaints")
+    except Exception as exc:
+        if os.path.exists(path):
+            os.remove(path)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='failed', error=f"{type(exc).__name__}: {exc}", finished_at=now()
+        )
+        raise
+
+    job.file.name = relative_name
+    job.status = 'done'
+    job.finished_at = now()
+    job.save(update_fields=['file', 'status', 'rows_processed', 'finished_at'])
+    return job
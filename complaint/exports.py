@@ -0,0 +1,197 @@
+# complaint/exports.py
+"""
+Constant-memory spreadsheet exports.
+
+Rows are fetched as ``values_list`` tuples in keyset-ordered chunks (joins
+done in SQL), written with openpyxl's write-only workbook, and streamed to
+the client from a temporary file.
+"""
+
+import csv
+import io
+import tempfile
+import zlib
+from datetime import datetime
+
+import openpyxl
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from .models import Complaint
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv'
+GZIP_CONTENT_TYPE = 'application/gzip'
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BLOCK_SIZE = 64 * 1024
+
+STATUS_LABELS = dict(Complaint.STATUS_CHOICES)
+
+# (header, values_list field) per export variant
+COMPLAINT_EXPORT_COLUMNS = [
+    ("Ticket No", 'ticket_number'),
+    ("Customer Name", 'customer_name'),
+    ("Email", 'email'),
+    ("Mobile Number", 'mobile_number'),
+    ("Product", 'product__model_name'),
+    ("Issue Type", 'issue_type'),
+    ("Status", 'status'),
+    ("Engineer", 'assigned_engineer__username'),
+]
+ACCOUNTANT_EXPORT_COLUMNS = COMPLAINT_EXPORT_COLUMNS + [
+    ("Service Cost", 'service_cost'),
+    ("Payment Mode", 'payment_method'),
+]
+
+
+def complaint_export_columns(role=None):
+    columns = ACCOUNTANT_EXPORT_COLUMNS if role == "accountant" else COMPLAINT_EXPORT_COLUMNS
+    return columns + [("Created At", 'created_at')]
+
+
+def _format_value(field, value):
+    if field == 'product__model_name':
+        return value or 'Other'
+    if field == 'assigned_engineer__username':
+        return value or 'Not Assigned'
+    if field == 'status':
+        return STATUS_LABELS.get(value, value)
+    if field == 'created_at':
+        return value.strftime("%Y-%m-%d %H:%M")
+    return '' if value is None else value
+
+
+def iter_values_chunked(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields ``values_list`` rows newest first, fetching ``chunk_size`` rows
+    per query with a (created_at, id) keyset instead of OFFSET.
+    """
+    base = queryset.order_by('-created_at', '-id').values_list('created_at', 'id', *fields)
+    last = None
+    while True:
+        chunk = base
+        if last:
+            chunk = chunk.filter(Q(created_at__lt=last[0]) | Q(created_at=last[0], id__lt=last[1]))
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            yield row[2:]
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][:2]
+
+
+def iter_complaint_rows(queryset, role=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields formatted export rows (without the header) for ``queryset``.
+    """
+    fields = [field for _, field in complaint_export_columns(role)]
+    for values in iter_values_chunked(queryset, fields, chunk_size):
+        yield [_format_value(field, value) for field, value in zip(fields, values)]
+
+
+def write_xlsx(fileobj, headers, rows, title="Sheet"):
+    """
+    Writes ``rows`` to ``fileobj`` with a write-only workbook; rows are
+    flushed to disk as they are appended instead of kept in memory.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def write_csv(fileobj, headers, rows):
+    """
+    Writes ``rows`` to a text-mode ``fileobj`` as CSV, one row at a time.
+    """
+    writer = csv.writer(fileobj)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+
+
+def iter_csv_bytes(headers, rows, compress=False, block_size=STREAM_BLOCK_SIZE):
+    """
+    Yields ``rows`` as UTF-8 CSV in blocks of about ``block_size`` bytes,
+    gzip-compressed on the fly when ``compress`` is set. Nothing is buffered
+    beyond the current block, so the download starts with the first rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= block_size:
+            block = drain()
+            if block:
+                yield block
+
+    block = drain()
+    if compressor:
+        block += compressor.flush()
+    if block:
+        yield block
+
+
+def streaming_csv_response(headers, rows, filename, compress=False):
+    """
+    Streams ``rows`` as a CSV (or ``.csv.gz``) download generated while the
+    response is sent.
+    """
+    content_type = GZIP_CONTENT_TYPE if compress else CSV_CONTENT_TYPE
+    response = StreamingHttpResponse(iter_csv_bytes(headers, rows, compress), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def _read_blocks(fileobj, block_size=STREAM_BLOCK_SIZE):
+    try:
+        while True:
+            block = fileobj.read(block_size)
+            if not block:
+                break
+            yield block
+    finally:
+        fileobj.close()
+
+
+def streaming_file_response(fileobj, filename, content_type):
+    """
+    Streams an open binary file to the client and closes it afterwards.
+    """
+    fileobj.seek(0, 2)
+    size = fileobj.tell()
+    fileobj.seek(0)
+
+    response = StreamingHttpResponse(_read_blocks(fileobj), content_type=content_type)
+    response['Content-Length'] = str(size)
+    response['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+def export_complaints_to_excel(queryset, role=None, username=None):
+    """
+    Streams the complaints in ``queryset`` as an XLSX file.
+
+    ``role`` selects the column set (accountants also get service cost and
+    payment mode) and, with ``username``, the download file name.
+    """
+    columns = complaint_export_columns(role)
+
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(tmp, [header for header, _ in columns], iter_complaint_rows(queryset, role), title="Complaints")
+
+    # Generate file name based on role and time
+    filename = f"{role or 'complaints'}_export_{username or 'user'}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
+    return streaming_file_response(tmp, filename, XLSX_CONTENT_TYPE)
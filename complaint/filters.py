@@ -0,0 +1,77 @@
+# complaint/filters.py
+"""
+django-filter FilterSet behind every complaint list and export.
+"""
+
+from datetime import datetime, time, timedelta
+
+import django_filters
+from django.utils import timezone
+
+from .models import Complaint
+from .search import search_complaints
+
+VALID_STATUSES = {value for value, _ in Complaint.STATUS_CHOICES}
+
+
+def normalize_status(value):
+    """
+    Maps user input such as 'In Progress' or 'PENDING' to the stored value
+    ('in_progress', 'pending'), or None if it is not a known status.
+    """
+    status = (value or '').strip().lower().replace(' ', '_').replace('-', '_')
+    return status if status in VALID_STATUSES else None
+
+
+def day_start(day):
+    """
+    Returns the aware datetime for local midnight at the start of ``day``.
+    """
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class ComplaintFilter(django_filters.FilterSet):
+    """
+    Search/status/date/unassigned filters for ``role``'s complaint list.
+
+    Dates become a half-open ``[from 00:00, to + 1 day 00:00)`` range on the
+    raw ``created_at`` column and statuses are compared exactly after
+    normalization, so both can use the composite indexes on Complaint.
+    Invalid dates are ignored, as before. Free-text search goes through the
+    full-text index (complaint.search) and orders results by ``search_rank``.
+    """
+
+    search = django_filters.CharFilter(method='filter_search')
+    status = django_filters.CharFilter(method='filter_status')
+    from_date = django_filters.DateFilter(method='filter_from_date')
+    to_date = django_filters.DateFilter(method='filter_to_date')
+    unassigned = django_filters.CharFilter(method='filter_unassigned')
+
+    class Meta:
+        model = Complaint
+        fields = []
+
+    def __init__(self, data=None, queryset=None, *, role=None, **kwargs):
+        self.role = role
+        super().__init__(data, queryset, **kwargs)
+
+    def filter_search(self, queryset, name, value):
+        # Ranked full-text match; results are ordered by relevance
+        return search_complaints(queryset, value)
+
+    def filter_status(self, queryset, name, value):
+        normalized = normalize_status(value)
+        if normalized is None:
+            return queryset.none()
+        return queryset.filter(status=normalized)
+
+    def filter_from_date(self, queryset, name, value):
+        return queryset.filter(created_at__gte=day_start(value))
+
+    def filter_to_date(self, queryset, name, value):
+        return queryset.filter(created_at__lt=day_start(value + timedelta(days=1)))
+
+    def filter_unassigned(self, queryset, name, value):
+        if value == 'true':
+            return queryset.filter(assigned_engineer__isnull=True)
+        return queryset
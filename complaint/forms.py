@@ -1,7 +1,11 @@
 from django import forms
 from django.core.validators import RegexValidator, MinLengthValidator, EmailValidator, MinValueValidator
 from django.contrib.auth import get_user_model
+from .engineers import EngineerChoiceField
 from .models import Complaint, Profile
+from .roles import STAFF_ROLES, role_setting
+from .utils import get_user_role, normalize_pincode
+from product.forms import ProductChoiceField
 from product.models import Product
 
 User = get_user_model()
@@ -23,7 +27,7 @@ class ComplaintForm(forms.ModelForm):
 
     # 🆕 Address Fields
     pincode = forms.CharField(
-        max_length=6,
+        max_length=10,
         required=True,
         widget=forms.TextInput(attrs={'placeholder': 'Enter Pincode', 'class': 'form-control'})
     )
@@ -71,22 +75,50 @@ class ComplaintForm(forms.ModelForm):
         widgets = {
             'description': forms.Textarea(attrs={'rows': 4, 'placeholder': 'Describe the issue...'}),
         }
+        field_classes = {'assigned_engineer': EngineerChoiceField, 'product': ProductChoiceField}
 
-    def __init__(self, *args, show_admin_fields=False, **kwargs):
+    def __init__(self, *args, show_admin_fields=False, user=None, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.fields['email'].widget.attrs.update({'placeholder': 'Enter your email address'})
+        # Serial numbers of sold units are for staff only (see product_autocomplete)
+        self.fields['product'].show_serials = get_user_role(user) in STAFF_ROLES
 
-        if 'assigned_engineer' in self.fields:
-            self.fields['assigned_engineer'].queryset = User.objects.filter(profile__role='engineer')
+        self.fields['email'].widget.attrs.update({'placeholder': 'Enter your email address'})
+        self.fields['area'].widget.attrs.update({'list': 'area-suggestions', 'autocomplete': 'off'})
 
         if not show_admin_fields:
             for field in ['status', 'assigned_engineer', 'service_cost', 'payment_method']:
                 self.fields.pop(field, None)
 
+    def clean_pincode(self):
+        pincode = normalize_pincode(self.cleaned_data.get('pincode'))
+        if not pincode:
+            raise forms.ValidationError("Enter a valid 6-digit pincode.")
+        return pincode
+
     
+# 🔒 Optimistic locking for complaint edit forms
+class ComplaintVersionMixin:
+    """
+    Carries the complaint version the form was rendered with in a hidden
+    ``version`` field; saving then fails with ComplaintConflict if the
+    complaint was changed after the form was opened.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['version'] = forms.IntegerField(
+            widget=forms.HiddenInput, required=False, initial=self.instance.version
+        )
+
+    def _post_clean(self):
+        super()._post_clean()
+        if self.cleaned_data.get('version'):
+            self.instance.version = self.cleaned_data['version']
+
+
 # 🛠 Complaint Update Form
-class ComplaintUpdateForm(forms.ModelForm):
+class ComplaintUpdateForm(ComplaintVersionMixin, forms.ModelForm):
     mark_cash_paid = forms.BooleanField(required=False, label="Mark Cash Payment as Paid")
     service_cost = forms.DecimalField(
         required=False,
@@ -96,8 +128,8 @@ class ComplaintUpdateForm(forms.ModelForm):
 
     class Meta:
         model = Complaint
+        # No 'status': it changes only through complaint.transitions
         fields = [
-            'status',
             'assigned_engineer',
             'product_serial_number',
             'service_confirmation_photo',
@@ -105,22 +137,22 @@ class ComplaintUpdateForm(forms.ModelForm):
             'payment_method',
             'payment_confirmation_photo',
         ]
+        field_classes = {'assigned_engineer': EngineerChoiceField}
 
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-        role = getattr(getattr(user, 'profile', None), 'role', None)
+        role = get_user_role(user)
 
-        if 'assigned_engineer' in self.fields:
-            self.fields['assigned_engineer'].queryset = User.objects.filter(profile__role='engineer')
-
-        if role == 'accountant':
-            allowed = ['service_cost', 'payment_method', 'payment_confirmation_photo', 'mark_cash_paid']
+        # Keep only the fields this role may edit (see ROLE_DISPATCH)
+        allowed = role_setting(role, 'update_form_fields')
+        if allowed is not None:
             for field in list(self.fields):
-                if field not in allowed:
+                if field not in allowed and field != 'version':
                     self.fields.pop(field, None)
 
+        if role == 'accountant':
             if self.instance.payment_method != 'cash':
                 self.fields['mark_cash_paid'].widget = forms.HiddenInput()
                 self.fields['mark_cash_paid'].required = False
@@ -128,19 +160,6 @@ class ComplaintUpdateForm(forms.ModelForm):
             if self.instance.payment_method != 'online':
                 self.fields['payment_confirmation_photo'].required = False
 
-        elif role == 'engineer':
-            allowed = ['product_serial_number', 'service_confirmation_photo']
-            for field in list(self.fields):
-                if field not in allowed:
-                    self.fields.pop(field, None)
-
-        elif role not in ['admin', 'manager']:
-            allowed = ['status']
-            for field in list(self.fields):
-                if field not in allowed:
-                    self.fields.pop(field, None)
-            self.fields.pop('mark_cash_paid', None)
-
 #Staff Forms
 ROLE_CHOICES = [
     ('engineer', 'Engineer'),
@@ -203,9 +222,8 @@ class EditStaffForm(forms.ModelForm):
 
 
 # 🧑‍🔧 Manager Edit Form
-class ComplaintManagerEditForm(forms.ModelForm):
-    assigned_engineer = forms.ModelChoiceField(
-        queryset=User.objects.filter(profile__role='engineer'),
+class ComplaintManagerEditForm(ComplaintVersionMixin, forms.ModelForm):
+    assigned_engineer = EngineerChoiceField(
         required=False,
         label='Assign Engineer'
     )
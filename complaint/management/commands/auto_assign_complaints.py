@@ -0,0 +1,87 @@
+import time
+import traceback
+
+from django.core.management.base import BaseCommand, CommandError
+
+from complaint.assignment import (
+    MAX_OPEN_TICKETS, REBALANCE_MIN_GAP, AssignmentEngine, apply_decisions, assign_new_complaints, assigned_complaints,
+    backlog_complaints, plan_backlog, plan_rebalance,
+)
+from complaint.engineers import engineer_directory
+
+
+class Command(BaseCommand):
+    help = 'Assign unassigned open complaints to the least-loaded engineer serving their pincode.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show the planned assignments without saving')
+        parser.add_argument('--rebalance', action='store_true', help='Also move assigned, unresolved complaints to less-loaded engineers')
+        parser.add_argument('--min-gap', type=int, default=REBALANCE_MIN_GAP, help='With --rebalance, only move a complaint if its engineer has at least this many more open tickets')
+        parser.add_argument('--limit', type=int, default=None, help='Plan at most this many complaints of each kind')
+        parser.add_argument('--max-open', type=int, default=MAX_OPEN_TICKETS, help='Give no engineer more open tickets than this (overrides COMPLAINT_AUTO_ASSIGN_MAX_OPEN_TICKETS)')
+        parser.add_argument('--loop', action='store_true', help='Keep running and assign new complaints as they come in')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between passes (with --loop)')
+
+    def handle(self, *args, **options):
+        if options['loop']:
+            if options['dry_run'] or options['rebalance'] or options['limit'] is not None:
+                raise CommandError("--loop can't be combined with --dry-run, --rebalance or --limit.")
+            return self._run_worker(options)
+
+        engine = AssignmentEngine.from_database(options['max_open'])
+        if not engine.prefixes:
+            self.stdout.write(self.style.WARNING("No engineer service areas are set up; nothing to assign."))
+            return
+
+        backlog = backlog_complaints()
+        if options['limit'] is not None:
+            backlog = backlog[:options['limit']]
+        decisions, unmatched = plan_backlog(engine, backlog)
+
+        if options['rebalance']:
+            assigned = assigned_complaints()
+            if options['limit'] is not None:
+                assigned = assigned[:options['limit']]
+            decisions += plan_rebalance(engine, assigned, options['min_gap'])
+
+        names = {engineer['id']: engineer['name'] for engineer in engineer_directory()}
+        if options['dry_run'] or options['verbosity'] >= 2:
+            for _, ticket_number, old_engineer, new_engineer, prefix in decisions:
+                old_name = names.get(old_engineer, 'unassigned') if old_engineer else 'unassigned'
+                self.stdout.write(f"  {ticket_number}: {old_name} → {names.get(new_engineer, new_engineer)} (pincode {prefix}*)")
+
+        if unmatched:
+            self.stdout.write(self.style.WARNING(
+                f"{len(unmatched)} complaints have no engineer with room serving their pincode."
+            ))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"[Dry Run] Would assign {sum(1 for d in decisions if d[2] is None)} and move "
+                f"{sum(1 for d in decisions if d[2] is not None)} complaints."
+            ))
+            self.stdout.write("Open tickets per engineer afterwards:")
+            for engineer_id in sorted(engine.prefixes, key=lambda pk: names.get(pk, '').lower()):
+                self.stdout.write(f"  {names.get(engineer_id, engineer_id)}: {engine.open_tickets[engineer_id]}")
+            return
+
+        changed = apply_decisions(decisions)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Auto-assigned {len(changed)} of {len(decisions)} planned complaints."
+        ))
+
+    def _run_worker(self, options):
+        last_pk = 0
+        while True:
+            try:
+                changed, unmatched, last_pk = assign_new_complaints(last_pk, options['max_open'])
+            except Exception:
+                # Keep the worker alive; the complaints stay unassigned and are retried
+                self.stderr.write(self.style.ERROR(f"❌ Auto-assignment pass failed:\n{traceback.format_exc()}"))
+            else:
+                if changed:
+                    self.stdout.write(
+                        f"Auto-assigned {len(changed)} complaints"
+                        + (f" ({len(unmatched)} still without an engineer serving their pincode)." if unmatched else ".")
+                    )
+            time.sleep(options['interval'])
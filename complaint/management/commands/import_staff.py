@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from complaint.staff import IMPORT_COLUMNS, import_staff, read_staff_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Create staff users, profiles and groups in bulk from a CSV or XLSX file with the columns '
+        + ', '.join(IMPORT_COLUMNS) + ' (only username and role are required).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument(
+            '--password',
+            help='Temporary password for rows without one (otherwise they must use "forgot password")',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            created, skipped, errors = import_staff(read_staff_rows(options['path']), options['password'])
+        except OSError as exc:
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+
+        for number, message in errors:
+            self.stderr.write(f"Row {number}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {created} staff users ({skipped} existing usernames skipped, {len(errors)} rows rejected)."
+        ))
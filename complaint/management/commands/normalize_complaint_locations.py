@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from complaint.models import Complaint
+from complaint.pincodes import normalize_address
+from complaint.search import index_complaints
+
+CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Normalise the pincode, city and state of existing complaints (new and edited ones are normalised on save).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the complaints that would change')
+
+    def handle(self, *args, **options):
+        examined = changed = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                Complaint.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'pincode', 'city', 'state')[:CHUNK_SIZE]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            examined += len(rows)
+
+            updates = []
+            for pk, pincode, city, state in rows:
+                normalized = normalize_address(pincode, city, state)
+                if normalized != (pincode, city, state):
+                    updates.append(Complaint(pk=pk, pincode=normalized[0], city=normalized[1], state=normalized[2]))
+            changed += len(updates)
+            if updates and not options['dry_run']:
+                # Same values, only spelled consistently: no version bump
+                with transaction.atomic():
+                    Complaint.objects.bulk_update(updates, ['pincode', 'city', 'state'])
+                    index_complaints(Complaint.objects.filter(pk__in=[c.pk for c in updates]))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"[Dry Run] Would normalise {changed} of {examined} complaints."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"✅ Normalised {changed} of {examined} complaints."))
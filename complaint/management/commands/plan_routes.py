@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaint.engineers import engineer_directory
+from complaint.exports import write_csv
+from complaint.models import Complaint
+from complaint.routes import ROUTE_EXPORT_HEADERS, ROUTE_VISITS_PER_DAY, iter_route_rows, plan_routes
+
+
+class Command(BaseCommand):
+    help = "Plan daily visit routes over every engineer's open complaints (optionally for one pincode region)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', default='', help='Only complaints whose pincode starts with these digits, e.g. 400')
+        parser.add_argument('--per-day', type=int, default=ROUTE_VISITS_PER_DAY, help='Visits per engineer per day')
+        parser.add_argument('--output', help='Write the routes to this CSV file')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        queryset = Complaint.objects.all()
+        if options['region']:
+            queryset = queryset.filter(pincode__startswith=options['region'])
+        plans = plan_routes(queryset, max(options['per_day'], 1))
+        elapsed = time.perf_counter() - started
+
+        names = {engineer['id']: engineer['name'] for engineer in engineer_directory()}
+        for engineer_id, plan in sorted(plans.items(), key=lambda item: str(names.get(item[0], '')).lower()):
+            visits = sum(len(day) for day in plan['days'])
+            self.stdout.write(
+                f"  {names.get(engineer_id, engineer_id)}: {visits} visits over {len(plan['days'])} days, "
+                f"~{plan['distance_km']} km"
+                + (f", {plan['approximate']} placed by pincode prefix only" if plan['approximate'] else "")
+                + (f", {len(plan['unlocated'])} without a known pincode" if plan['unlocated'] else "")
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fileobj:
+                write_csv(fileobj, ROUTE_EXPORT_HEADERS, iter_route_rows(plans, names))
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Planned routes for {len(plans)} engineers in {elapsed:.2f}s."))
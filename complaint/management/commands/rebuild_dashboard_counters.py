@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from complaint.counters import rebuild_complaint_counters
+from complaint.models import ComplaintCounter
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard complaint counters from the complaint table (e.g. after loaddata or raw SQL edits).'
+
+    def handle(self, *args, **options):
+        rebuild_complaint_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {ComplaintCounter.objects.count()} dashboard counter rows."
+        ))
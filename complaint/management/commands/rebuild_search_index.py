@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from complaint.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the full-text search document of every complaint (e.g. after loaddata or raw SQL edits).'
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {indexed} complaints for search."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaint.export_jobs import claim_next_job, run_export_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued complaint export jobs and write the files to MEDIA_ROOT/exports/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new jobs')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls when idle (with --loop)')
+
+    def handle(self, *args, **options):
+        processed = 0
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            try:
+                run_export_job(job)
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"❌ Export job #{job.pk} failed: {exc}"))
+            else:
+                processed += 1
+                self.stdout.write(f"Export job #{job.pk}: {job.rows_processed} rows written to {job.file.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Processed {processed} export jobs."))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from complaint.notifications import MAX_ATTEMPTS, deliver_pending_notifications
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued SMS and email notifications from the notification outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Notifications to send per batch')
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help='Attempts before a notification is marked failed')
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new notifications')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls when idle (with --loop)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_attempts = options['max_attempts']
+
+        total_sent = total_retried = total_failed = 0
+        while True:
+            sent, retried, failed = deliver_pending_notifications(batch_size=batch_size, max_attempts=max_attempts)
+            total_sent += sent
+            total_retried += retried
+            total_failed += failed
+
+            if sent or retried or failed:
+                self.stdout.write(f"Batch: {sent} sent, {retried} scheduled for retry, {failed} failed.")
+                # A full batch means more may be waiting; go again immediately.
+                if sent + retried + failed >= batch_size:
+                    continue
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Sent {total_sent} notifications ({total_retried} retries scheduled, {total_failed} failed)."
+        ))
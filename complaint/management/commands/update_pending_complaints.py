@@ -1,46 +1,67 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.utils.timezone import now
-from datetime import timedelta
 
-from complaint.models import Complaint
+from complaint.sla import ESCALATION_BATCH_SIZE, due_complaints, escalate_due_complaints, next_sla_due_at
 
 
 class Command(BaseCommand):
     help = 'Automatically update complaints to pending if not assigned or unresolved within deadlines.'
 
-    
+
     def add_arguments(self, parser):
         parser.add_argument('--dry-run', action='store_true', help='Preview changes without saving')
+        parser.add_argument('--batch-size', type=int, default=ESCALATION_BATCH_SIZE, help='Complaints to escalate per transaction')
+        parser.add_argument('--max-runtime', type=float, default=None, help='Stop starting new batches after this many seconds')
+        parser.add_argument('--loop', action='store_true', help='Keep running and wake up at the next SLA deadline')
+        parser.add_argument('--max-sleep', type=float, default=60.0, help='Longest sleep between checks (with --loop), so new deadlines are picked up')
 
     def handle(self, *args, **options):
-        dry_run = options['dry_run']
-        current_time = now()
-
-        deadline_24h = current_time - timedelta(hours=24)
-        unassigned_qs = Complaint.objects.filter(
-            status='open',
-            assigned_engineer__isnull=True,
-            created_at__lte=deadline_24h
-        )
-        count_unassigned = unassigned_qs.count()
-
-        deadline_48h = current_time - timedelta(hours=48)
-        assigned_qs = Complaint.objects.filter(
-            status='in_progress',
-            assigned_engineer__isnull=False,
-            assigned_date__lte=deadline_48h,
-            resolved_date__isnull=True
-        )
-        count_assigned = assigned_qs.count()
-
-        if dry_run:
+        self.verbosity = options['verbosity']
+        if options['dry_run']:
+            due = due_complaints(now())
+            count_unassigned = due.filter(assigned_engineer__isnull=True).count()
+            count_assigned = due.filter(assigned_engineer__isnull=False).count()
             self.stdout.write(self.style.WARNING(
                 f"[Dry Run] Would update {count_unassigned} unassigned and {count_assigned} assigned complaints to 'pending'."
             ))
-        else:
-            unassigned_qs.update(status='pending')
-            assigned_qs.update(status='pending')
-            self.stdout.write(self.style.SUCCESS(
-                f"✅ Updated {count_unassigned} unassigned and {count_assigned} assigned complaints to 'pending'."
-            ))
+            return
+
+        stop_at = None
+        if options['max_runtime'] is not None:
+            stop_at = time.monotonic() + options['max_runtime']
+
+        total = 0
+        while True:
+            # Only rows past their sla_due_at are touched, a short transaction per batch
+            escalated, finished = escalate_due_complaints(
+                now(), batch_size=options['batch_size'], stop_at=stop_at, on_batch=self._report_batch,
+            )
+            total += escalated
+            if escalated:
+                self.stdout.write(f"{now():%Y-%m-%d %H:%M:%S} Escalated {escalated} complaints to 'pending'.")
+
+            if not finished:
+                self.stdout.write(self.style.WARNING("⏱️ Max runtime reached; anything still due is left for the next run."))
+                break
+            if not options['loop']:
+                break
+
+            # Sleep until the earliest deadline, but wake up at least every
+            # --max-sleep seconds for deadlines set in the meantime
+            next_due = next_sla_due_at()
+            delay = options['max_sleep']
+            if next_due is not None:
+                delay = min(delay, max((next_due - now()).total_seconds(), 1.0))
+            if stop_at is not None:
+                delay = min(delay, max(stop_at - time.monotonic(), 0))
+            time.sleep(delay)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Updated {total} complaints to 'pending'."))
 
+    def _report_batch(self, changes):
+        # One line per complaint with -v 2
+        if self.verbosity >= 2:
+            for ticket_number, old_status in changes:
+                self.stdout.write(f"  {ticket_number}: {old_status} → pending")
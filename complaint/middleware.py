@@ -0,0 +1,17 @@
+# complaint/middleware.py
+from .utils import get_user_role
+
+
+class RoleMiddleware:
+    """
+    Resolves the logged-in user's role once per request and exposes it as
+    ``request.role`` (None for anonymous users). Must come after
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.role = get_user_role(request.user)
+        return self.get_response(request)
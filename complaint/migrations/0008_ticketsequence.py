@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+def create_complaint_sequence(apps, schema_editor):
+    TicketSequence = apps.get_model('complaint', 'TicketSequence')
+    TicketSequence.objects.get_or_create(name='complaint', defaults={'next_value': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0007_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Ticket Sequence',
+                'verbose_name_plural': 'Ticket Sequences',
+            },
+        ),
+        migrations.RunPython(create_complaint_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Complaint = apps.get_model('complaint', 'Complaint')
+    ComplaintCounter = apps.get_model('complaint', 'ComplaintCounter')
+    ComplaintCounter.objects.bulk_create([
+        ComplaintCounter(
+            engineer_key=row['assigned_engineer'] or 0,
+            status=row['status'],
+            payment_status=row['payment_status'],
+            count=row['n'],
+        )
+        for row in Complaint.objects.order_by().values('assigned_engineer', 'status', 'payment_status').annotate(n=Count('id'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0010_complaint_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engineer_key', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(max_length=20)),
+                ('payment_status', models.CharField(max_length=10)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Complaint Counter',
+                'verbose_name_plural': 'Complaint Counters',
+                'constraints': [models.UniqueConstraint(fields=('engineer_key', 'status', 'payment_status'), name='complaint_counter_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DOCUMENT_FIELDS = (
+    'ticket_number', 'customer_name', 'mobile_number', 'email', 'description',
+    'street', 'area', 'landmark', 'city', 'state', 'pincode', 'product__model_name',
+)
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE complaint_search_fts USING fts5("
+    "document, content='complaint_complaintsearchdocument', content_rowid='complaint_id')",
+    "CREATE TRIGGER complaint_search_ai AFTER INSERT ON complaint_complaintsearchdocument BEGIN "
+    "INSERT INTO complaint_search_fts(rowid, document) VALUES (new.complaint_id, new.document); END",
+    "CREATE TRIGGER complaint_search_ad AFTER DELETE ON complaint_complaintsearchdocument BEGIN "
+    "INSERT INTO complaint_search_fts(complaint_search_fts, rowid, document) "
+    "VALUES ('delete', old.complaint_id, old.document); END",
+    "CREATE TRIGGER complaint_search_au AFTER UPDATE ON complaint_complaintsearchdocument BEGIN "
+    "INSERT INTO complaint_search_fts(complaint_search_fts, rowid, document) "
+    "VALUES ('delete', old.complaint_id, old.document); "
+    "INSERT INTO complaint_search_fts(rowid, document) VALUES (new.complaint_id, new.document); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS complaint_search_au",
+    "DROP TRIGGER IF EXISTS complaint_search_ad",
+    "DROP TRIGGER IF EXISTS complaint_search_ai",
+    "DROP TABLE IF EXISTS complaint_search_fts",
+]
+MYSQL_FTS = ["ALTER TABLE complaint_complaintsearchdocument ADD FULLTEXT INDEX complaint_search_fulltext (document)"]
+MYSQL_FTS_DROP = ["ALTER TABLE complaint_complaintsearchdocument DROP INDEX complaint_search_fulltext"]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FTS, 'mysql': MYSQL_FTS})
+
+
+def drop_fulltext_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FTS_DROP, 'mysql': MYSQL_FTS_DROP})
+
+
+def populate_documents(apps, schema_editor):
+    Complaint = apps.get_model('complaint', 'Complaint')
+    ComplaintSearchDocument = apps.get_model('complaint', 'ComplaintSearchDocument')
+    batch = []
+    for row in Complaint.objects.order_by('pk').values('pk', *DOCUMENT_FIELDS).iterator(chunk_size=500):
+        text = ' '.join(str(row[field]) for field in DOCUMENT_FIELDS if row[field])
+        batch.append(ComplaintSearchDocument(complaint_id=row['pk'], document=text))
+        if len(batch) >= 500:
+            ComplaintSearchDocument.objects.bulk_create(batch)
+            batch = []
+    ComplaintSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0011_complaintcounter'),
+        ('product', '0002_alter_product_assigned_engineer_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintSearchDocument',
+            fields=[
+                ('complaint', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='complaint.complaint')),
+                ('document', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Complaint Search Document',
+                'verbose_name_plural': 'Complaint Search Documents',
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:43
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_mobile_search(apps, schema_editor):
+    Complaint = apps.get_model('complaint', 'Complaint')
+    batch = []
+    for complaint in Complaint.objects.only('pk', 'mobile_number').order_by('pk').iterator(chunk_size=500):
+        complaint.mobile_normalized = re.sub(r'\D', '', complaint.mobile_number or '')[-10:]
+        complaint.mobile_reversed = complaint.mobile_normalized[::-1]
+        batch.append(complaint)
+        if len(batch) >= 500:
+            Complaint.objects.bulk_update(batch, ['mobile_normalized', 'mobile_reversed'])
+            batch = []
+    Complaint.objects.bulk_update(batch, ['mobile_normalized', 'mobile_reversed'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0012_complaintsearchdocument'),
+        ('product', '0002_alter_product_assigned_engineer_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='mobile_normalized',
+            field=models.CharField(blank=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='mobile_reversed',
+            field=models.CharField(blank=True, default='', editable=False, max_length=15),
+        ),
+        migrations.RunPython(populate_mobile_search, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['mobile_normalized'], name='complaint_mobile_norm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['mobile_reversed'], name='complaint_mobile_rev_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:58
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_sla_due_at(apps, schema_editor):
+    Complaint = apps.get_model('complaint', 'Complaint')
+    unassigned_hours = getattr(settings, 'COMPLAINT_SLA_UNASSIGNED_HOURS', 24)
+    assigned_hours = getattr(settings, 'COMPLAINT_SLA_ASSIGNED_HOURS', 48)
+    Complaint.objects.filter(status='open', assigned_engineer__isnull=True).update(
+        sla_due_at=models.F('created_at') + timedelta(hours=unassigned_hours)
+    )
+    Complaint.objects.filter(
+        status='in_progress', assigned_engineer__isnull=False, assigned_date__isnull=False, resolved_date__isnull=True
+    ).update(
+        sla_due_at=models.F('assigned_date') + timedelta(hours=assigned_hours)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0013_complaint_mobile_search'),
+        ('product', '0004_product_warranty_end_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='sla_due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_sla_due_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['sla_due_at'], name='complaint_sla_due_idx'),
+        ),
+    ]
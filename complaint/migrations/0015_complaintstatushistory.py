@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0014_complaint_sla_due_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('pending', 'Pending')], max_length=20)),
+                ('new_status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('pending', 'Pending')], max_length=20)),
+                ('reason', models.CharField(blank=True, max_length=50)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='complaint.complaint')),
+            ],
+            options={
+                'verbose_name': 'Complaint Status Change',
+                'verbose_name_plural': 'Complaint Status History',
+                'ordering': ['-changed_at'],
+                'indexes': [models.Index(fields=['complaint', 'changed_at'], name='status_history_complaint_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0015_complaintstatushistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 04:10
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0016_complaint_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngineerServiceArea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pincode_prefix', models.CharField(max_length=6, validators=[django.core.validators.RegexValidator('^\\d{1,6}$', 'Enter 1 to 6 leading digits of a pincode.')])),
+                ('engineer', models.ForeignKey(limit_choices_to={'profile__role': 'engineer'}, on_delete=django.db.models.deletion.CASCADE, related_name='service_areas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Engineer Service Area',
+                'verbose_name_plural': 'Engineer Service Areas',
+                'ordering': ['pincode_prefix', 'engineer'],
+                'constraints': [models.UniqueConstraint(fields=('engineer', 'pincode_prefix'), name='engineer_service_area_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 04:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaint', '0017_engineerservicearea'),
+        ('product', '0004_product_warranty_end_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['pincode'], name='complaint_pincode_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['state', 'city'], name='complaint_state_city_idx'),
+        ),
+    ]
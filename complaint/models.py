@@ -1,7 +1,8 @@
-from django.db import models
+from django.core.validators import RegexValidator
+from django.db import DatabaseError, models, transaction
 from django.contrib.auth.models import User
 from django.urls import reverse
-import uuid
+from django.utils import timezone
 from product.models import Product
 
 
@@ -29,6 +30,13 @@ class Profile(models.Model):
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
 
+class ComplaintConflict(DatabaseError):
+    """
+    Raised when a complaint is saved from a stale copy: someone else saved
+    it after it was read (its version no longer matches).
+    """
+
+
 ISSUE_TYPE_CHOICES = [
     ('Screen-blank', 'Screen Blank'),
     ('Total-Dead', 'Total Dead'),
@@ -62,6 +70,9 @@ class Complaint(models.Model):
 
     customer_name = models.CharField(max_length=100)
     mobile_number = models.CharField(max_length=15)
+    # Derived from mobile_number on save for exact and last-digits search
+    mobile_normalized = models.CharField(max_length=15, blank=True, default='', editable=False)
+    mobile_reversed = models.CharField(max_length=15, blank=True, default='', editable=False)
     email = models.EmailField(null=True, blank=True)
     product = models.ForeignKey('product.Product', on_delete=models.CASCADE, null=True, blank=True)
 
@@ -90,6 +101,10 @@ class Complaint(models.Model):
 
     assigned_date = models.DateTimeField(null=True, blank=True)
     resolved_date = models.DateTimeField(null=True, blank=True)
+    # When the complaint becomes overdue in its current state (see complaint.sla)
+    sla_due_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Bumped on every update; saves only apply to the version they were read at
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     product_serial_number = models.CharField(max_length=100, blank=True, null=True)
     service_confirmation_photo = models.ImageField(upload_to='service_confirmations/', blank=True, null=True)
@@ -109,7 +124,7 @@ class Complaint(models.Model):
 
     sms_log = models.TextField(blank=True, null=True)
 
-    # 🔹 Address Fields
+    # 🔹 Address Fields (pincode, city and state are normalised on save, see complaint.pincodes)
     pincode = models.CharField(max_length=10, blank=True, null=True)
     city = models.CharField(max_length=100, blank=True, null=True)
     state = models.CharField(max_length=100, blank=True, null=True)
@@ -117,16 +132,110 @@ class Complaint(models.Model):
     street = models.CharField(max_length=150, blank=True, null=True)
     landmark = models.CharField(max_length=150, blank=True, null=True)  # optional
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the loaded values, for changed_fields()
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def changed_fields(self):
+        """
+        Names of the loaded fields whose value differs from the database row
+        this instance was read from (newly assigned files count as changed).
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.attname not in loaded or field.primary_key:
+                continue
+            value = getattr(self, field.attname)
+            if value != loaded[field.attname] or not getattr(value, '_committed', True):
+                changed.append(field.name)
+        return changed
+
+    def save_changes(self):
+        """
+        Saves only the fields changed since the complaint was read, with the
+        UPDATE conditional on its version (raises ComplaintConflict if it
+        was saved elsewhere in the meantime). Returns False if nothing changed.
+        """
+        changed = self.changed_fields()
+        if changed is None:
+            self.save()
+            return True
+        if not changed:
+            return False
+        self.save(update_fields={*changed, 'updated_at'})
+        return True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # Optimistic locking: only update the row still at the version we read
+        read_version = getattr(self, '_read_version', None)
+        if read_version is None:  # save_base() called directly, e.g. by loaddata
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        updated = super()._do_update(
+            base_qs.filter(version=read_version), using, pk_val, values, update_fields, forced_update
+        )
+        if not updated and base_qs.filter(pk=pk_val).exists():
+            raise ComplaintConflict("The complaint was changed by someone else.")
+        return updated
+
     def save(self, *args, **kwargs):
         if not self.ticket_number:
-            self.ticket_number = f"TCKT-{uuid.uuid4().hex[:8].upper()}"
-        super().save(*args, **kwargs)
+            from .ticketing import allocate_ticket_number
+            self.ticket_number = allocate_ticket_number()
+
+        from .utils import normalize_mobile
+        self.mobile_normalized = normalize_mobile(self.mobile_number)
+        self.mobile_reversed = self.mobile_normalized[::-1]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'mobile_number' in update_fields:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'mobile_normalized', 'mobile_reversed'}
+
+        from .pincodes import normalize_address
+        self.pincode, self.city, self.state = normalize_address(self.pincode, self.city, self.state)
+        if update_fields is not None and {'pincode', 'city', 'state'} & set(update_fields):
+            update_fields = kwargs['update_fields'] = {*update_fields, 'pincode', 'city', 'state'}
+
+        from .sla import SLA_FIELDS, sla_due_at
+        self.sla_due_at = sla_due_at(self)
+        if update_fields is not None and set(SLA_FIELDS) & set(update_fields):
+            update_fields = kwargs['update_fields'] = {*update_fields, 'sla_due_at'}
+
+        self._read_version = self.version
+        if not self._state.adding:
+            self.version += 1
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'version'}
+
+        # Keep the dashboard counters and search document in step with this row, atomically
+        from .counters import bucket_before_save, record_save
+        from .search import DOCUMENT_FIELDS, index_complaint
+        try:
+            with transaction.atomic():
+                old_bucket = bucket_before_save(self, update_fields)
+                super().save(*args, **kwargs)
+                record_save(self, old_bucket, update_fields)
+                if update_fields is None or {'product', 'product_id', *DOCUMENT_FIELDS} & set(update_fields):
+                    index_complaint(self)
+        except ComplaintConflict:
+            self.version = self._read_version
+            raise
+        finally:
+            self._read_version = None
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields if field.attname in self.__dict__
+        }
 
     def get_absolute_url(self):
         return reverse('update_complaint', args=[self.pk])
 
     def __str__(self):
-        return f"{self.customer_name} - {self.product.name if self.product else 'Other'} - {self.ticket_number}"
+        return f"{self.customer_name} - {self.product.model_name if self.product else 'Other'} - {self.ticket_number}"
 
     def full_address(self):
         parts = [
@@ -143,6 +252,106 @@ class Complaint(models.Model):
         ordering = ['-created_at']
         verbose_name = "Customer Complaint"
         verbose_name_plural = "Customer Complaints"
+        indexes = [
+            models.Index(fields=['created_at'], name='complaint_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='complaint_status_created_idx'),
+            models.Index(fields=['assigned_engineer', 'status', 'created_at'], name='complaint_eng_status_idx'),
+            models.Index(fields=['payment_status', 'created_at'], name='complaint_payment_created_idx'),
+            models.Index(fields=['mobile_normalized'], name='complaint_mobile_norm_idx'),
+            models.Index(fields=['mobile_reversed'], name='complaint_mobile_rev_idx'),
+            models.Index(fields=['sla_due_at'], name='complaint_sla_due_idx'),
+            models.Index(fields=['pincode'], name='complaint_pincode_idx'),
+            models.Index(fields=['state', 'city'], name='complaint_state_city_idx'),
+        ]
+
+# 🔹 Dashboard counters: complaint counts per (engineer, status, payment status)
+class ComplaintCounter(models.Model):
+    engineer_key = models.PositiveBigIntegerField(default=0)  # assigned engineer id, 0 = unassigned
+    status = models.CharField(max_length=20)
+    payment_status = models.CharField(max_length=10)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"engineer {self.engineer_key} / {self.status} / {self.payment_status}: {self.count}"
+
+    class Meta:
+        verbose_name = "Complaint Counter"
+        verbose_name_plural = "Complaint Counters"
+        constraints = [
+            models.UniqueConstraint(fields=['engineer_key', 'status', 'payment_status'], name='complaint_counter_bucket_uniq'),
+        ]
+
+# 🔹 Full-text search document (one per complaint, see complaint.search)
+class ComplaintSearchDocument(models.Model):
+    complaint = models.OneToOneField(
+        Complaint, on_delete=models.CASCADE, primary_key=True, related_name='search_document'
+    )
+    document = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for complaint {self.complaint_id}"
+
+    class Meta:
+        verbose_name = "Complaint Search Document"
+        verbose_name_plural = "Complaint Search Documents"
+
+# 🔹 Complaint status history (one row per status change)
+class ComplaintStatusHistory(models.Model):
+    complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, related_name='status_history')
+    old_status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    new_status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reason = models.CharField(max_length=50, blank=True)  # e.g. 'sla_escalation'
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Complaint {self.complaint_id}: {self.old_status} → {self.new_status}"
+
+    class Meta:
+        ordering = ['-changed_at']
+        verbose_name = "Complaint Status Change"
+        verbose_name_plural = "Complaint Status History"
+        indexes = [
+            models.Index(fields=['complaint', 'changed_at'], name='status_history_complaint_idx'),
+        ]
+
+# 🔹 Pincodes an engineer serves (used by complaint.assignment)
+class EngineerServiceArea(models.Model):
+    engineer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='service_areas',
+        limit_choices_to={'profile__role': 'engineer'},
+    )
+    # Leading digits of the pincodes served: '400' covers 400001-400099 etc.
+    pincode_prefix = models.CharField(
+        max_length=6,
+        validators=[RegexValidator(r'^\d{1,6}$', "Enter 1 to 6 leading digits of a pincode.")],
+    )
+
+    def __str__(self):
+        return f"{self.engineer} - {self.pincode_prefix}"
+
+    class Meta:
+        ordering = ['pincode_prefix', 'engineer']
+        verbose_name = "Engineer Service Area"
+        verbose_name_plural = "Engineer Service Areas"
+        constraints = [
+            models.UniqueConstraint(fields=['engineer', 'pincode_prefix'], name='engineer_service_area_unique'),
+        ]
+
+# 🔹 Ticket number sequence (blocks are handed out by complaint.ticketing)
+class TicketSequence(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: next {self.next_value}"
+
+    class Meta:
+        verbose_name = "Ticket Sequence"
+        verbose_name_plural = "Ticket Sequences"
 
 # 🔹 SMS Log Model
 class SMSLog(models.Model):
@@ -157,3 +366,90 @@ class SMSLog(models.Model):
         ordering = ['-sent_at']
         verbose_name = "SMS Log"
         verbose_name_plural = "SMS Logs"
+
+# 🔹 Notification Outbox (delivered by the send_notifications command)
+class NotificationOutbox(models.Model):
+    CHANNEL_CHOICES = [
+        ('sms', 'SMS'),
+        ('email', 'Email'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    complaint = models.ForeignKey(Complaint, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255, blank=True)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_channel_display()} to {self.recipient} ({self.status})"
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        verbose_name = "Notification"
+        verbose_name_plural = "Notification Outbox"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+# 🔹 Background Export Jobs (processed by the run_export_jobs command)
+class ExportJob(models.Model):
+    FORMAT_CHOICES = [
+        ('xlsx', 'Excel (.xlsx)'),
+        ('csv', 'CSV'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    role = models.CharField(max_length=20)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='xlsx')
+    filters = models.JSONField(default=dict, blank=True)
+    filters_hash = models.CharField(max_length=64)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    rows_processed = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    file = models.FileField(upload_to='exports/', blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.role} export #{self.pk} ({self.status})"
+
+    def progress_percent(self):
+        if self.status == 'done':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.rows_processed * 100 / self.total_rows))
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+        indexes = [
+            models.Index(fields=['filters_hash', 'created_at'], name='exportjob_hash_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='exportjob_status_created_idx'),
+        ]
@@ -0,0 +1,148 @@
+# complaint/notifications.py
+"""
+Transactional outbox for customer notifications.
+
+Views only write NotificationOutbox rows (in the same transaction as the
+complaint); the ``send_notifications`` management command delivers them.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.timezone import now
+
+from .models import NotificationOutbox
+from .sms_utils import send_sms_mock, ticket_sms_message
+
+# Retry policy (override in settings.py if needed)
+MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 6)
+RETRY_BASE_SECONDS = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 60)
+RETRY_MAX_SECONDS = getattr(settings, 'NOTIFICATION_RETRY_MAX_SECONDS', 3600)
+
+# A claimed row is hidden from other workers for this long; if the worker
+# dies mid-send the row simply becomes due again.
+CLAIM_LEASE_SECONDS = getattr(settings, 'NOTIFICATION_CLAIM_LEASE_SECONDS', 300)
+
+
+def queue_complaint_notifications(complaint):
+    """
+    Queues the ticket SMS and e-mail for a newly registered complaint.
+
+    Call this inside the transaction that saves the complaint so the
+    complaint and its notifications are committed (or rolled back) together.
+    """
+    entries = [
+        NotificationOutbox(
+            complaint=complaint,
+            channel='sms',
+            recipient=complaint.mobile_number,
+            body=ticket_sms_message(complaint.ticket_number),
+        )
+    ]
+
+    if complaint.email:
+        entries.append(NotificationOutbox(
+            complaint=complaint,
+            channel='email',
+            recipient=complaint.email,
+            subject="Your Complaint Ticket Number",
+            body=render_to_string("emails/complaint_notification_email.txt", {
+                'customer_name': complaint.customer_name,
+                'ticket_number': complaint.ticket_number,
+            }),
+        ))
+
+    return NotificationOutbox.objects.bulk_create(entries)
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff: 1 min, 2 min, 4 min ... capped at RETRY_MAX_SECONDS.
+    """
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size):
+    """
+    Leases up to ``batch_size`` due notifications to the calling worker.
+
+    The claim is a short transaction that only pushes ``next_attempt_at``
+    forward, so no lock is held while talking to the SMS/SMTP servers.
+    """
+    current_time = now()
+    with transaction.atomic():
+        ids = list(
+            NotificationOutbox.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='queued', next_attempt_at__lte=current_time)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            NotificationOutbox.objects.filter(id__in=ids).update(
+                next_attempt_at=current_time + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            )
+
+    return list(NotificationOutbox.objects.filter(id__in=ids).select_related('complaint').order_by('next_attempt_at', 'id'))
+
+
+def _deliver(entry, connection):
+    if entry.channel == 'sms':
+        ticket_number = entry.complaint.ticket_number if entry.complaint else ''
+        send_sms_mock(entry.recipient, ticket_number)
+    else:
+        # Opening explicitly keeps the backend from closing the connection
+        # after each message, so the whole batch reuses one SMTP session.
+        connection.open()
+        EmailMessage(
+            entry.subject,
+            entry.body,
+            settings.DEFAULT_FROM_EMAIL,
+            [entry.recipient],
+            connection=connection,
+        ).send()
+
+
+def deliver_pending_notifications(batch_size=50, max_attempts=MAX_ATTEMPTS):
+    """
+    Sends one batch of due notifications and records the outcome of each.
+
+    All e-mails in the batch share a single SMTP connection. Failures are
+    rescheduled with exponential backoff until ``max_attempts`` is reached,
+    after which the row is marked as failed.
+
+    Returns a ``(sent, retried, failed)`` tuple.
+    """
+    batch = claim_batch(batch_size)
+    sent = retried = failed = 0
+    if not batch:
+        return sent, retried, failed
+
+    connection = get_connection(fail_silently=False)
+    try:
+        for entry in batch:
+            entry.attempts += 1
+            try:
+                _deliver(entry, connection)
+            except Exception as exc:
+                entry.last_error = f"{type(exc).__name__}: {exc}"
+                if entry.attempts >= max_attempts:
+                    entry.status = 'failed'
+                    failed += 1
+                else:
+                    entry.next_attempt_at = now() + retry_delay(entry.attempts)
+                    retried += 1
+            else:
+                entry.status = 'sent'
+                entry.sent_at = now()
+                entry.last_error = ''
+                sent += 1
+
+            entry.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+    finally:
+        connection.close()
+
+    return sent, retried, failed
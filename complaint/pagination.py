@@ -0,0 +1,150 @@
+# complaint/pagination.py
+"""
+Keyset (cursor) pagination.
+
+Pages are fetched with ``WHERE (created_at, id) < (last seen)`` instead of
+``OFFSET`` and without a ``COUNT(*)``, so page 5,000 costs the same as page 1.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+# estimated_total never counts more than this many rows
+ESTIMATE_CAP = 1000
+
+
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode_value(value):
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is not None:
+            return parsed
+    return value
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps({'k': [_encode_value(v) for v in values], 'd': direction})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Returns ``(values, direction)`` or ``None`` for a missing/garbled cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_decode_value(v) for v in payload['k']]
+        direction = payload['d']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if direction not in ('next', 'prev'):
+        return None
+    return values, direction
+
+
+class KeysetPage:
+    def __init__(self, paginator, object_list, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def next_cursor(self):
+        if not (self.has_next and self.object_list):
+            return None
+        return encode_cursor(self.paginator.key_for(self.object_list[-1]), 'next')
+
+    @property
+    def previous_cursor(self):
+        if not (self.has_previous and self.object_list):
+            return None
+        return encode_cursor(self.paginator.key_for(self.object_list[0]), 'prev')
+
+    @cached_property
+    def estimated_total(self):
+        """
+        Row count of the whole result set, capped at ESTIMATE_CAP so it stays
+        cheap on large tables (see ``total_is_capped``).
+        """
+        return self.paginator.queryset.order_by()[:ESTIMATE_CAP].count()
+
+    @property
+    def total_is_capped(self):
+        return self.estimated_total >= ESTIMATE_CAP
+
+
+class KeysetPaginator:
+    """
+    Paginates ``queryset`` by ``ordering`` (by default the queryset's own
+    ``order_by()``), whose last field must be unique (normally the primary
+    key) so every row has a distinct key.
+    """
+
+    def __init__(self, queryset, per_page=10, ordering=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering or queryset.query.order_by or DEFAULT_ORDERING)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+
+    def key_for(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    def _seek(self, values, forward):
+        """
+        Builds the row-value comparison "after ``values``" (or "before" when
+        ``forward`` is False) in the paginator's ordering.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            op = 'lt' if descending == forward else 'gt'
+            term = Q(**{f'{name}__{op}': values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                term &= Q(**{prev_name: prev_value})
+            condition |= term
+        return condition
+
+    def get_page(self, cursor=None):
+        decoded = decode_cursor(cursor)
+        if decoded is not None and len(decoded[0]) != len(self.fields):
+            decoded = None
+
+        if decoded is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return KeysetPage(self, rows[:self.per_page], len(rows) > self.per_page, False)
+
+        values, direction = decoded
+        if direction == 'next':
+            qs = self.queryset.filter(self._seek(values, forward=True)).order_by(*self.ordering)
+            rows = list(qs[:self.per_page + 1])
+            return KeysetPage(self, rows[:self.per_page], len(rows) > self.per_page, True)
+
+        reversed_ordering = [f[1:] if f.startswith('-') else f'-{f}' for f in self.ordering]
+        qs = self.queryset.filter(self._seek(values, forward=False)).order_by(*reversed_ordering)
+        rows = list(qs[:self.per_page + 1])
+        page_rows = rows[:self.per_page][::-1]
+        return KeysetPage(self, page_rows, True, len(rows) > self.per_page)
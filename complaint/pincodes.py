@@ -0,0 +1,216 @@
+# complaint/pincodes.py
+"""
+Offline pincode directory for address autofill and normalisation.
+
+The directory is read once per process from a local CSV
+(complaint/data/pincodes.csv, or the file named by
+COMPLAINT_PINCODE_DIRECTORY_FILE). The columns are those of the India Post
+pincode directory: pincode, officename, district and statename, with
+area, city and state accepted too. The India Post file can therefore
+replace the small bundled one as it is, gzip-compressed (``.csv.gz``)
+or not. The complaint form falls back to India Post's public
+API for pincodes the directory doesn't list.
+
+PincodeDirectory keeps one entry per pincode in parallel arrays: the sorted
+pincodes as 32-bit integers, and indexes into shared lists of city and
+state names and post-office (area) names. A lookup is a binary search of a
+few microseconds; for the full directory (~19,000 pincodes) the arrays take
+under 300 KB besides the names themselves.
+
+Complaint.save normalises ``pincode``, ``city`` and ``state`` with
+normalize_address(), so the (indexed) location columns can be grouped and
+filtered on.
+"""
+
+import csv
+import gzip
+import re
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+from .utils import PINCODE_DIGITS, normalize_pincode
+
+PINCODE_DIRECTORY_FILE = getattr(
+    settings, 'COMPLAINT_PINCODE_DIRECTORY_FILE', Path(__file__).resolve().parent / 'data' / 'pincodes.csv'
+)
+MAX_CITY_PINCODES = 50
+
+# Column names accepted for each value (India Post names first)
+_COLUMNS = {
+    'area': ('officename', 'area'),
+    'city': ('district', 'city'),
+    'state': ('statename', 'state'),
+}
+_SPACES_RE = re.compile(r'\s+')
+_LETTERS_RE = re.compile(r'[^\W\d_]+')
+_LOWERCASE_WORDS = {'and', 'of'}
+
+
+def _clean(value):
+    return _SPACES_RE.sub(' ', value or '').strip()
+
+
+def _display_name(value):
+    # 'NEW DELHI' / 'new delhi' -> 'New Delhi', 'S.O' stays 'S.O';
+    # mixed case ('Mumbai GPO') is kept as typed
+    value = _clean(value)
+    if not (value.isupper() or value.islower()):
+        return value
+    return ' '.join(
+        word.lower() if index and word.lower() in _LOWERCASE_WORDS
+        else _LETTERS_RE.sub(lambda match: match.group(0).capitalize(), word)
+        for index, word in enumerate(value.split(' '))
+    )
+
+
+class PincodeDirectory:
+    """
+    Sorted, array-backed pincode table. ``rows`` are ``(pincode, area,
+    city, state)``; for a pincode listed several times (one row per post
+    office) the first city and state are kept and the areas collected.
+    """
+
+    def __init__(self, rows):
+        entries = {}
+        names = {}  # raw -> display name; the same few names repeat on every row
+        for pincode, area, city, state in rows:
+            pincode = normalize_pincode(pincode)
+            if not pincode:
+                continue
+            for raw in (city, state, area):
+                if raw not in names:
+                    names[raw] = _display_name(raw)
+            city, state, area = names[city], names[state], names[area]
+            if not (city and state):
+                continue
+            entry = entries.setdefault(int(pincode), (city, state, []))
+            if area and area not in entry[2]:
+                entry[2].append(area)
+
+        self.cities = sorted({city for city, _, _ in entries.values()})
+        self.states = sorted({state for _, state, _ in entries.values()})
+        city_index = {city: index for index, city in enumerate(self.cities)}
+        state_index = {state: index for index, state in enumerate(self.states)}
+
+        self._codes = array('I')
+        self._city = array('I')
+        self._state = array('H')
+        self._area_offsets = array('I', [0])
+        areas = []
+        for code in sorted(entries):
+            city, state, office_areas = entries[code]
+            self._codes.append(code)
+            self._city.append(city_index[city])
+            self._state.append(state_index[state])
+            areas.extend(office_areas)
+            self._area_offsets.append(len(areas))
+        self._areas = tuple(areas)
+
+        # Case-insensitive canonical names, for normalising typed values
+        self._canonical = {name.lower(): name for name in (*self.cities, *self.states)}
+        self._by_city = defaultdict(list)
+        for position, index in enumerate(self._city):
+            self._by_city[self.cities[index].lower()].append(position)
+
+    def __len__(self):
+        return len(self._codes)
+
+    def _position(self, pincode):
+        pincode = normalize_pincode(pincode)
+        if not pincode:
+            return None
+        code = int(pincode)
+        position = bisect_left(self._codes, code)
+        if position < len(self._codes) and self._codes[position] == code:
+            return position
+        return None
+
+    def _entry(self, position):
+        return {
+            'pincode': str(self._codes[position]).zfill(PINCODE_DIGITS),
+            'city': self.cities[self._city[position]],
+            'state': self.states[self._state[position]],
+            'areas': list(self._areas[self._area_offsets[position]:self._area_offsets[position + 1]]),
+        }
+
+    def lookup(self, pincode):
+        """
+        Returns ``{'pincode', 'city', 'state', 'areas'}`` for ``pincode``,
+        or None if it is not in the directory.
+        """
+        position = self._position(pincode)
+        return None if position is None else self._entry(position)
+
+    def pincodes_for_city(self, city, state=None):
+        """
+        Pincodes of ``city`` (optionally only in ``state``), in order.
+        """
+        positions = self._by_city.get(_clean(city).lower(), ())
+        if state:
+            state = _clean(state).lower()
+            positions = [p for p in positions if self.states[self._state[p]].lower() == state]
+        return [str(self._codes[p]).zfill(PINCODE_DIGITS) for p in positions[:MAX_CITY_PINCODES]]
+
+    def canonical_name(self, value):
+        """
+        The directory's spelling of a city or state name typed in any case,
+        or the cleaned-up value if the directory doesn't know it.
+        """
+        value = _clean(value)
+        return self._canonical.get(value.lower()) or _display_name(value)
+
+
+def open_directory_file(path):
+    """
+    Opens a directory CSV for reading, decompressing ``.gz`` files.
+    """
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', newline='', encoding='utf-8')
+    return open(path, newline='', encoding='utf-8')
+
+
+def load_directory(path):
+    with open_directory_file(path) as fileobj:
+        reader = csv.reader(fileobj)
+        header = [name.strip().lower() for name in next(reader, [])]
+
+        def column(names):
+            return next((header.index(name) for name in names if name in header), None)
+
+        indexes = [column(('pincode',)), column(_COLUMNS['area']), column(_COLUMNS['city']), column(_COLUMNS['state'])]
+        if None in (indexes[0], indexes[2], indexes[3]):
+            raise ValueError(f"{path}: needs pincode, city/district and state/statename columns")
+        width = max(i for i in indexes if i is not None) + 1
+        return PincodeDirectory(
+            tuple(row[i] if i is not None else '' for i in indexes)
+            for row in reader if len(row) >= width
+        )
+
+
+@lru_cache(maxsize=1)
+def pincode_directory():
+    return load_directory(PINCODE_DIRECTORY_FILE)
+
+
+def normalize_address(pincode, city, state):
+    """
+    Returns the ``(pincode, city, state)`` to store: a 6-digit pincode, and
+    the directory's city and state for a known pincode, otherwise the typed
+    names with whitespace and capitalisation tidied up. Blank values stay
+    as they are.
+    """
+    code = normalize_pincode(pincode)
+    directory = pincode_directory()
+    entry = directory.lookup(code) if code else None
+    if entry is not None:
+        return code, entry['city'], entry['state']
+    return (
+        code or (_clean(pincode) if pincode else pincode),
+        directory.canonical_name(city) if city else city,
+        directory.canonical_name(state) if state else state,
+    )
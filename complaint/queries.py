@@ -0,0 +1,69 @@
+# complaint/queries.py
+"""
+Complaint query service shared by the list views, exports and export jobs.
+
+``complaints_for_role`` is the single code path: it scopes the queryset to
+the role, joins the related rows each list template renders, restricts the
+columns with ``only()`` and applies ComplaintFilter.
+"""
+
+from .filters import ComplaintFilter
+from .models import Complaint
+
+FILTER_KEYS = ('search', 'status', 'from_date', 'to_date', 'unassigned')
+
+_ENGINEER_NAME = ('assigned_engineer__username', 'assigned_engineer__first_name', 'assigned_engineer__last_name')
+
+# Columns each role's list template renders
+LIST_FIELDS = {
+    'admin': (
+        'ticket_number', 'customer_name', 'mobile_number', 'email', 'product__model_name',
+        'issue_type', 'status', 'assigned_engineer__username', 'created_at', 'payment_status',
+    ),
+    'manager': ('ticket_number', 'customer_name', 'product__model_name', 'status', 'created_at') + _ENGINEER_NAME,
+    'accountant': (
+        'ticket_number', 'customer_name', 'product__model_name', 'status', 'service_cost',
+        'payment_method', 'created_at',
+    ),
+    'tally': ('ticket_number', 'customer_name', 'product__model_name', 'status', 'created_at') + _ENGINEER_NAME,
+    'engineer': (
+        'ticket_number', 'customer_name', 'mobile_number', 'street', 'area', 'landmark', 'city',
+        'state', 'pincode', 'product__model_name', 'issue_type', 'status', 'created_at', 'payment_status',
+    ),
+}
+
+
+def complaint_filters_from(data):
+    """
+    Extracts the list filters from a GET/POST QueryDict, dropping blanks.
+    """
+    filters = {}
+    for key in FILTER_KEYS:
+        value = (data.get(key) or '').strip()
+        if value:
+            filters[key] = value
+    return filters
+
+
+def base_queryset(role, user=None):
+    """
+    Complaints visible to ``role``, joined to and restricted to the columns
+    its list renders. Engineers only see complaints assigned to ``user``.
+    """
+    queryset = Complaint.objects.all()
+    if role == 'engineer':
+        queryset = queryset.filter(assigned_engineer=user)
+
+    fields = LIST_FIELDS.get(role)
+    if fields:
+        related = sorted({field.split('__')[0] for field in fields if '__' in field})
+        queryset = queryset.select_related(*related).only(*related, *fields)
+
+    return queryset.order_by('-created_at', '-id')
+
+
+def complaints_for_role(role, filters=None, user=None):
+    """
+    Returns the filtered complaint queryset ``role``'s list page shows.
+    """
+    return ComplaintFilter(filters or {}, queryset=base_queryset(role, user), role=role).qs
@@ -0,0 +1,99 @@
+# complaint/roles.py
+"""
+Per-role settings used by the views in place of if/elif chains on the role.
+"""
+
+from django.shortcuts import redirect
+
+# 🔹 Role dispatch table
+#   base_template: layout the role's pages extend
+#   dashboard: URL name the role lands on after login
+#   update_form_fields: ComplaintUpdateForm fields the role may edit (None = all)
+ROLE_DISPATCH = {
+    'admin': {
+        'base_template': 'base.html',
+        'dashboard': 'admin_dashboard',
+        'update_form_fields': None,
+    },
+    'manager': {
+        'base_template': 'base_manager.html',
+        'dashboard': 'manager_dashboard',
+        'update_form_fields': None,
+    },
+    'engineer': {
+        'base_template': 'base_engineer.html',
+        'dashboard': 'engineer_dashboard',
+        'update_form_fields': ('product_serial_number', 'service_confirmation_photo'),
+    },
+    'accountant': {
+        'base_template': 'base_accountant.html',
+        'dashboard': 'accountant_dashboard',
+        'update_form_fields': ('service_cost', 'payment_method', 'payment_confirmation_photo', 'mark_cash_paid'),
+    },
+    'tally': {
+        'base_template': 'base_tallyuser.html',
+        'dashboard': 'tally_dashboard',
+        'update_form_fields': (),
+    },
+    'customer': {
+        'base_template': 'base_public.html',
+        'dashboard': 'public_complaint_form',
+        'update_form_fields': (),
+    },
+}
+
+# Used for anonymous users and unknown roles
+DEFAULT_ROLE_SETTINGS = {
+    'base_template': 'base_public.html',
+    'dashboard': None,
+    'update_form_fields': (),
+}
+
+# Roles with a staff dashboard
+STAFF_ROLES = ('admin', 'manager', 'engineer', 'accountant', 'tally')
+
+
+def role_setting(role, key):
+    return ROLE_DISPATCH.get(role, DEFAULT_ROLE_SETTINGS)[key]
+
+
+def base_template_for(role):
+    return role_setting(role, 'base_template')
+
+
+def dashboard_for(role, fallback='login'):
+    """
+    Returns the URL name of ``role``'s dashboard, or ``fallback`` for unknown roles.
+    """
+    return role_setting(role, 'dashboard') or fallback
+
+
+def redirect_to_dashboard(role, fallback='login'):
+    return redirect(dashboard_for(role, fallback))
+
+
+# 🔹 Staff roles as entered on the staff forms and import files
+# Spellings used by AddStaffForm / EditStaffForm and spreadsheets -> Profile role
+ROLE_ALIASES = {
+    'service_manager': 'manager',
+    'service_engineer': 'engineer',
+    'tally_user': 'tally',
+}
+
+# Group each Profile role is put in (the names the staff screens filter on)
+STAFF_ROLE_GROUPS = {
+    'engineer': 'engineer',
+    'manager': 'service_manager',
+    'accountant': 'accountant',
+    'tally': 'tally_user',
+}
+
+
+def normalize_role(value):
+    """
+    Maps 'Service Manager', 'service_manager', 'MANAGER', ... to the Profile
+    role ('manager'), or None if it is not a staff role.
+    """
+    role = (value or '').strip().lower().replace(' ', '_').replace('-', '_')
+    role = ROLE_ALIASES.get(role, role)
+    return role if role in STAFF_ROLE_GROUPS else None
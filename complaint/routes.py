@@ -0,0 +1,294 @@
+# complaint/routes.py
+"""
+Daily visit routes for engineers.
+
+Each open complaint of an engineer is placed at its pincode's centroid,
+read from the latitude/longitude columns of the local pincode directory
+(see complaint.pincodes), or of the file named by
+COMPLAINT_PINCODE_CENTROIDS_FILE. A pincode missing from the
+table falls back to the mean of the known pincodes sharing its longest
+prefix; complaints without a usable pincode are listed separately.
+
+Stops are grouped into clusters by the first CLUSTER_DIGITS digits of the
+pincode (the postal sorting district). Clusters are visited in
+nearest-neighbour order starting at the cluster of the oldest complaint,
+the stops in each cluster are ordered by nearest neighbour improved with
+2-opt, and the route is cut into days of ROUTE_VISITS_PER_DAY visits.
+Stops placed by the prefix fallback share one point, so distances between
+them mean nothing: a cluster with any such stop is visited in pincode order
+instead (neighbouring pincodes are usually neighbouring delivery areas).
+Ordering within clusters therefore needs a centroid table covering the
+pincodes served; the bundled directory lists only a few head post offices.
+Everything runs in memory on a few columns per complaint, so a region's
+engineers are planned in well under a second.
+"""
+
+import csv
+import math
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+
+from .exports import streaming_csv_response
+from .models import Complaint
+from .pincodes import PINCODE_DIRECTORY_FILE, open_directory_file
+from .transitions import ACTIVE_STATUSES
+from .utils import normalize_pincode
+
+CENTROIDS_FILE = getattr(settings, 'COMPLAINT_PINCODE_CENTROIDS_FILE', PINCODE_DIRECTORY_FILE)
+ROUTE_VISITS_PER_DAY = getattr(settings, 'COMPLAINT_ROUTE_VISITS_PER_DAY', 8)
+CLUSTER_DIGITS = 3
+# 2-opt is quadratic per pass; longer routes keep the nearest-neighbour order
+TWO_OPT_MAX_STOPS = 300
+TWO_OPT_MAX_PASSES = 20
+EARTH_RADIUS_KM = 6371.0
+
+ROUTE_FIELDS = (
+    'pk', 'ticket_number', 'customer_name', 'mobile_number', 'street', 'area', 'landmark',
+    'city', 'state', 'pincode', 'status', 'created_at', 'assigned_engineer_id',
+)
+ROUTE_EXPORT_HEADERS = [
+    'Engineer', 'Day', 'Stop', 'Ticket Number', 'Customer Name', 'Mobile Number',
+    'Address', 'Pincode', 'Cluster', 'Distance from previous (km)',
+]
+
+
+# 🔹 Pincode centroids
+def load_centroids(path):
+    """
+    Reads ``{pincode: (latitude, longitude)}`` from a CSV with pincode,
+    latitude and longitude columns (any case, other columns ignored).
+    Pincodes listed several times, one row per post office, are averaged.
+    """
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    with open_directory_file(path) as fileobj:
+        for row in csv.DictReader(fileobj):
+            row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+            pincode = normalize_pincode(row.get('pincode'))
+            try:
+                latitude, longitude = float(row['latitude']), float(row['longitude'])
+            except (KeyError, ValueError):  # e.g. 'NA' in the India Post file
+                continue
+            if pincode and -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                entry = sums[pincode]
+                entry[0] += latitude
+                entry[1] += longitude
+                entry[2] += 1
+    return {pincode: (lat / count, lon / count) for pincode, (lat, lon, count) in sums.items()}
+
+
+def _prefix_centroids(centroids):
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    for pincode, (latitude, longitude) in centroids.items():
+        for length in range(1, len(pincode)):
+            entry = sums[pincode[:length]]
+            entry[0] += latitude
+            entry[1] += longitude
+            entry[2] += 1
+    return {prefix: (lat / count, lon / count) for prefix, (lat, lon, count) in sums.items()}
+
+
+@lru_cache(maxsize=1)
+def pincode_locator():
+    """
+    Returns ``(centroids, prefix centroids)``, loaded once per process.
+    """
+    centroids = load_centroids(CENTROIDS_FILE)
+    return centroids, _prefix_centroids(centroids)
+
+
+def locate(pincode):
+    """
+    Returns the ``(latitude, longitude)`` used for ``pincode``, or None.
+    """
+    pincode = normalize_pincode(pincode)
+    if not pincode:
+        return None
+    centroids, prefixes = pincode_locator()
+    if pincode in centroids:
+        return centroids[pincode]
+    for length in range(len(pincode) - 1, 0, -1):
+        if pincode[:length] in prefixes:
+            return prefixes[pincode[:length]]
+    return None
+
+
+def distance_km(a, b):
+    """
+    Great-circle (haversine) distance between two ``(lat, lon)`` points.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(h, 1.0)))
+
+
+# 🔹 Ordering stops
+def _nearest_neighbour(dist, start):
+    order = [start]
+    remaining = [index for index in range(len(dist)) if index != start]
+    while remaining:
+        last = dist[order[-1]]
+        # min() keeps the first of equal distances: ties go to the older complaint
+        position = min(range(len(remaining)), key=lambda k: last[remaining[k]])
+        order.append(remaining.pop(position))
+    return order
+
+
+def _two_opt(dist, order):
+    # Open path with a fixed first stop: reversing order[i+1..j] swaps the
+    # edges (i, i+1) and (j, j+1) for (i, j) and (i+1, j+1)
+    n = len(order)
+    for _ in range(TWO_OPT_MAX_PASSES):
+        improved = False
+        for i in range(n - 2):
+            a, b = order[i], order[i + 1]
+            for j in range(i + 2, n):
+                c = order[j]
+                d = order[j + 1] if j + 1 < n else None
+                delta = dist[a][c] - dist[a][b]
+                if d is not None:
+                    delta += dist[b][d] - dist[c][d]
+                if delta < -1e-9:
+                    order[i + 1:j + 1] = order[i + 1:j + 1][::-1]
+                    b = order[i + 1]
+                    improved = True
+        if not improved:
+            break
+    return order
+
+
+def order_stops(points, start=0):
+    """
+    Returns the indexes of ``points`` in visiting order, beginning with
+    ``points[start]``: nearest neighbour, then 2-opt.
+    """
+    if len(points) <= 2:
+        return [start] + [index for index in range(len(points)) if index != start] if points else []
+    dist = [[distance_km(a, b) for b in points] for a in points]
+    order = _nearest_neighbour(dist, start)
+    if len(points) <= TWO_OPT_MAX_STOPS:
+        order = _two_opt(dist, order)
+    return order
+
+
+def _closest(points, origin):
+    return min(range(len(points)), key=lambda index: distance_km(origin, points[index]))
+
+
+def _mean(points):
+    return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+
+# 🔹 Route plans
+def plan_route(complaints, visits_per_day=ROUTE_VISITS_PER_DAY):
+    """
+    Plans the visits for one engineer's complaints (dicts with the
+    ROUTE_FIELDS keys).
+
+    Returns ``{'days': [[stop, ...], ...], 'unlocated': [complaint, ...],
+    'approximate': count, 'distance_km': total}``; a stop is
+    ``{'complaint', 'cluster', 'leg_km', 'approximate'}``, ``leg_km`` being
+    the distance from the previous stop and ``approximate`` telling that
+    the pincode has no centroid of its own.
+    """
+    centroids = pincode_locator()[0]
+    clusters = defaultdict(list)
+    unlocated = []
+    for complaint in sorted(complaints, key=lambda c: (c['created_at'], c['pk'])):
+        point = locate(complaint['pincode'])
+        if point is None:
+            unlocated.append(complaint)
+        else:
+            pincode = normalize_pincode(complaint['pincode'])
+            clusters[pincode[:CLUSTER_DIGITS]].append((point, complaint, pincode))
+
+    # Clusters in nearest-neighbour order from the one holding the oldest complaint
+    keys = list(clusters)  # insertion order: by oldest complaint
+    cluster_order = order_stops([_mean([member[0] for member in clusters[key]]) for key in keys])
+
+    stops = []
+    previous = None
+    for key in (keys[index] for index in cluster_order):
+        members = clusters[key]
+        points = [point for point, _, _ in members]
+        if all(pincode in centroids for _, _, pincode in members):
+            start = 0 if previous is None else _closest(points, previous)
+            order = order_stops(points, start)
+        else:
+            # sorted() is stable: the older complaint first within a pincode
+            order = sorted(range(len(members)), key=lambda index: members[index][2])
+        for index in order:
+            point, complaint, pincode = members[index]
+            leg = 0.0 if previous is None else distance_km(previous, point)
+            stops.append({
+                'complaint': complaint, 'cluster': key, 'leg_km': round(leg, 1),
+                'approximate': pincode not in centroids,
+            })
+            previous = point
+
+    visits_per_day = max(visits_per_day, 1)
+    return {
+        'days': [stops[start:start + visits_per_day] for start in range(0, len(stops), visits_per_day)],
+        'unlocated': unlocated,
+        'approximate': sum(stop['approximate'] for stop in stops),
+        'distance_km': round(sum(stop['leg_km'] for stop in stops), 1),
+    }
+
+
+def route_complaints(queryset=None):
+    """
+    Open, assigned complaints as dicts of ROUTE_FIELDS.
+    """
+    queryset = Complaint.objects.all() if queryset is None else queryset
+    return (
+        queryset.filter(status__in=ACTIVE_STATUSES, assigned_engineer__isnull=False)
+        .order_by('created_at', 'pk')
+        .values(*ROUTE_FIELDS)
+    )
+
+
+def plan_routes(queryset=None, visits_per_day=ROUTE_VISITS_PER_DAY):
+    """
+    Plans routes for every engineer with open complaints in ``queryset``.
+    Returns ``{engineer id: plan}``.
+    """
+    by_engineer = defaultdict(list)
+    for complaint in route_complaints(queryset):
+        by_engineer[complaint['assigned_engineer_id']].append(complaint)
+    return {engineer_id: plan_route(complaints, visits_per_day) for engineer_id, complaints in by_engineer.items()}
+
+
+def _address(complaint):
+    parts = (complaint[field] for field in ('street', 'area', 'landmark', 'city', 'state'))
+    return ', '.join(part for part in parts if part)
+
+
+def iter_route_rows(plans, engineer_names):
+    """
+    Yields ROUTE_EXPORT_HEADERS rows for ``{engineer id: plan}``; stops
+    without a location come last, without a day.
+    """
+    for engineer_id, plan in plans.items():
+        name = engineer_names.get(engineer_id, engineer_id)
+        for day_number, day in enumerate(plan['days'], start=1):
+            for stop_number, stop in enumerate(day, start=1):
+                complaint = stop['complaint']
+                yield [
+                    name, day_number, stop_number, complaint['ticket_number'], complaint['customer_name'],
+                    complaint['mobile_number'], _address(complaint), complaint['pincode'], stop['cluster'], stop['leg_km'],
+                ]
+        for complaint in plan['unlocated']:
+            yield [
+                name, '', '', complaint['ticket_number'], complaint['customer_name'],
+                complaint['mobile_number'], _address(complaint), complaint['pincode'] or '', '', '',
+            ]
+
+
+def export_routes(plans, engineer_names, name='routes'):
+    """
+    Streams ``{engineer id: plan}`` as a CSV download, one row per visit.
+    """
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    return streaming_csv_response(ROUTE_EXPORT_HEADERS, iter_route_rows(plans, engineer_names), filename)
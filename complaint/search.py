@@ -0,0 +1,221 @@
+# complaint/search.py
+"""
+Full-text search over complaints.
+
+Each complaint has a ComplaintSearchDocument holding the text of its
+searchable fields. The document table carries a FULLTEXT index on MySQL and
+an external-content FTS5 table (kept in step by triggers) on SQLite; both are
+created by migration 0012. Documents are rewritten whenever a complaint or
+its product is saved, and ``search_complaints`` returns matches ranked by
+relevance.
+
+Queries that look like a ticket number or a full phone number skip the text
+index and become exact lookups on indexed columns (see ``classify_query``).
+Shorter digit queries add exact lookups (phone number suffix, pincode,
+ticket number) to the text search rather than replacing it.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Complaint, ComplaintSearchDocument
+from .ticketing import TICKET_DIGITS, TICKET_PREFIX, format_ticket_number
+from .utils import MOBILE_DIGITS, PINCODE_DIGITS, normalize_mobile
+
+# Complaint fields indexed for search (plus the product's model name)
+DOCUMENT_FIELDS = (
+    'ticket_number', 'customer_name', 'mobile_number', 'email', 'description',
+    'street', 'area', 'landmark', 'city', 'state', 'pincode',
+)
+INDEX_CHUNK_SIZE = 500
+MAX_QUERY_TERMS = 8
+
+SQLITE_FTS_TABLE = 'complaint_search_fts'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+LEGACY_TICKET_DIGITS = 8  # early tickets were 8 random digits, later 'TCKT-' + 8 hex characters
+TICKET_RE = re.compile(
+    rf'^TCKT-?(\d{{1,{TICKET_DIGITS}}}|[0-9A-F]{{{LEGACY_TICKET_DIGITS}}})$', re.IGNORECASE
+)
+PHONE_RE = re.compile(r'^\+?[\d\s\-()]+$')
+MIN_SUFFIX_DIGITS = 4
+
+
+def search_terms(text):
+    return _TERM_RE.findall((text or '').lower())[:MAX_QUERY_TERMS]
+
+
+def _document_from(row):
+    values = [row.get(field) for field in DOCUMENT_FIELDS] + [row.get('product__model_name')]
+    return ' '.join(str(value) for value in values if value)
+
+
+def index_complaints(queryset):
+    """
+    Rewrites the search documents of every complaint in ``queryset``.
+    """
+    fields = ('pk',) + DOCUMENT_FIELDS + ('product__model_name',)
+    rows = queryset.order_by('pk').values(*fields)
+
+    batch = []
+    for row in rows.iterator(chunk_size=INDEX_CHUNK_SIZE):
+        batch.append(ComplaintSearchDocument(complaint_id=row['pk'], document=_document_from(row)))
+        if len(batch) >= INDEX_CHUNK_SIZE:
+            _upsert(batch)
+            batch = []
+    if batch:
+        _upsert(batch)
+
+
+def _upsert(documents):
+    # MySQL upserts on any unique key (ON DUPLICATE KEY UPDATE) and rejects a named target
+    if connection.features.supports_update_conflicts_with_target:
+        target = {'unique_fields': ['complaint']}
+    else:
+        target = {}
+    ComplaintSearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        update_fields=['document', 'updated_at'],
+        **target,
+    )
+
+
+def index_complaint(complaint):
+    index_complaints(Complaint.objects.filter(pk=complaint.pk))
+
+
+def index_product_complaints(product_id):
+    index_complaints(Complaint.objects.filter(product_id=product_id))
+
+
+def rebuild_search_index():
+    """
+    Rebuilds every search document. Returns the number of complaints indexed.
+    """
+    index_complaints(Complaint.objects.all())
+    return ComplaintSearchDocument.objects.count()
+
+
+def _sqlite_search(terms):
+    match = ' '.join(f'"{term}"*' for term in terms)
+    complaints = Complaint._meta.db_table
+    matches = RawSQL(f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s', (match,))
+    # bm25() is lower for better matches
+    rank = RawSQL(
+        f'SELECT -bm25({SQLITE_FTS_TABLE}) FROM {SQLITE_FTS_TABLE} '
+        f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = "{complaints}"."id"',
+        (match,),
+        output_field=FloatField(),
+    )
+    return matches, rank
+
+
+def _mysql_search(terms):
+    match = ' '.join(f'+{term}*' for term in terms)
+    documents = ComplaintSearchDocument._meta.db_table
+    complaints = Complaint._meta.db_table
+    matches = RawSQL(
+        f'SELECT complaint_id FROM {documents} WHERE MATCH(document) AGAINST (%s IN BOOLEAN MODE)', (match,)
+    )
+    rank = RawSQL(
+        f'SELECT MATCH(document) AGAINST (%s IN BOOLEAN MODE) FROM {documents} '
+        f'WHERE complaint_id = `{complaints}`.`id`',
+        (match,),
+        output_field=FloatField(),
+    )
+    return matches, rank
+
+
+def classify_query(text):
+    """
+    Returns ``(kind, value)`` for a search box query:
+
+    - ``('ticket', ('TCKT-000000042',))`` for 'TCKT-42', 'tckt000000042', ...;
+      legacy 8-character tickets also as typed, so 'TCKT-12345678' gives
+      ``('TCKT-012345678', 'TCKT-12345678')``
+    - ``('mobile', '9876543210')`` for a full phone number in any format
+    - ``('digits', '400001')`` for fewer digits: the last digits of a phone
+      number, a pincode, a ticket number or a legacy digits-only ticket
+      number, or just text
+    - ``('text', text)`` for anything else
+    """
+    text = (text or '').strip()
+    match = TICKET_RE.match(text)
+    if match:
+        number = match.group(1).upper()
+        tickets = (format_ticket_number(int(number)),) if number.isdigit() else ()
+        if len(number) == LEGACY_TICKET_DIGITS:
+            tickets += (f"{TICKET_PREFIX}{number}",)
+        return 'ticket', tickets
+    if PHONE_RE.match(text):
+        digits = re.sub(r'\D', '', text)
+        if len(digits) >= MOBILE_DIGITS:
+            return 'mobile', normalize_mobile(digits)
+        if digits:
+            return 'digits', digits
+    return 'text', text
+
+
+def _prefix_range(field, prefix):
+    # ``field LIKE 'prefix%'`` as a plain range, so every backend can use the index
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
+
+
+def _text_search(terms):
+    """
+    Returns ``(condition, rank)``: complaints whose document matches every
+    term (as a prefix), and their relevance.
+    """
+    if connection.vendor == 'sqlite':
+        matches, rank = _sqlite_search(terms)
+    elif connection.vendor == 'mysql':
+        matches, rank = _mysql_search(terms)
+    else:
+        # No native index configured: match the stored documents directly
+        condition = Q()
+        for term in terms:
+            condition &= Q(search_document__document__icontains=term)
+        return condition, Value(0.0, output_field=FloatField())
+    return Q(pk__in=matches), rank
+
+
+def search_complaints(queryset, text):
+    """
+    Restricts ``queryset`` to complaints matching ``text``.
+
+    Ticket and full phone number queries are exact index lookups, and so
+    are the extra matches of shorter digit queries; both keep the
+    queryset's ordering. Other text must match every word (as prefixes) in
+    the full-text index; results are annotated with ``search_rank`` and
+    ordered best first.
+    """
+    kind, value = classify_query(text)
+    if kind == 'ticket':
+        return queryset.filter(ticket_number__in=value)
+    if kind == 'mobile':
+        return queryset.filter(mobile_normalized=value)
+    if kind == 'digits':
+        # Also plain text, e.g. a house number or a numeric model name
+        condition = _text_search([value])[0]
+        if len(value) >= MIN_SUFFIX_DIGITS:
+            condition |= _prefix_range('mobile_reversed', value[::-1])
+        if len(value) <= TICKET_DIGITS:
+            condition |= Q(ticket_number=format_ticket_number(int(value)))
+        if len(value) == PINCODE_DIGITS:
+            condition |= Q(pincode=value)
+        if len(value) == LEGACY_TICKET_DIGITS:
+            condition |= Q(ticket_number=value)
+        return queryset.filter(condition)
+
+    terms = search_terms(value)
+    if not terms:
+        return queryset.none()
+
+    condition, rank = _text_search(terms)
+    return queryset.filter(condition).annotate(search_rank=rank).order_by('-search_rank', '-id')
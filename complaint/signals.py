@@ -1,17 +1,66 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile
+from product.models import Product
+from .counters import reassign_engineer_counters, record_delete
+from .engineers import invalidate_engineer_directory
+from .models import Complaint, EngineerServiceArea, Profile
+from .search import index_product_complaints
 
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
     """
-    🔹 This signal creates or updates the Profile
-    whenever a User is created or saved.
+    🔹 This signal creates the Profile when a User is created.
+    Later saves (e.g. the last_login update on every login) don't touch it;
+    roles are changed through complaint.staff.assign_staff_role.
     """
-    if created:
+    if created and not raw:
         # Assign default role (e.g., customer)
-        Profile.objects.create(user=instance, role='customer')
-    else:
-        profile, _ = Profile.objects.get_or_create(user=instance)
-        profile.save()
+        Profile.objects.get_or_create(user=instance, defaults={'role': 'customer'})
+
+
+@receiver(pre_delete, sender=Complaint)
+def update_counters_on_complaint_delete(sender, instance, **kwargs):
+    """
+    🔹 Keeps the dashboard counters in step when a complaint is deleted.
+    Runs inside the delete's transaction, before the row is gone.
+    """
+    record_delete(instance)
+
+
+@receiver(pre_delete, sender=User)
+def release_engineer_counters(sender, instance, **kwargs):
+    """
+    🔹 A deleted engineer's complaints become unassigned (SET_NULL),
+    so move their counters to the unassigned bucket.
+    """
+    reassign_engineer_counters(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def reindex_product_complaints(sender, instance, created, update_fields=None, **kwargs):
+    """
+    🔹 Complaint search documents include the product model name,
+    so rewrite them when a product changes.
+    """
+    if created:
+        return
+    if update_fields is None or 'model_name' in update_fields:
+        index_product_complaints(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=EngineerServiceArea)
+@receiver(post_delete, sender=EngineerServiceArea)
+def refresh_engineer_directory(sender, update_fields=None, **kwargs):
+    """
+    🔹 Engineer dropdowns and the auto-assignment index are served from a
+    cache; drop it when a user, profile or service area changes (but not for
+    the last_login update on every login).
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_engineer_directory()
@@ -0,0 +1,104 @@
+# complaint/sla.py
+"""
+Service-level deadlines for complaints.
+
+Each complaint stores the moment it becomes overdue in ``sla_due_at``
+(indexed), recomputed by Complaint.save whenever its status or assignment
+changes:
+
+- open and unassigned: ``created_at`` + SLA_UNASSIGNED_HOURS
+- in progress with an engineer: ``assigned_date`` + SLA_ASSIGNED_HOURS
+- anything else: no deadline (NULL)
+
+Escalation then only touches rows whose deadline has passed, in short
+primary-key-ordered batches logged to ComplaintStatusHistory, and a
+scheduler can sleep until the earliest deadline instead of scanning.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+SLA_UNASSIGNED_HOURS = getattr(settings, 'COMPLAINT_SLA_UNASSIGNED_HOURS', 24)
+SLA_ASSIGNED_HOURS = getattr(settings, 'COMPLAINT_SLA_ASSIGNED_HOURS', 48)
+ESCALATION_BATCH_SIZE = 100
+
+# Fields the deadline is computed from
+SLA_FIELDS = ('status', 'assigned_engineer', 'assigned_engineer_id', 'assigned_date', 'resolved_date', 'created_at')
+# Statuses that can have a deadline
+SLA_STATUSES = ('open', 'in_progress')
+
+
+def sla_due_at(complaint):
+    """
+    Returns when ``complaint`` breaches its SLA in its current state, or None.
+    """
+    if complaint.status == 'open' and not complaint.assigned_engineer_id:
+        return (complaint.created_at or timezone.now()) + timedelta(hours=SLA_UNASSIGNED_HOURS)
+    if (complaint.status == 'in_progress' and complaint.assigned_engineer_id
+            and complaint.assigned_date and not complaint.resolved_date):
+        return complaint.assigned_date + timedelta(hours=SLA_ASSIGNED_HOURS)
+    return None
+
+
+def due_complaints(now=None):
+    from .models import Complaint
+    return Complaint.objects.filter(sla_due_at__lte=now or timezone.now())
+
+
+def next_sla_due_at():
+    """
+    Earliest pending deadline (one index lookup), or None if there is none.
+    """
+    from .models import Complaint
+    return (
+        Complaint.objects.filter(sla_due_at__isnull=False)
+        .order_by('sla_due_at')
+        .values_list('sla_due_at', flat=True)
+        .first()
+    )
+
+
+def escalate_due_complaints(now=None, batch_size=ESCALATION_BATCH_SIZE, stop_at=None, on_batch=None):
+    """
+    Moves every complaint past its deadline to 'pending' and records each
+    change in ComplaintStatusHistory.
+
+    Due rows are walked in primary-key order, ``batch_size`` per short
+    transaction, so row locks are held briefly and always taken in the same
+    order as other bulk updates. When ``stop_at`` (a ``time.monotonic()``
+    value) passes, no further batch is started. ``on_batch`` is called after
+    each committed batch with its ``(ticket_number, old_status)`` pairs.
+    Returns ``(escalated, finished)``; ``finished`` is False if rows may be
+    left for the next run.
+    """
+    now = now or timezone.now()
+    escalated = 0
+    last_pk = 0
+    while True:
+        if stop_at is not None and time.monotonic() >= stop_at:
+            return escalated, False
+        pks = list(
+            due_complaints(now).filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return escalated, True
+        changes = _escalate_batch(pks, now)
+        escalated += len(changes)
+        if changes and on_batch:
+            on_batch(changes)
+        if len(pks) < batch_size:
+            return escalated, True
+        last_pk = pks[-1]
+
+
+def _escalate_batch(pks, now):
+    from .models import Complaint
+    from .transitions import escalate
+
+    # The deadline is re-checked under lock, so a complaint assigned or
+    # resolved since the batch was read is left alone
+    changes = escalate(Complaint.objects.filter(pk__in=pks), now)
+    return [(ticket_number, status) for _, ticket_number, status in changes]
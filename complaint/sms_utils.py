@@ -2,6 +2,12 @@
 
 from .models import Complaint, SMSLog
 
+def ticket_sms_message(ticket_number):
+    """
+    Builds the SMS text sent to a customer when a complaint is registered.
+    """
+    return f"Your complaint has been registered. Ticket No: {ticket_number}"
+
 def send_sms_mock(mobile, ticket_number):
     """
     Mocks sending an SMS to a customer and logs the message.
@@ -10,7 +16,7 @@ def send_sms_mock(mobile, ticket_number):
         mobile (str): The customer's mobile number.
         ticket_number (str): The auto-generated complaint ticket number.
     """
-    message = f"Your complaint has been registered. Ticket No: {ticket_number}"
+    message = ticket_sms_message(ticket_number)
 
     # ✅ Mock sending
     print(f"[MOCK SMS] Sent to {mobile}: {message}")
@@ -18,10 +24,7 @@ def send_sms_mock(mobile, ticket_number):
     # ✅ Save SMS log to SMSLog model
     SMSLog.objects.create(mobile_number=mobile, message=message)
 
-    # ✅ Optional: update complaint's sms_log field (if it exists)
-    try:
-        complaint = Complaint.objects.get(ticket_number=ticket_number)
-        complaint.sms_log = message
-        complaint.save()
-    except Complaint.DoesNotExist:
+    # ✅ Optional: update complaint's sms_log field (single-column UPDATE, no full-row save)
+    updated = Complaint.objects.filter(ticket_number=ticket_number).update(sms_log=message)
+    if not updated:
         print(f"[ERROR] Complaint with ticket number '{ticket_number}' not found.")
@@ -0,0 +1,151 @@
+# complaint/staff.py
+"""
+Staff provisioning: role assignment for the staff screens and bulk import of
+staff accounts from CSV/XLSX files.
+"""
+
+import csv
+import os
+
+import openpyxl
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+
+from .engineers import invalidate_engineer_directory
+from .models import Profile
+from .roles import STAFF_ROLE_GROUPS, normalize_role
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_COLUMNS = ('username', 'email', 'first_name', 'last_name', 'role', 'password')
+
+
+def assign_staff_role(user, role):
+    """
+    Sets ``user``'s Profile role and group, writing only what changed.
+    ``role`` may be any spelling accepted by ``normalize_role``.
+    """
+    role = normalize_role(role)
+    if role is None:
+        raise ValueError("Unknown staff role.")
+
+    if Profile.objects.filter(user=user).exclude(role=role).update(role=role):
+        invalidate_engineer_directory()
+    else:
+        Profile.objects.get_or_create(user=user, defaults={'role': role})
+
+    group, _ = Group.objects.get_or_create(name=STAFF_ROLE_GROUPS[role])
+    user.groups.set([group])
+    return role
+
+
+def read_staff_rows(path):
+    """
+    Yields ``(row_number, {column: value})`` from a CSV or XLSX file whose
+    first row holds the column names (see IMPORT_COLUMNS).
+    """
+    if os.path.splitext(path)[1].lower() in ('.xlsx', '.xlsm'):
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(value or '').strip().lower() for value in next(rows, ())]
+            for number, values in enumerate(rows, start=2):
+                yield number, {key: '' if value is None else str(value).strip() for key, value in zip(header, values)}
+        finally:
+            workbook.close()
+        return
+
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        reader = csv.reader(handle)
+        header = [value.strip().lower() for value in next(reader, [])]
+        for number, values in enumerate(reader, start=2):
+            yield number, {key: (value or '').strip() for key, value in zip(header, values)}
+
+
+@transaction.atomic
+def import_staff(rows, default_password=None):
+    """
+    Creates staff users with their profiles and groups from ``(row_number,
+    row)`` pairs using bulk inserts, so no per-user signals fire.
+
+    Rows without a password get ``default_password`` (for a temporary
+    first-login password) or an unusable password, to be set through
+    "forgot password". Hashing is the slow part of an import, so each
+    distinct password, ``default_password`` included, is hashed only once.
+    Existing usernames are skipped.
+
+    Returns ``(created, skipped, errors)`` where ``errors`` is a list of
+    ``(row_number, message)``.
+    """
+    hashes = {}
+
+    def password_hash(password):
+        if not password:
+            return make_password(None)  # unusable; no hashing involved
+        if password not in hashes:
+            hashes[password] = make_password(password)
+        return hashes[password]
+
+    candidates = {}
+    errors = []
+    for number, row in rows:
+        username = row.get('username', '')
+        role = normalize_role(row.get('role'))
+        if not username:
+            errors.append((number, "Missing username."))
+            continue
+        if role is None:
+            errors.append((number, f"Unknown role '{row.get('role', '')}'."))
+            continue
+        if username in candidates:
+            errors.append((number, f"Duplicate username '{username}'."))
+            continue
+        candidates[username] = (row, role)
+
+    existing = set()
+    usernames = list(candidates)
+    for start in range(0, len(usernames), IMPORT_BATCH_SIZE):
+        existing.update(
+            User.objects.filter(username__in=usernames[start:start + IMPORT_BATCH_SIZE]).values_list('username', flat=True)
+        )
+
+    new_users = []
+    for username, (row, role) in candidates.items():
+        if username in existing:
+            continue
+        new_users.append(User(
+            username=username,
+            email=row.get('email', ''),
+            first_name=row.get('first_name', ''),
+            last_name=row.get('last_name', ''),
+            is_staff=True,
+            password=password_hash(row.get('password') or default_password),
+        ))
+    User.objects.bulk_create(new_users, batch_size=IMPORT_BATCH_SIZE)
+
+    # bulk_create does not return primary keys on MySQL, so read them back
+    created_names = [user.username for user in new_users]
+    user_ids = {}
+    for start in range(0, len(created_names), IMPORT_BATCH_SIZE):
+        user_ids.update(
+            User.objects.filter(username__in=created_names[start:start + IMPORT_BATCH_SIZE]).values_list('username', 'pk')
+        )
+
+    groups = {
+        role: Group.objects.get_or_create(name=STAFF_ROLE_GROUPS[role])[0]
+        for role in {candidates[name][1] for name in created_names}
+    }
+    Membership = User.groups.through
+
+    Profile.objects.bulk_create(
+        [Profile(user_id=user_ids[name], role=candidates[name][1]) for name in created_names],
+        batch_size=IMPORT_BATCH_SIZE,
+    )
+    Membership.objects.bulk_create(
+        [Membership(user_id=user_ids[name], group_id=groups[candidates[name][1]].pk) for name in created_names],
+        batch_size=IMPORT_BATCH_SIZE,
+    )
+    # bulk_create sends no signals
+    transaction.on_commit(invalidate_engineer_directory)
+
+    return len(new_users), len(existing), errors
@@ -1,3 +1,488 @@
+import gzip
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
 from django.test import TestCase
+from django.urls import reverse
+
+from . import assignment, engineers, routes
+from .assignment import AssignmentEngine, assign_new_complaints
+from .counters import rebuild_complaint_counters, update_complaints
+from .engineers import EngineerChoiceField, engineer_directory
+from .models import Complaint, ComplaintConflict, ComplaintCounter, ComplaintSearchDocument, ComplaintStatusHistory, EngineerServiceArea, Profile, TicketSequence
+from .pincodes import PINCODE_DIRECTORY_FILE, load_directory
+from .search import search_complaints
+from .ticketing import TicketNumberAllocator
+from .transitions import TransitionNotAllowed, assign, reassign, resolve, save_complaint_edit, unassign
+
+
+def make_engineer(username, *prefixes):
+    user = User.objects.create_user(username=username, password='secret123')
+    Profile.objects.filter(user=user).update(role='engineer')
+    for prefix in prefixes:
+        EngineerServiceArea.objects.create(engineer=user, pincode_prefix=prefix)
+    return user
+
+
+def make_staff(username, role):
+    user = User.objects.create_user(username=username, password='secret123')
+    Profile.objects.filter(user=user).update(role=role)
+    return user
+
+
+def make_complaint(pincode='400001', **kwargs):
+    fields = {
+        'customer_name': 'Test Customer',
+        'mobile_number': '9876543210',
+        'description': 'Display not working',
+        **kwargs,
+    }
+    return Complaint.objects.create(pincode=pincode, **fields)
+
+
+# 🔹 Automatic assignment
+class AssignmentEngineTests(TestCase):
+    def test_longest_matching_prefix_wins_over_lower_load(self):
+        engine = AssignmentEngine([(1, '400'), (2, '40000')], {1: 0, 2: 5})
+        self.assertEqual(engine.match('400001'), ('40000', 2))
+        self.assertEqual(engine.match('400123'), ('400', 1))
+
+    def test_fewest_open_tickets_then_lowest_engineer_id(self):
+        engine = AssignmentEngine([(3, '4'), (1, '4'), (2, '4')], {1: 2, 2: 1, 3: 1})
+        chosen = [engine.choose('400001')[1] for _ in range(6)]
+        self.assertEqual(chosen, [2, 3, 1, 2, 3, 1])
+        self.assertEqual(engine.open_tickets, {1: 4, 2: 3, 3: 3})
+
+    def test_same_input_gives_same_decisions(self):
+        def plan():
+            engine = AssignmentEngine([(1, '4'), (2, '4'), (3, '41')])
+            complaints = [(pk, f'T{pk}', pincode) for pk, pincode in enumerate(['400001', '410001', '400002'] * 5)]
+            return assignment.plan_backlog(engine, complaints)
+
+        self.assertEqual(plan(), plan())
+
+    def test_unserved_or_missing_pincode_gets_no_engineer(self):
+        engine = AssignmentEngine([(1, '400')])
+        self.assertIsNone(engine.match('110001'))
+        self.assertIsNone(engine.match(''))
+        self.assertIsNone(engine.choose(None))
+        self.assertEqual(engine.open_tickets, {1: 0})
+
+    def test_max_open_tickets_caps_each_engineer(self):
+        engine = AssignmentEngine([(1, '4'), (2, '4')], {1: 1}, max_open_tickets=2)
+        chosen = [engine.choose('400001') for _ in range(4)]
+        self.assertEqual([found and found[1] for found in chosen], [2, 1, 2, None])
+
+
+class AutoAssignCommandTests(TestCase):
+    def setUp(self):
+        assignment._worker['engine'] = None
+
+    def run_command(self, **options):
+        out = StringIO()
+        call_command('auto_assign_complaints', stdout=out, **options)
+        return out.getvalue()
+
+    def test_unserved_pincode_stays_unassigned(self):
+        make_engineer('mumbai', '400')
+        served, unserved = make_complaint('400001'), make_complaint('110001')
+
+        output = self.run_command()
+
+        self.assertIn("1 complaints have no engineer", output)
+        served.refresh_from_db()
+        unserved.refresh_from_db()
+        self.assertEqual(served.status, 'in_progress')
+        self.assertIsNone(unserved.assigned_engineer_id)
+        self.assertEqual(unserved.status, 'open')
+
+    def test_max_open_assigns_oldest_first_up_to_the_cap(self):
+        engineer = make_engineer('mumbai', '400')
+        complaints = [make_complaint('400001') for _ in range(3)]
+
+        self.run_command(max_open=2)
+
+        assigned = [c.pk for c in complaints if Complaint.objects.get(pk=c.pk).assigned_engineer_id == engineer.pk]
+        self.assertEqual(assigned, [complaints[0].pk, complaints[1].pk])
+
+    def test_rebalance_dry_run_output_is_stable(self):
+        busy = make_engineer('busy', '400')
+        make_engineer('idle', '400')
+        for _ in range(4):
+            assign(make_complaint('400001').pk, busy)
+
+        first = self.run_command(dry_run=True, rebalance=True)
+        second = self.run_command(dry_run=True, rebalance=True)
+
+        self.assertEqual(first, second)
+        self.assertIn("Would assign 0 and move 2 complaints", first)
+        self.assertIn("  busy: 2\n  idle: 2\n", first)
+
+        self.run_command(rebalance=True)
+        self.assertIn("Would assign 0 and move 0 complaints", self.run_command(dry_run=True, rebalance=True))
+
+    def test_new_complaints_are_left_for_the_worker(self):
+        engineer = make_engineer('mumbai', '400')
+        complaint = make_complaint('400001')
+        complaint.refresh_from_db()
+        self.assertIsNone(complaint.assigned_engineer_id)
+
+        changed, unmatched, last_pk = assign_new_complaints()
+
+        self.assertEqual([row[0] for row in changed], [complaint.pk])
+        self.assertEqual((unmatched, last_pk), ([], complaint.pk))
+        complaint.refresh_from_db()
+        self.assertEqual(complaint.assigned_engineer_id, engineer.pk)
+
+
+# 🔒 Optimistic locking
+class ComplaintVersionTests(TestCase):
+    def setUp(self):
+        self.complaint = make_complaint()
+
+    def test_stale_copy_raises_conflict_and_keeps_newer_save(self):
+        first = Complaint.objects.get(pk=self.complaint.pk)
+        second = Complaint.objects.get(pk=self.complaint.pk)
+
+        first.description = 'Fixed by first'
+        first.save_changes()
+        second.description = 'Fixed by second'
+        with self.assertRaises(ComplaintConflict):
+            second.save_changes()
+
+        self.assertEqual(second.version, self.complaint.version)
+        saved = Complaint.objects.get(pk=self.complaint.pk)
+        self.assertEqual(saved.description, 'Fixed by first')
+        self.assertEqual(saved.version, self.complaint.version + 1)
+
+    def test_unchanged_copy_is_not_written(self):
+        copy = Complaint.objects.get(pk=self.complaint.pk)
+        self.assertFalse(copy.save_changes())
+        self.assertEqual(Complaint.objects.get(pk=self.complaint.pk).version, self.complaint.version)
+
+    def test_full_save_from_stale_copy_raises_conflict(self):
+        stale = Complaint.objects.get(pk=self.complaint.pk)
+        Complaint.objects.get(pk=self.complaint.pk).save()
+        with self.assertRaises(ComplaintConflict):
+            stale.save()
+
+    def test_admin_edit_with_stale_version_returns_409(self):
+        self.client.force_login(make_staff('admin', 'admin'))
+        url = reverse('complaint_edit', args=[self.complaint.pk])
+        Complaint.objects.get(pk=self.complaint.pk).save()  # someone else saves first
+
+        response = self.client.post(url, {'version': self.complaint.version, 'product_serial_number': 'SN-1'})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, "changed by someone else", status_code=409)
+        self.assertIsNone(Complaint.objects.get(pk=self.complaint.pk).product_serial_number)
+
+    def test_manager_edit_with_stale_version_returns_409(self):
+        self.client.force_login(make_staff('manager', 'manager'))
+        engineer = make_engineer('engineer')
+        url = reverse('edit_complaint_by_manager', args=[self.complaint.pk])
+        Complaint.objects.get(pk=self.complaint.pk).save()
+
+        response = self.client.post(url, {
+            'version': self.complaint.version, 'assigned_engineer': engineer.pk, 'service_cost': '500',
+        })
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIsNone(Complaint.objects.get(pk=self.complaint.pk).assigned_engineer_id)
+
+    def test_manager_edit_with_current_version_saves(self):
+        self.client.force_login(make_staff('manager', 'manager'))
+        engineer = make_engineer('engineer')
+        url = reverse('edit_complaint_by_manager', args=[self.complaint.pk])
+
+        response = self.client.post(url, {
+            'version': self.complaint.version, 'assigned_engineer': engineer.pk, 'service_cost': '500',
+        })
+
+        self.assertRedirects(response, reverse('show_manager_complaints'), fetch_redirect_response=False)
+        saved = Complaint.objects.get(pk=self.complaint.pk)
+        self.assertEqual((saved.assigned_engineer_id, saved.status), (engineer.pk, 'in_progress'))
+
+
+# 🔹 Status transitions
+class TransitionTests(TestCase):
+    def setUp(self):
+        self.engineer = make_engineer('engineer')
+        self.other = make_engineer('other')
+        self.complaint = make_complaint()
+
+    def reload(self):
+        return Complaint.objects.get(pk=self.complaint.pk)
+
+    def test_transitions_skip_complaints_outside_their_source_states(self):
+        self.assertEqual(reassign(self.complaint.pk, self.engineer), [])
+        self.assertEqual(unassign(self.complaint.pk), [])
+
+        self.assertEqual(len(assign(self.complaint.pk, self.engineer)), 1)
+        self.assertEqual(assign(self.complaint.pk, self.other), [])
+        self.assertEqual(reassign(self.complaint.pk, self.engineer), [])
+
+        self.assertEqual(len(resolve(self.complaint.pk)), 1)
+        self.assertEqual(resolve(self.complaint.pk), [])
+        self.assertEqual(reassign(self.complaint.pk, self.other), [])
+        self.assertEqual(unassign(self.complaint.pk), [])
+
+        complaint = self.reload()
+        self.assertEqual((complaint.status, complaint.assigned_engineer_id), ('resolved', self.engineer.pk))
+        self.assertEqual(
+            list(ComplaintStatusHistory.objects.filter(complaint=complaint).order_by('pk').values_list('reason', flat=True)),
+            ['assign', 'resolve'],
+        )
+
+    def test_stale_instance_is_not_transitioned(self):
+        stale = self.reload()
+        assign(self.complaint.pk, self.engineer)
+        self.assertEqual(unassign(stale), [])
+        self.assertEqual(self.reload().assigned_engineer_id, self.engineer.pk)
+
+    def test_complaint_of_deleted_engineer_can_be_assigned_again(self):
+        assign(self.complaint.pk, self.engineer)
+        self.engineer.delete()
+        self.assertEqual((self.reload().status, self.reload().assigned_engineer_id), ('in_progress', None))
+
+        self.assertEqual(len(assign(self.complaint.pk, self.other)), 1)
+        self.assertEqual(self.reload().assigned_engineer_id, self.other.pk)
+
+    def test_edit_blocked_by_state_is_not_reported_as_conflict(self):
+        resolve(self.complaint.pk)
+        complaint = self.reload()
+        complaint.assigned_engineer = self.engineer
+
+        with self.assertRaisesMessage(TransitionNotAllowed, "already resolved"):
+            save_complaint_edit(complaint)
+
+    def test_edit_of_changed_complaint_is_a_conflict(self):
+        stale = self.reload()
+        assign(self.complaint.pk, self.other)
+        stale.assigned_engineer = self.engineer
+
+        with self.assertRaises(ComplaintConflict) as caught:
+            save_complaint_edit(stale)
+        self.assertNotIsInstance(caught.exception, TransitionNotAllowed)
+
+    def test_manager_assigning_resolved_complaint_gets_the_reason(self):
+        resolve(self.complaint.pk)
+        self.client.force_login(make_staff('manager', 'manager'))
+
+        response = self.client.post(reverse('edit_complaint_by_manager', args=[self.complaint.pk]), {
+            'version': self.reload().version, 'assigned_engineer': self.engineer.pk, 'service_cost': '500',
+        })
+
+        self.assertContains(response, "already resolved", status_code=409)
+        self.assertNotContains(response, "changed by someone else", status_code=409)
+
+
+# 🎫 Ticket numbers
+class TicketNumberAllocatorTests(TestCase):
+    def allocate(self, allocator, count=1):
+        # The rest of a block is kept once the reservation commits
+        numbers = []
+        for _ in range(count):
+            with self.captureOnCommitCallbacks(execute=True):
+                numbers.append(allocator.allocate())
+        return numbers
+
+    def test_interleaved_allocators_hand_out_unique_numbers_from_their_blocks(self):
+        first, second = TicketNumberAllocator(block_size=3), TicketNumberAllocator(block_size=3)
+
+        numbers = []
+        for _ in range(10):
+            numbers += self.allocate(first) + self.allocate(second)
+
+        self.assertEqual(len(set(numbers)), 20)
+        self.assertTrue(all(number.startswith('TCKT-') and len(number) == 14 for number in numbers))
+        # 4 blocks of 3 each, not one reservation per number
+        self.assertEqual(TicketSequence.objects.get(name='complaint').next_value, 1 + 2 * 4 * 3)
+
+    def test_rolled_back_reservation_is_not_reused(self):
+        first, second = TicketNumberAllocator(block_size=5), TicketNumberAllocator(block_size=5)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                first.allocate()
+                raise RuntimeError
+
+        # The same block is reserved again by the other allocator...
+        taken = self.allocate(second, 5)
+        # ...so the first must not hand out the rest of its rolled-back block
+        self.assertNotIn(self.allocate(first)[0], taken)
+
+    def test_forked_process_reserves_its_own_block(self):
+        allocator = TicketNumberAllocator(block_size=5)
+        parent = self.allocate(allocator)
+        allocator._pid = -1  # as seen from a forked child
+        child = self.allocate(allocator, 4)
+        self.assertEqual(TicketSequence.objects.get(name='complaint').next_value, 11)
+        self.assertFalse(set(parent) & set(child))
+
+    def test_complaints_get_distinct_ticket_numbers(self):
+        numbers = {make_complaint().ticket_number for _ in range(5)}
+        self.assertEqual(len(numbers), 5)
+
+
+# 📊 Dashboard counters
+class ComplaintCounterTests(TestCase):
+    def assertCountersRebuildTheSame(self):
+        def counters():
+            return set(
+                ComplaintCounter.objects.filter(count__gt=0)
+                .values_list('engineer_key', 'status', 'payment_status', 'count')
+            )
+        incremental = counters()
+        rebuild_complaint_counters()
+        self.assertEqual(incremental, counters())
+
+    def test_incremental_counters_match_a_rebuild(self):
+        engineer, other = make_engineer('eng-a'), make_engineer('eng-b')
+
+        complaints = [make_complaint() for _ in range(4)]
+        self.assertCountersRebuildTheSame()
+
+        assign(complaints[0].pk, engineer)
+        assign(Complaint.objects.filter(pk__in=[complaints[1].pk, complaints[2].pk]), other)
+        resolve(complaints[1].pk)
+        reassign(complaints[2].pk, engineer)
+        self.assertCountersRebuildTheSame()
+
+        edited = Complaint.objects.get(pk=complaints[0].pk)
+        edited.payment_status = 'paid'
+        edited.save_changes()
+        update_complaints(Complaint.objects.filter(pk=complaints[3].pk), payment_status='paid')
+        self.assertCountersRebuildTheSame()
+
+        complaints[3].delete()
+        Complaint.objects.filter(pk=complaints[1].pk).delete()
+        self.assertCountersRebuildTheSame()
+
+        engineer.delete()
+        self.assertCountersRebuildTheSame()
+
+
+# 🔍 Search
+class SearchIndexTests(TestCase):
+    def test_complaints_are_indexed_without_a_named_conflict_target(self):
+        # As on MySQL, which upserts on any unique key and rejects unique_fields.
+        # SQLite then emits a plain INSERT, so only new documents can be checked.
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            complaint = make_complaint(area='Andheri East')
+        self.assertIn('Andheri East', ComplaintSearchDocument.objects.get(complaint=complaint).document)
+
+    def search(self, text):
+        return set(search_complaints(Complaint.objects.all(), text).values_list('pk', flat=True))
+
+    def test_numeric_query_matches_text_as_well_as_exact_lookups(self):
+        shop = make_complaint(pincode='560001', area='Shop 5500', street='Plot 12')
+        phone = make_complaint(pincode='560001', mobile_number='9876545500')
+        make_complaint(pincode='560001')
+        self.assertEqual(self.search('5500'), {shop.pk, phone.pk})
+
+    def test_digit_queries_find_tickets_and_pincodes(self):
+        complaint = make_complaint(pincode='400001')
+        other = make_complaint(pincode='110001')
+        number = complaint.ticket_number.removeprefix('TCKT-').lstrip('0')
+        self.assertIn(complaint.pk, self.search(number))
+        self.assertEqual(self.search('400001'), {complaint.pk})
+        self.assertEqual(self.search('110001'), {other.pk})
+
+
+# 📮 Pincode directory
+class PincodeDirectoryTests(TestCase):
+    def test_compressed_directory_file_is_read(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        path = Path(folder.name) / 'pincodes.csv.gz'
+        with open(PINCODE_DIRECTORY_FILE, 'rb') as source, gzip.open(path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+
+        directory = load_directory(path)
+
+        self.assertEqual(len(directory), len(load_directory(PINCODE_DIRECTORY_FILE)))
+        self.assertEqual(directory.lookup('110001')['city'], 'New Delhi')
+
+    def test_lookup_reports_unknown_pincodes_for_the_form_fallback(self):
+        response = self.client.get(reverse('pincode_lookup'), {'pincode': '999999'})
+        self.assertEqual(response.json(), {'found': False})
+
+
+# 🗺️ Visit routes
+class RoutePlanTests(TestCase):
+    # West to east along one line; 400001 is close to 400004
+    CENTROIDS = {
+        '400001': (19.0, 72.82),
+        '400004': (19.0, 72.85),
+        '400007': (19.0, 72.90),
+        '400010': (19.0, 72.95),
+        '400015': (19.0, 73.00),
+    }
+
+    def setUp(self):
+        locator = mock.patch.object(
+            routes, 'pincode_locator', return_value=(self.CENTROIDS, routes._prefix_centroids(self.CENTROIDS))
+        )
+        locator.start()
+        self.addCleanup(locator.stop)
+
+    def plan(self, *pincodes):
+        created = datetime(2026, 1, 1)
+        complaints = [
+            {'pk': pk, 'pincode': pincode, 'created_at': created + timedelta(hours=pk), 'ticket_number': f'T{pk}'}
+            for pk, pincode in enumerate(pincodes, start=1)
+        ]
+        plan = routes.plan_route(complaints, visits_per_day=10)
+        return [stop['complaint']['pincode'] for day in plan['days'] for stop in day], plan
+
+    def test_distinct_pincodes_are_visited_in_distance_order(self):
+        # From the oldest complaint: west to 400001 first, then east to the end
+        order, plan = self.plan('400004', '400015', '400007', '400001', '400010')
+        self.assertEqual(order, ['400004', '400001', '400007', '400010', '400015'])
+        self.assertEqual(plan['approximate'], 0)
+        self.assertEqual(plan['distance_km'], 22.2)
+
+    def test_area_with_unlisted_pincodes_is_visited_in_pincode_order(self):
+        order, plan = self.plan('400010', '400003', '400001', '400010')
+        self.assertEqual(order, ['400001', '400003', '400010', '400010'])
+        self.assertEqual(plan['approximate'], 1)
+
+
+# 🧑‍🔧 Engineer directory
+class EngineerDirectoryTests(TestCase):
+    def setUp(self):
+        engineers._local.update(version=None, names=None, names_version=None, open_tickets=None)
+        self.engineer = make_engineer('eng-a')
+
+    def names(self):
+        return [engineer['name'] for engineer in engineer_directory()]
+
+    def test_warm_dropdown_runs_no_queries(self):
+        field = EngineerChoiceField(required=False)
+        list(field.choices)
+        with self.assertNumQueries(0):
+            self.assertEqual([label for _, label in field.choices], ['---------', 'eng-a (0 open)'])
+
+    def test_change_in_this_process_is_seen_at_once(self):
+        self.assertEqual(self.names(), ['eng-a'])
+        make_engineer('eng-b')
+        self.assertEqual(self.names(), ['eng-a', 'eng-b'])
+
+    def test_change_in_another_process_is_seen_after_the_version_check(self):
+        self.assertEqual(self.names(), ['eng-a'])
+        # Another process renames the engineer and bumps the version
+        User.objects.filter(pk=self.engineer.pk).update(first_name='Ravi', last_name='Kumar')
+        TicketSequence.objects.filter(name=engineers.VERSION_SEQUENCE_NAME).update(next_value=F('next_value') + 1)
+        self.assertEqual(self.names(), ['eng-a'])
 
-# Create your tests here.
+        version, checked = engineers._local['version']
+        engineers._local['version'] = (version, checked - engineers.VERSION_CHECK_INTERVAL)
+        self.assertEqual(self.names(), ['Ravi Kumar'])
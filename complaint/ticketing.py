@@ -0,0 +1,102 @@
+# complaint/ticketing.py
+"""
+Ticket number allocation.
+
+Each process reserves a block of numbers from the TicketSequence row with a
+single atomic UPDATE and then hands them out from memory, so creating a
+complaint never has to check ``Complaint.objects.filter(...).exists()``.
+Numbers are unique across processes; a process that exits leaves a small
+gap in the sequence, which is harmless.
+"""
+
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import TicketSequence
+
+TICKET_PREFIX = "TCKT-"
+TICKET_DIGITS = 9  # legacy tickets are 8 characters, so new numbers can never clash
+TICKET_SEQUENCE_NAME = "complaint"
+BLOCK_SIZE = getattr(settings, 'TICKET_NUMBER_BLOCK_SIZE', 20)
+
+
+def format_ticket_number(value):
+    return f"{TICKET_PREFIX}{value:0{TICKET_DIGITS}d}"
+
+
+class TicketNumberAllocator:
+    """
+    Hands out ticket numbers from per-process reserved blocks.
+    """
+
+    def __init__(self, sequence_name=TICKET_SEQUENCE_NAME, block_size=BLOCK_SIZE):
+        self.sequence_name = sequence_name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+        self._pid = None
+
+    def allocate(self):
+        with self._lock:
+            # A forked worker must not reuse a block reserved by its parent.
+            if self._pid == os.getpid() and self._next < self._limit:
+                value = self._next
+                self._next += 1
+                return format_ticket_number(value)
+
+        start, limit = self._reserve_block()
+
+        remainder = (start + 1, limit)
+        if transaction.get_connection().in_atomic_block:
+            # The reservation is rolled back with the caller's transaction, so
+            # only keep the rest of the block once it is actually committed.
+            transaction.on_commit(lambda: self._adopt(*remainder))
+        else:
+            self._adopt(*remainder)
+
+        return format_ticket_number(start)
+
+    def _adopt(self, start, limit):
+        with self._lock:
+            if self._pid != os.getpid() or self._next >= self._limit:
+                self._next, self._limit, self._pid = start, limit, os.getpid()
+
+    def _reserve_block(self):
+        """
+        Atomically advances the sequence by one block and returns its range.
+
+        The UPDATE takes the row lock first, so the value read back inside
+        the same transaction belongs to this process alone.
+        """
+        for _ in range(2):
+            with transaction.atomic():
+                updated = TicketSequence.objects.filter(name=self.sequence_name).update(
+                    next_value=F('next_value') + self.block_size
+                )
+                if updated:
+                    limit = TicketSequence.objects.values_list('next_value', flat=True).get(name=self.sequence_name)
+                    return limit - self.block_size, limit
+
+            # Sequence row missing (e.g. table emptied): create it and retry.
+            try:
+                with transaction.atomic():
+                    TicketSequence.objects.create(name=self.sequence_name, next_value=1)
+            except IntegrityError:
+                pass
+
+        raise RuntimeError(f"Could not reserve ticket numbers from sequence '{self.sequence_name}'.")
+
+
+ticket_allocator = TicketNumberAllocator()
+
+
+def allocate_ticket_number():
+    """
+    Returns a new, unique ticket number such as ``TCKT-000001234``.
+    """
+    return ticket_allocator.allocate()
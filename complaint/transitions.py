@@ -0,0 +1,241 @@
+# complaint/transitions.py
+"""
+Complaint state machine: the one write path for status and assignment.
+
+A transition locks the target complaints that are in one of its source
+states and changes them with a single UPDATE through update_complaints (so
+the dashboard counters and version stay in step). It also sets the SLA
+deadline of the new state, logs one ComplaintStatusHistory row per
+complaint and sends ``complaint_transitioned`` once the transaction commits.
+
+Targets may be a Complaint instance (the update is then also conditional on
+its version and the instance is refreshed), a primary key, or a queryset
+for bulk changes. Each transition returns the ``(pk, ticket_number,
+old_status)`` of the complaints it changed; an empty list means none of the
+targets was in a source state.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .counters import update_complaints
+from .models import Complaint, ComplaintConflict, ComplaintStatusHistory
+from .sla import SLA_ASSIGNED_HOURS, SLA_UNASSIGNED_HOURS
+
+# Sent after commit with ``transition`` (name), ``complaint_ids`` and ``changed_by``
+complaint_transitioned = Signal()
+
+ACTIVE_STATUSES = ('open', 'in_progress', 'pending')
+
+# Fields only transitions may change
+TRANSITION_FIELDS = ('status', 'assigned_engineer_id', 'assigned_date', 'resolved_date', 'sla_due_at')
+
+
+class TransitionNotAllowed(ComplaintConflict):
+    """
+    Raised when a complaint's current state rules out a change; unlike a
+    plain ComplaintConflict, trying again won't help.
+    """
+
+
+def _target_queryset(target):
+    if isinstance(target, Complaint):
+        return Complaint.objects.filter(pk=target.pk, version=target.version)
+    if isinstance(target, QuerySet):
+        return target
+    return Complaint.objects.filter(pk=target)
+
+
+def _refresh(complaint):
+    complaint.refresh_from_db(fields=[*TRANSITION_FIELDS, 'version'])
+    loaded = getattr(complaint, '_loaded_values', None)
+    if loaded is not None:
+        for field in (*TRANSITION_FIELDS, 'version'):
+            loaded[field] = getattr(complaint, field)
+
+
+@transaction.atomic
+def apply_transition(name, target, source, changed_by=None, **values):
+    """
+    Applies ``values`` to the complaints in ``target`` matching ``source``
+    (a Q object), as described in the module docstring.
+    """
+    rows = list(
+        _target_queryset(target).filter(source)
+        .select_for_update()
+        .order_by('pk')
+        .values_list('pk', 'ticket_number', 'status')
+    )
+    if not rows:
+        return []
+
+    pks = [row[0] for row in rows]
+    update_complaints(Complaint.objects.filter(pk__in=pks), **values)
+
+    changed_at = timezone.now()
+    ComplaintStatusHistory.objects.bulk_create([
+        ComplaintStatusHistory(
+            complaint_id=pk,
+            old_status=old_status,
+            new_status=values.get('status', old_status),
+            changed_by=changed_by,
+            reason=name,
+            changed_at=changed_at,
+        )
+        for pk, _, old_status in rows
+    ])
+    transaction.on_commit(lambda: complaint_transitioned.send(
+        sender=Complaint, transition=name, complaint_ids=pks, changed_by=changed_by,
+    ))
+
+    if isinstance(target, Complaint):
+        _refresh(target)
+    return rows
+
+
+# 🔹 Transitions
+def assign(target, engineer, changed_by=None, name='assign'):
+    """
+    Unassigned, unresolved complaints -> in progress with ``engineer``.
+    Includes in-progress complaints left without an engineer when theirs
+    was deleted (SET_NULL).
+    """
+    now = timezone.now()
+    return apply_transition(
+        name, target,
+        Q(status__in=ACTIVE_STATUSES, assigned_engineer__isnull=True),
+        changed_by,
+        assigned_engineer=engineer,
+        status='in_progress',
+        assigned_date=now,
+        sla_due_at=now + timedelta(hours=SLA_ASSIGNED_HOURS),
+    )
+
+
+def reassign(target, engineer, changed_by=None, name='reassign'):
+    """
+    Complaints assigned to another engineer -> in progress with ``engineer``;
+    the resolution deadline restarts.
+    """
+    now = timezone.now()
+    return apply_transition(
+        name, target,
+        Q(status__in=('in_progress', 'pending'), assigned_engineer__isnull=False)
+        & ~Q(assigned_engineer=getattr(engineer, 'pk', engineer)),
+        changed_by,
+        assigned_engineer=engineer,
+        status='in_progress',
+        assigned_date=now,
+        sla_due_at=now + timedelta(hours=SLA_ASSIGNED_HOURS),
+    )
+
+
+def unassign(target, changed_by=None):
+    """
+    Assigned, unresolved complaints -> open and unassigned.
+    """
+    return apply_transition(
+        'unassign', target,
+        Q(status__in=('in_progress', 'pending'), assigned_engineer__isnull=False),
+        changed_by,
+        assigned_engineer=None,
+        status='open',
+        assigned_date=None,
+        sla_due_at=F('created_at') + timedelta(hours=SLA_UNASSIGNED_HOURS),
+    )
+
+
+def resolve(target, changed_by=None):
+    """
+    Open, in-progress or pending complaints -> resolved.
+    """
+    return apply_transition(
+        'resolve', target,
+        Q(status__in=ACTIVE_STATUSES),
+        changed_by,
+        status='resolved',
+        resolved_date=timezone.now(),
+        sla_due_at=None,
+    )
+
+
+def escalate(target, now=None):
+    """
+    Complaints past their SLA deadline -> pending (see complaint.sla).
+    """
+    return apply_transition(
+        'sla_escalation', target,
+        Q(sla_due_at__lte=now or timezone.now()),
+        status='pending',
+        sla_due_at=None,
+    )
+
+
+def blocked_reason(transition, status, engineer_id, engineer=None):
+    """
+    Why a complaint in ``status``, assigned to ``engineer_id``, is not a
+    source of ``transition`` (for messages to the user).
+    """
+    if status == 'resolved':
+        return "The complaint is already resolved."
+    if transition in ('assign', 'reassign') and engineer_id is not None and engineer_id == getattr(engineer, 'pk', engineer):
+        return "The complaint is already assigned to this engineer."
+    if transition == 'unassign' and engineer_id is None:
+        return "The complaint is not assigned to an engineer."
+    if transition == 'assign' and engineer_id is not None:
+        return "The complaint is already assigned to another engineer."
+    if transition == 'reassign' and engineer_id is None:
+        return "The complaint is not assigned to an engineer yet."
+    status = dict(Complaint.STATUS_CHOICES).get(status, status)
+    return f"The complaint can't be changed this way while it is {status.lower()}."
+
+
+def _refusal(complaint, transition, engineer=None):
+    # The instance's version was current after save_changes(): a newer one
+    # means someone else changed the complaint, otherwise its state blocks the change
+    row = Complaint.objects.filter(pk=complaint.pk).values_list('version', 'status', 'assigned_engineer_id').first()
+    if row is None or row[0] != complaint.version:
+        return ComplaintConflict("The complaint was changed by someone else.")
+    return TransitionNotAllowed(blocked_reason(transition, row[1], row[2], engineer))
+
+
+# 🔹 Saving edit forms
+@transaction.atomic
+def save_complaint_edit(complaint, changed_by=None):
+    """
+    Saves a complaint changed by one of the edit forms.
+
+    Plain field changes are written with ``save_changes()``. A changed
+    engineer becomes an assign, reassign or unassign transition. A complaint
+    with both a product serial number and a service confirmation photo is
+    resolved. Raises ComplaintConflict if the complaint was changed
+    elsewhere since the form was opened, or TransitionNotAllowed if its
+    state rules out the change.
+    """
+    loaded = getattr(complaint, '_loaded_values', {})
+    old_engineer = loaded.get('assigned_engineer_id', complaint.assigned_engineer_id)
+    new_engineer = complaint.assigned_engineer_id
+
+    # Status and assignment only change through the transitions below
+    for field in TRANSITION_FIELDS:
+        if field in loaded:
+            setattr(complaint, field, loaded[field])
+    complaint.save_changes()
+
+    if new_engineer != old_engineer:
+        if new_engineer is None:
+            transition, changed = 'unassign', unassign(complaint, changed_by)
+        elif old_engineer is None:
+            transition, changed = 'assign', assign(complaint, new_engineer, changed_by)
+        else:
+            transition, changed = 'reassign', reassign(complaint, new_engineer, changed_by)
+        if not changed:
+            raise _refusal(complaint, transition, new_engineer)
+
+    if complaint.product_serial_number and complaint.service_confirmation_photo and complaint.status in ACTIVE_STATUSES:
+        if not resolve(complaint, changed_by):
+            raise _refusal(complaint, 'resolve')
@@ -26,14 +26,25 @@ urlpatterns = [
     path('complaints/<int:pk>/', views.complaint_detail, name='complaint_detail'),
     path('complaints/<int:pk>/edit/', views.complaint_edit, name='complaint_edit'),
     path('update/<int:complaint_id>/', views.update_complaint, name='update_complaint'),
+    path('complaints/bulk/', views.bulk_complaint_action, name='bulk_complaint_action'),  # Admin & manager
 
     # 📋 Engineer: Assigned Complaints List
     path('engineer/assigned-complaints/', views.engineer_assigned_complaints, name='engineer_assigned_complaints'),
+    path('engineer/route/', views.engineer_route_plan, name='engineer_route_plan'),  # Engineer, manager & admin
+
+    # 📮 Pincode autofill (public)
+    path('pincodes/lookup/', views.pincode_lookup, name='pincode_lookup'),
 
     path('manager/complaints/', views.show_manager_complaints, name='show_manager_complaints'),
     path('accountant/complaints/', views.show_accountant_complaints, name='show_accountant_complaints'),
     path('tally/complaints/', views.show_tally_complaints, name='show_tally_complaints'),
 
+    # 📦 Background exports
+    path('exports/queue/', views.export_job_create, name='export_job_create'),
+    path('exports/<int:job_id>/', views.export_job_detail, name='export_job_detail'),
+    path('exports/<int:job_id>/status/', views.export_job_status, name='export_job_status'),
+    path('exports/<int:job_id>/download/', views.export_job_download, name='export_job_download'),
+
     #fresh
     path('complaint/edit/<int:complaint_id>/', views.edit_complaint_by_manager, name='edit_complaint_by_manager'),
 
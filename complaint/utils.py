@@ -1,19 +1,50 @@
-import random
-import string
-import uuid
+import re
+
 from .models import Profile
 
+MOBILE_DIGITS = 10  # Indian mobile numbers, without the +91 / 0 prefix
+PINCODE_DIGITS = 6  # Indian postal codes
+
+def get_user_role(user):
+    """
+    Returns the user's Profile role (None for anonymous users or users
+    without a profile). The result is cached on the user object, so the
+    profile is read at most once per request.
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return None
+    if not hasattr(user, '_cached_role'):
+        try:
+            user._cached_role = user.profile.role
+        except Profile.DoesNotExist:
+            user._cached_role = None
+    return user._cached_role
+
 def user_has_role(user, role_name):
     """
     Safely checks if a user has a specific role.
     """
-    try:
-        return user.profile.role == role_name
-    except Profile.DoesNotExist:
-        return False
+    return get_user_role(user) == role_name
 
 def generate_ticket_number():
     """
-    Generates a consistent 8-character ticket number with 'TCKT-' prefix.
+    Returns a unique 'TCKT-' ticket number from the shared ticket allocator.
+    """
+    from .ticketing import allocate_ticket_number
+    return allocate_ticket_number()
+
+def normalize_mobile(value):
+    """
+    Reduces a phone number to its last MOBILE_DIGITS digits, dropping
+    spaces, dashes and any +91 / 0 prefix. '+91 98765-43210' -> '9876543210'.
+    """
+    digits = re.sub(r'\D', '', value or '')
+    return digits[-MOBILE_DIGITS:]
+
+def normalize_pincode(value):
+    """
+    Strips spaces and other separators from a pincode: ' 400 001' -> '400001'.
+    Returns '' unless exactly PINCODE_DIGITS digits remain.
     """
-    return f"TCKT-{uuid.uuid4().hex[:8].upper()}"
+    digits = re.sub(r'\D', '', value or '')
+    return digits if len(digits) == PINCODE_DIGITS else ''
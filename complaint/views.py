@@ -1,25 +1,47 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden, HttpResponse
+from django.http import HttpResponseForbidden, HttpResponse, JsonResponse, FileResponse, Http404
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm
 from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.contrib.auth import update_session_auth_hash
 from .forms import ComplaintForm, ComplaintUpdateForm, AddStaffForm, EditStaffForm, ComplaintManagerEditForm
-from .sms_utils import send_sms_mock
-from .models import Complaint, Profile
-from .utils import generate_ticket_number, user_has_role
+from .bulk import BULK_ACTION_LISTS, BulkActionForm, run_bulk_action
+from .notifications import queue_complaint_notifications
+from .engineers import engineer_directory
+from .exports import export_complaints_to_excel
+from .queries import complaint_filters_from, complaints_for_role
+from .export_jobs import EXPORT_ROLES, queue_export_job
+from .pagination import KeysetPaginator
+from .pincodes import pincode_directory
+from .dashboard import dashboard_stats
+from .models import Complaint, ComplaintConflict, ExportJob
+from .routes import ROUTE_VISITS_PER_DAY, export_routes, plan_route, route_complaints
+from .roles import ROLE_DISPATCH, STAFF_ROLES, base_template_for, dashboard_for, redirect_to_dashboard
+from .staff import assign_staff_role
+from .transitions import TransitionNotAllowed, save_complaint_edit
+from .utils import generate_ticket_number, get_user_role
 from django.contrib.auth.views import PasswordChangeView
-import random
-import string
+import os
 import openpyxl
-from django.utils.dateparse import parse_date
-from django.db.models import Q
 from django.core.paginator import Paginator
-from product.models import Product
-from django.utils.timezone import now
 from django.contrib.auth.models import Group, User
+from django.db import transaction
+
+
+EDIT_CONFLICT_MESSAGE = (
+    "This complaint was changed by someone else while you were editing it. "
+    "The latest version is shown below; please apply your changes again."
+)
+
+
+def _edit_conflict_message(exc):
+    # A refused transition won't succeed on retry: say what stops it
+    if isinstance(exc, TransitionNotAllowed):
+        return f"{exc} The latest version is shown below."
+    return EDIT_CONFLICT_MESSAGE
 
 
 #landing page
@@ -34,30 +56,29 @@ def custom_login_view(request):
             user = form.get_user()
             login(request, user)
 
-            role = getattr(user.profile, 'role', None)
-            if role == 'admin':
-                return redirect('admin_dashboard')
-            elif role == 'manager':
-                return redirect('manager_dashboard')
-            elif role == 'engineer':
-                return redirect('engineer_dashboard')
-            elif role == 'accountant':
-                return redirect('accountant_dashboard')
-            elif role == 'customer':
-                return redirect('public_complaint_form')
-            elif role == 'tally':
-                return redirect('tally_dashboard')
-            else:
+            role = get_user_role(user)
+            if role not in ROLE_DISPATCH:
                 messages.error(request, "Unknown user role.")
-                return redirect('login')
+            return redirect_to_dashboard(role)
     else:
         form = AuthenticationForm()
 
     return render(request, 'registration/login.html', {'form': form})
 
-# Utility: Generate random ticket number
-def generate_ticket_number():
-    return ''.join(random.choices(string.digits, k=8))
+# 📮 Pincode autofill for the complaint forms (offline directory, no login required)
+def pincode_lookup(request):
+    pincode = request.GET.get('pincode', '').strip()[:10]
+    if pincode:
+        entry = pincode_directory().lookup(pincode)
+        if entry is None:
+            return JsonResponse({'found': False})
+        return JsonResponse({'found': True, **entry})
+
+    # City (and state) -> pincodes
+    pincodes = pincode_directory().pincodes_for_city(
+        request.GET.get('city', '')[:100], request.GET.get('state', '')[:100]
+    )
+    return JsonResponse({'found': bool(pincodes), 'pincodes': pincodes})
 
 # Public Complaint Form (no login required)
 def public_complaint_form(request):
@@ -70,24 +91,15 @@ def public_complaint_form(request):
         if form.is_valid():
             complaint = form.save(commit=False)
 
-            # ✅ Save ticket number
-            while True:
-                ticket = generate_ticket_number()
-                if not Complaint.objects.filter(ticket_number=ticket).exists():
-                    break
+            # ✅ Allocate ticket number (unique, no lookup needed)
+            ticket = generate_ticket_number()
             complaint.ticket_number = ticket
-            complaint.save()
-
-            # ✅ Send SMS
-            send_sms_mock(complaint.mobile_number, complaint.ticket_number)
 
-            # Send complaint number email
-            subject = "Your Complaint Ticket Number"
-            message = render_to_string("emails/complaint_notification_email.txt", {
-                'customer_name': complaint.customer_name,
-                'ticket_number': complaint.ticket_number,
-            })
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [complaint.email])
+            # ✅ Save complaint and queue SMS/email in one transaction
+            # (delivered by the send_notifications command)
+            with transaction.atomic():
+                complaint.save()
+                queue_complaint_notifications(complaint)
 
             return render(request, 'complaint/thank_you.html', {
                 'ticket_number': ticket,
@@ -106,57 +118,25 @@ def public_complaint_form(request):
 
 @login_required
 def user_complaint_form(request):
-    form = ComplaintForm(request.POST if request.method == 'POST' else None, show_admin_fields=False)
-
-    # ✅ Define roles 
-    is_admin = user_has_role(request.user, 'admin')
-    is_engineer = user_has_role(request.user, 'engineer')
-    is_manager = user_has_role(request.user, 'manager')
-    is_accountant = user_has_role(request.user, 'accountant')
-    is_tally = user_has_role(request.user, 'tally')
+    form = ComplaintForm(request.POST if request.method == 'POST' else None, show_admin_fields=False, user=request.user)
 
     # ✅ Set base_form_template dynamically based on role
-    if is_admin:
-        base_form_template = "base.html"
-        back_url = reverse('admin_dashboard')
-    elif is_engineer:
-        base_form_template = "base_engineer.html"
-        back_url = reverse('engineer_dashboard')
-    elif is_manager:
-        base_form_template = "base_manager.html"
-        back_url = reverse('manager_dashboard')
-    elif is_accountant:
-        base_form_template = "base_accountant.html"
-        back_url = reverse('accountant_dashboard')
-    elif is_tally:
-        base_form_template = "base_tallyuser.html"
-        back_url = reverse('tally_dashboard')
-    else:
-        base_form_template = "base_public.html"
-        back_url = reverse('home')
+    base_form_template = base_template_for(request.role)
+    back_url = reverse(dashboard_for(request.role) if request.role in STAFF_ROLES else 'home')
 
     if request.method == 'POST' and form.is_valid():
         complaint = form.save(commit=False)
         complaint.user = request.user  # Link user
 
-        # ✅ Save ticket number
-        while True:
-            ticket = generate_ticket_number()
-            if not Complaint.objects.filter(ticket_number=ticket).exists():
-                break
+        # ✅ Allocate ticket number (unique, no lookup needed)
+        ticket = generate_ticket_number()
         complaint.ticket_number = ticket
-        complaint.save()
-
-        # ✅ Send SMS
-        send_sms_mock(complaint.mobile_number, complaint.ticket_number)
 
-        # Send complaint number email
-        subject = "Your Complaint Ticket Number"
-        message = render_to_string("emails/complaint_notification_email.txt", {
-            'customer_name': complaint.customer_name,
-            'ticket_number': complaint.ticket_number,
-        })
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [complaint.email])
+        # ✅ Save complaint and queue SMS/email in one transaction
+        # (delivered by the send_notifications command)
+        with transaction.atomic():
+            complaint.save()
+            queue_complaint_notifications(complaint)
 
         return render(request, 'complaint/thank_you.html', {
                 'ticket_number': ticket,
@@ -178,68 +158,72 @@ def complaint_form(request):
 
 @login_required
 def complaint_list(request):
-    if not user_has_role(request.user, 'admin'):
+    if request.role != 'admin':
         return HttpResponseForbidden("Only admins can view all complaints.")
 
     # Handle export via POST, filters via GET
     if request.method == "POST" and request.POST.get("export") == "true":
-        search = request.POST.get('search', '')
-        status = request.POST.get('status', '')
-        from_date = request.POST.get('from_date')
-        to_date = request.POST.get('to_date')
-        unassigned = request.POST.get('unassigned', '')
+        filters = complaint_filters_from(request.POST)
     else:
-        search = request.GET.get('search', '')
-        status = request.GET.get('status', '')
-        from_date = request.GET.get('from_date')
-        to_date = request.GET.get('to_date')
-        unassigned = request.GET.get('unassigned', '')
-
-    # Base queryset
-    complaints = Complaint.objects.all().order_by('-created_at')
-
-    # Filters
-    if search:
-        complaints = complaints.filter(
-            Q(ticket_number__icontains=search) |
-            Q(mobile_number__icontains=search) |
-            Q(email__icontains=search)
-        )
-
-    if status:
-        complaints = complaints.filter(status__iexact=status)
-
-    if from_date:
-        complaints = complaints.filter(created_at__date__gte=parse_date(from_date))
+        filters = complaint_filters_from(request.GET)
 
-    if to_date:
-        complaints = complaints.filter(created_at__date__lte=parse_date(to_date))
-
-    # ✅ Filter for unassigned complaints
-    if unassigned == 'true':
-        complaints = complaints.filter(assigned_engineer__isnull=True)
+    complaints = complaints_for_role('admin', filters)
 
     # Handle Excel export
     if request.method == "POST" and request.POST.get("export") == "true":
         return export_complaints_to_excel(complaints, role="admin")
 
     # Pagination
-    paginator = Paginator(complaints, 10)
-    page_number = request.GET.get('page')
-    complaints_page = paginator.get_page(page_number)
+    # Keyset pagination on (created_at, id): constant cost at any depth
+    complaints_page = KeysetPaginator(complaints, 10).get_page(request.GET.get('cursor'))
 
     context = {
         'complaints': complaints_page,
-        'search': search,
-        'status': status,
-        'from_date': from_date,
-        'to_date': to_date,
-        'unassigned': unassigned,  # Optional, if you want to track in UI
+        'search': filters.get('search', ''),
+        'status': filters.get('status', ''),
+        'from_date': filters.get('from_date', ''),
+        'to_date': filters.get('to_date', ''),
+        'unassigned': filters.get('unassigned', ''),  # Optional, if you want to track in UI
+        'bulk_form': BulkActionForm(role='admin'),
+        'bulk_result': request.session.pop('bulk_action_result', None),
     }
 
     return render(request, 'complaint/complaint_list.html', context)
 
 
+# 📋 Bulk actions from the admin and manager complaint lists
+@login_required
+def bulk_complaint_action(request):
+    if request.role not in BULK_ACTION_LISTS:
+        return HttpResponseForbidden("Only admins and managers can run bulk actions.")
+
+    back_url = request.POST.get('next', '')
+    if not url_has_allowed_host_and_scheme(back_url, allowed_hosts={request.get_host()}):
+        back_url = reverse(BULK_ACTION_LISTS[request.role])
+    if request.method != 'POST':
+        return redirect(back_url)
+
+    form = BulkActionForm(request.POST, role=request.role)
+    if not form.is_valid():
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+        return redirect(back_url)
+
+    result = run_bulk_action(
+        form.cleaned_data['action'],
+        form.cleaned_data['complaint_ids'],
+        engineer=form.cleaned_data.get('engineer'),
+        service_cost=form.cleaned_data.get('service_cost'),
+        changed_by=request.user,
+        overwrite_cost=request.role == 'admin',
+    )
+    # Shown once by the list view (per-complaint outcome)
+    request.session['bulk_action_result'] = result
+    messages.success(request, f"{result['action']}: {len(result['updated'])} complaints updated, {len(result['skipped'])} skipped.")
+    return redirect(back_url)
+
+
 @login_required
 def complaint_detail(request, pk):
     complaint = get_object_or_404(Complaint, pk=pk)
@@ -252,14 +236,15 @@ def complaint_edit(request, pk):
     complaint = get_object_or_404(Complaint, pk=pk)
 
     user = request.user
-    is_admin = user_has_role(user, 'admin')
-    is_manager = user_has_role(user, 'manager')
-    is_accountant = user_has_role(user, 'accountant')
+    is_admin = request.role == 'admin'
+    is_manager = request.role == 'manager'
+    is_accountant = request.role == 'accountant'
 
     if not (is_admin or is_manager or is_accountant):
         return HttpResponseForbidden("Only admins, managers, or accountants can edit complaints.")
 
     form_kwargs = {'instance': complaint, 'user': user}
+    status = 200
 
     if request.method == 'POST':
         #form = ComplaintUpdateForm(request.POST, request.FILES, **form_kwargs)
@@ -271,19 +256,6 @@ def complaint_edit(request, pk):
         if form.is_valid():
             complaint = form.save(commit=False)
 
-            if is_admin or is_manager:
-                # Handle status and assignment logic
-                if complaint.assigned_engineer and not complaint.assigned_date:
-                    complaint.status = 'in_progress'
-                    complaint.assigned_date = now()
-                else:
-                    complaint.status = 'open'
-                    complaint.assigned_date = None
-
-                if complaint.product_serial_number and complaint.service_confirmation_photo:
-                    complaint.status = 'resolved'
-                    complaint.resolved_date = now()
-
             if is_accountant or is_admin:
                 # Only allow accountant and admin to mark as paid
                 if (form.cleaned_data.get('payment_method') == 'cash' and
@@ -294,15 +266,23 @@ def complaint_edit(request, pk):
                     form.cleaned_data.get('payment_confirmation_photo')):
                     complaint.payment_status = 'paid'
 
-            complaint.save()
-            if is_manager:
-                return redirect('show_manager_complaints')
-            elif is_accountant:
-                return redirect('show_accountant_complaints')
+            try:
+                # Writes only the changed columns; assignment and resolution go
+                # through the transition service (see complaint.transitions)
+                save_complaint_edit(complaint, changed_by=user)
+            except ComplaintConflict as exc:
+                messages.error(request, _edit_conflict_message(exc))
+                complaint = form_kwargs['instance'] = get_object_or_404(Complaint, pk=pk)
+                status = 409
             else:
-                return redirect('complaint_detail', pk=complaint.pk)
+                if is_manager:
+                    return redirect('show_manager_complaints')
+                elif is_accountant:
+                    return redirect('show_accountant_complaints')
+                else:
+                    return redirect('complaint_detail', pk=complaint.pk)
 
-    else:
+    if request.method != 'POST' or status == 409:
         if is_manager:
             service_cost_editable = complaint.service_cost is None
             form = ComplaintManagerEditForm(instance=complaint, service_cost_editable=service_cost_editable)
@@ -311,150 +291,131 @@ def complaint_edit(request, pk):
             service_cost_editable = False
 
     # ✅ Set base_template dynamically based on role
-    if is_admin:
-        base_template = "base.html"
-        template_name = 'complaint/complaint_edit.html'
-    elif is_manager:
-        base_template = "base_manager.html"
-        template_name = 'complaint/edit_complaint_by_manager.html'
-    elif is_accountant:
-        base_template = "base_accountant.html"
-        template_name = 'complaint/complaint_edit.html'
-    else:
-        base_template = "base_public.html"
-        template_name = 'complaint/complaint_edit.html'
+    template_name = 'complaint/edit_complaint_by_manager.html' if is_manager else 'complaint/complaint_edit.html'
 
     return render(request, template_name, {
         'form': form,
         'complaint': complaint,
-        'base_template': base_template,
+        'base_template': base_template_for(request.role),
         'service_cost_editable': service_cost_editable,
-    })
+    }, status=status)
 
 @login_required
 def update_complaint(request, complaint_id):
     complaint = get_object_or_404(Complaint, id=complaint_id)
 
-    if not (user_has_role(request.user, 'admin') or complaint.assigned_engineer == request.user):
+    if not (request.role == 'admin' or complaint.assigned_engineer == request.user):
         return HttpResponseForbidden("You are not authorized to update this complaint.")
 
     form_kwargs = {'instance': complaint, 'user': request.user}
+    status = 200
 
     if request.method == 'POST':
         form = ComplaintUpdateForm(request.POST, request.FILES, **form_kwargs)
         if form.is_valid():
             complaint = form.save(commit=False)
 
-            # Auto-set In Progress when engineer assigned (initial assignment handled elsewhere)
-            if complaint.assigned_engineer and not complaint.assigned_date:
-                complaint.status = 'in_progress'
-                complaint.assigned_date = now()
-            else:
-                # Unassigned case: Reset status and date
-                complaint.status = 'open'
-                complaint.assigned_date = None
-
-
-            # Auto-set Resolved when serial number + service photo uploaded
-            if complaint.product_serial_number and complaint.service_confirmation_photo:
-                complaint.status = 'resolved'
-                complaint.resolved_date = now()
-
+            # Assignment changes and the automatic resolution (serial number +
+            # service photo uploaded) are applied as transitions.
             # Engineer can't change status manually
-
-            complaint.save()
-            return redirect('complaint_list' if user_has_role(request.user, 'admin') else 'engineer_dashboard')
+            try:
+                save_complaint_edit(complaint, changed_by=request.user)
+            except ComplaintConflict as exc:
+                messages.error(request, _edit_conflict_message(exc))
+                complaint = form_kwargs['instance'] = get_object_or_404(Complaint, id=complaint_id)
+                form = ComplaintUpdateForm(**form_kwargs)
+                status = 409
+            else:
+                return redirect('complaint_list' if request.role == 'admin' else 'engineer_dashboard')
     else:
         form = ComplaintUpdateForm(**form_kwargs)
 
     return render(request, 'complaint/update_complaint.html', {
         'form': form,
         'complaint': complaint
+    }, status=status)
+
+# 📦 Background Export Jobs
+def _export_role(request):
+    return request.role if request.role in EXPORT_ROLES else None
+
+def _can_access_export(request, job):
+    return job.requested_by_id == request.user.pk or request.role == job.role
+
+@login_required
+def export_job_create(request):
+    role = _export_role(request)
+    if role is None:
+        return HttpResponseForbidden("Only admins, managers, or accountants can export complaints.")
+    if request.method != 'POST':
+        return redirect('home')
+
+    file_format = request.POST.get('file_format', 'xlsx')
+    if file_format not in dict(ExportJob.FORMAT_CHOICES):
+        file_format = 'xlsx'
+
+    job, created = queue_export_job(request.user, role, complaint_filters_from(request.POST), file_format)
+    if not created:
+        messages.info(request, "An identical export was requested recently; reusing it.")
+    return redirect('export_job_detail', job_id=job.pk)
+
+@login_required
+def export_job_detail(request, job_id):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if not _can_access_export(request, job):
+        return HttpResponseForbidden("You are not allowed to view this export.")
+
+    return render(request, 'complaint/export_job.html', {
+        'job': job,
+        'base_template': base_template_for(job.role),
     })
 
-def export_complaints_to_excel(queryset, role=None, username=None):
-    import openpyxl
-    from datetime import datetime
+@login_required
+def export_job_status(request, job_id):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if not _can_access_export(request, job):
+        return HttpResponseForbidden("You are not allowed to view this export.")
+
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'rows_processed': job.rows_processed,
+        'total_rows': job.total_rows,
+        'progress': job.progress_percent(),
+        'error': job.error,
+        'download_url': reverse('export_job_download', args=[job.pk]) if job.status == 'done' else None,
+    })
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Complaints"
+@login_required
+def export_job_download(request, job_id):
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if not _can_access_export(request, job):
+        return HttpResponseForbidden("You are not allowed to download this export.")
+    if job.status != 'done' or not job.file:
+        raise Http404("Export is not ready yet.")
 
-    # Define headers based on role
-    if role == "accountant":
-        headers = ["Ticket No", "Customer Name", "Email", 'Mobile Number', "Product", 'Issue Type', "Status", "Engineer", "Service Cost", "Payment Mode", "Created At"]
-    else:
-        headers = ["Ticket No", "Customer Name", "Email", 'Mobile Number', "Product", 'Issue Type', "Status", "Engineer", "Created At"]
-    
-    ws.append(headers)
-
-    for obj in queryset:
-        row = [
-            obj.ticket_number,
-            obj.customer_name,
-            obj.email or '',
-            obj.mobile_number,
-            obj.product.name if obj.product else 'Other',
-            obj.issue_type,
-            #obj.status,
-            obj.get_status_display(),
-            getattr(obj.assigned_engineer, 'username', 'Not Assigned'),
-        ]
-
-        if role == "accountant":
-            row.extend([
-                obj.service_cost if hasattr(obj, 'service_cost') else '',
-                obj.payment_method if hasattr(obj, 'payment_method') else '',
-            ])
-
-        row.append(obj.created_at.strftime("%Y-%m-%d %H:%M"))
-        ws.append(row) 
-
-    # Generate file name based on role and time
-    filename = f"{role or 'complaints'}_export_{username or 'user'}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename={filename}'
-    wb.save(response)
-    return response
+    return FileResponse(job.file.open('rb'), as_attachment=True, filename=os.path.basename(job.file.name))
 
 # Admin Dashboard
 @login_required
 def admin_dashboard(request):
-    if not user_has_role(request.user, 'admin'):
+    if request.role != 'admin':
         return HttpResponseForbidden("Admins only.")
 
-    context = {
-        'total_complaints': Complaint.objects.count(),
-        'pending_complaints': Complaint.objects.filter(status__iexact='Pending').count(),
-        'not_assigned_complaints': Complaint.objects.filter(assigned_engineer__isnull=True).count(),
-        'total_staff': Profile.objects.count(),
-        'total_products': Product.objects.count(), 
-    }
+    context = dashboard_stats('admin')
 
     return render(request, 'dashboards/admin_dashboard.html', context)
 
 #  Engineer Dashboard
 @login_required
 def engineer_dashboard(request):
-    user = request.user
-    total_assigned = Complaint.objects.filter(assigned_engineer=user).count()
-    pending_count = Complaint.objects.filter(assigned_engineer=user, status__iexact='Pending').count()
-    resolved_count = Complaint.objects.filter(assigned_engineer=user, status__iexact='Resolved').count()
-    pending_payments = Complaint.objects.filter(assigned_engineer=user, payment_status__iexact='Pending').count()
-
-    return render(request, 'dashboards/engineer_dashboard.html', {
-        'total_assigned': total_assigned,
-        'pending_count': pending_count,
-        'resolved_count': resolved_count,
-        'pending_payments': pending_payments,
-    })
+    context = dashboard_stats('engineer', request.user)
+
+    return render(request, 'dashboards/engineer_dashboard.html', context)
 
 @login_required 
 def engineer_assigned_complaints(request):
-    if not user_has_role(request.user, 'engineer'):
+    if request.role != 'engineer':
         return HttpResponseForbidden("Only engineers can view assigned complaints.")
 
     # Get filters from query parameters
@@ -464,32 +425,15 @@ def engineer_assigned_complaints(request):
     end_date = request.GET.get('end_date', '')
 
     # Filter complaints assigned to the engineer
-    complaints = Complaint.objects.filter(assigned_engineer=request.user).select_related('product').order_by('-created_at')
-
-    # Apply search filter (product name or issue type)
-    if search_query:
-        complaints = complaints.filter(
-        Q(ticket_number__icontains=search_query) |
-        Q(mobile_number__icontains=search_query) |
-        Q(customer_name__icontains=search_query)
-        )
-
-    # Apply status filter
-    if status_filter:
-        complaints = complaints.filter(status__iexact=status_filter)
-
-    # Apply date range filter (filter by created_at)
-    if start_date:
-        complaints = complaints.filter(created_at__date__gte=parse_date(start_date))
-    if end_date:
-        complaints = complaints.filter(created_at__date__lte=parse_date(end_date))
-
-    complaints = complaints.order_by('-created_at')
+    complaints = complaints_for_role('engineer', {
+        'search': search_query,
+        'status': status_filter,
+        'from_date': start_date,
+        'to_date': end_date,
+    }, user=request.user)
 
     # Paginate
-    paginator = Paginator(complaints, 10)  # 10 complaints per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = KeysetPaginator(complaints, 10).get_page(request.GET.get('cursor'))  # 10 complaints per page
 
     return render(request, 'complaint/engineer_assigned_list.html', {
         'complaints': complaints,
@@ -500,95 +444,105 @@ def engineer_assigned_complaints(request):
         'end_date': end_date
     })
 
+# 🗺️ Visit route over an engineer's open complaints
+@login_required
+def engineer_route_plan(request):
+    names = {engineer['id']: engineer['name'] for engineer in engineer_directory()}
+    if request.role == 'engineer':
+        engineer_id = request.user.pk
+    elif request.role in ('admin', 'manager'):
+        # Admins and managers pick the engineer
+        try:
+            engineer_id = int(request.GET.get('engineer', ''))
+        except ValueError:
+            engineer_id = None
+        if engineer_id not in names:
+            engineer_id = None
+    else:
+        return HttpResponseForbidden("Only engineers, managers and admins can view visit routes.")
+
+    try:
+        visits_per_day = min(max(int(request.GET.get('per_day', ROUTE_VISITS_PER_DAY)), 1), 50)
+    except ValueError:
+        visits_per_day = ROUTE_VISITS_PER_DAY
+
+    plan = None
+    if engineer_id is not None:
+        plan = plan_route(route_complaints(Complaint.objects.filter(assigned_engineer_id=engineer_id)), visits_per_day)
+        if request.GET.get('export') == 'csv':
+            return export_routes({engineer_id: plan}, names, f"route_{engineer_id}")
+
+    return render(request, 'complaint/route_plan.html', {
+        'base_template': base_template_for(request.role),
+        'engineers': names.items() if request.role != 'engineer' else None,
+        'engineer_id': engineer_id,
+        'engineer_name': names.get(engineer_id, request.user.get_full_name() or request.user.username),
+        'visits_per_day': visits_per_day,
+        'plan': plan,
+    })
+
 # Manager Dashboard
 @login_required
 def manager_dashboard(request):
-    if not user_has_role(request.user, 'manager'):
+    if request.role != 'manager':
         return HttpResponseForbidden("Service managers only.")
 
-    context = {
-        'total_complaints': Complaint.objects.count(),
-        'pending_complaints': Complaint.objects.filter(status__iexact='Pending').count(),
-        'inprogress_complaints': Complaint.objects.filter(status__iexact='In_Progress').count(),
-        'resolved_complaints': Complaint.objects.filter(status__iexact='Resolved').count(),
-    }
+    context = dashboard_stats('manager')
 
     return render(request, 'dashboards/manager_dashboard.html', context)
 
 @login_required
 def show_manager_complaints(request):
-    if not user_has_role(request.user, 'manager'):
+    if request.role != 'manager':
         return HttpResponseForbidden("Service managers only.")
 
-    complaints = Complaint.objects.all().order_by('-created_at')
-
     # Filters
-    search = request.GET.get('search', '')
-    status = request.GET.get('status', '')
-    from_date = request.GET.get('from_date')
-    to_date = request.GET.get('to_date')
-
-    if search:
-        complaints = complaints.filter(
-            Q(ticket_number__icontains=search) |
-            Q(customer_name__icontains=search) |
-            Q(product__model_name__icontains=search)
-        )
-
-    if status:
-        complaints = complaints.filter(status__iexact=status)
-
-    if from_date:
-        complaints = complaints.filter(created_at__date__gte=parse_date(from_date))
-    if to_date:
-        complaints = complaints.filter(created_at__date__lte=parse_date(to_date))
+    filters = complaint_filters_from(request.GET)
+    complaints = complaints_for_role('manager', filters)
 
     # Export to Excel
     if 'export' in request.GET:
         return export_complaints_to_excel(complaints, role="manager", username=request.user.username)
 
     # Pagination
-    paginator = Paginator(complaints, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = KeysetPaginator(complaints, 10).get_page(request.GET.get('cursor'))
 
     return render(request, 'complaint/show_manager_complaints.html', {
         'page_obj': page_obj,
-        'search': search,
-        'status': status,
-        'from_date': from_date,
-        'to_date': to_date,
+        'search': filters.get('search', ''),
+        'status': filters.get('status', ''),
+        'from_date': filters.get('from_date', ''),
+        'to_date': filters.get('to_date', ''),
+        'bulk_form': BulkActionForm(role='manager'),
+        'bulk_result': request.session.pop('bulk_action_result', None),
     })
 
 @login_required
 def edit_complaint_by_manager(request, complaint_id):
-    if not user_has_role(request.user, 'manager'):
+    if request.role != 'manager':
         return HttpResponseForbidden("Only managers can perform this action.")
 
     complaint = get_object_or_404(Complaint, id=complaint_id)
     service_cost_editable = complaint.service_cost is None
+    status = 200
 
     if request.method == 'POST':
         form = ComplaintManagerEditForm(request.POST, instance=complaint, service_cost_editable=service_cost_editable)
         if form.is_valid():
             complaint = form.save(commit=False)
 
-            # ✅ Automatically update status and dates based on business rules
-            if complaint.assigned_engineer and not complaint.assigned_date:
-                complaint.status = 'in_progress'
-                complaint.assigned_date = now()
+            # ✅ Status and dates follow from the assignment (see complaint.transitions)
+            try:
+                save_complaint_edit(complaint, changed_by=request.user)
+            except ComplaintConflict as exc:
+                messages.error(request, _edit_conflict_message(exc))
+                complaint = get_object_or_404(Complaint, id=complaint_id)
+                service_cost_editable = complaint.service_cost is None
+                form = ComplaintManagerEditForm(instance=complaint, service_cost_editable=service_cost_editable)
+                status = 409
             else:
-                # Unassigned case: Reset status and date
-                complaint.status = 'open'
-                complaint.assigned_date = None
-
-            if complaint.product_serial_number and complaint.service_confirmation_photo:
-                complaint.status = 'resolved'
-                complaint.resolved_date = now()
-
-            complaint.save()
-            messages.success(request, "Complaint updated successfully.")
-            return redirect('show_manager_complaints')  # Adjust this redirect as needed
+                messages.success(request, "Complaint updated successfully.")
+                return redirect('show_manager_complaints')  # Adjust this redirect as needed
     else:
         form = ComplaintManagerEditForm(instance=complaint, service_cost_editable=service_cost_editable)
 
@@ -596,140 +550,74 @@ def edit_complaint_by_manager(request, complaint_id):
         'form': form,
         'complaint': complaint,
         'service_cost_editable': service_cost_editable,
-    })
+    }, status=status)
 
 # Accountant Dashboard
 @login_required
 def accountant_dashboard(request):
-    if not user_has_role(request.user, 'accountant'):
+    if request.role != 'accountant':
         return HttpResponseForbidden("Accountants only.")
 
-    context = {
-        'total_complaints': Complaint.objects.count(),
-        'pending_complaints': Complaint.objects.filter(status__iexact='Pending').count(),
-        'inprogress_complaints': Complaint.objects.filter(status__iexact='In_Progress').count(),
-        'resolved_complaints': Complaint.objects.filter(status__iexact='resolved').count(),
-    }
+    context = dashboard_stats('accountant')
 
     return render(request, 'dashboards/accountant_dashboard.html', context)
 
 @login_required
 def show_accountant_complaints(request):
-    if not user_has_role(request.user, 'accountant'):
+    if request.role != 'accountant':
         return HttpResponseForbidden("Accountants only.")
 
-    complaints = Complaint.objects.all().order_by('-created_at')
-
-    search = request.GET.get('search', '')
-    status = request.GET.get('status', '')
-    from_date = request.GET.get('from_date')
-    to_date = request.GET.get('to_date')
-
-    if search:
-        complaints = complaints.filter(
-            Q(ticket_number__icontains=search) |
-            Q(customer_name__icontains=search) |
-            Q(product__model_name__icontains=search)
-        )
-
-    if status:
-        complaints = complaints.filter(status__iexact=status)
-
-    if from_date:
-        complaints = complaints.filter(created_at__date__gte=parse_date(from_date))
-    if to_date:
-        complaints = complaints.filter(created_at__date__lte=parse_date(to_date))
+    filters = complaint_filters_from(request.GET)
+    complaints = complaints_for_role('accountant', filters)
 
     if 'export' in request.GET:
         return export_complaints_to_excel(complaints, role="accountant", username=request.user.username)
 
-    paginator = Paginator(complaints, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = KeysetPaginator(complaints, 10).get_page(request.GET.get('cursor'))
 
     return render(request, 'complaint/show_accountant_complaints.html', {
         'page_obj': page_obj,
-        'search': search,
-        'status': status,
-        'from_date': from_date,
-        'to_date': to_date,
+        'search': filters.get('search', ''),
+        'status': filters.get('status', ''),
+        'from_date': filters.get('from_date', ''),
+        'to_date': filters.get('to_date', ''),
     })
 
 # tally dashboard
 @login_required
 def tally_dashboard(request):
-    if not user_has_role(request.user, 'tally'):
+    if request.role != 'tally':
         return HttpResponseForbidden("Tally users only.")
 
-    context = {
-        'total_complaints': Complaint.objects.count(),
-        'pending_complaints': Complaint.objects.filter(status__iexact='Pending').count(),
-        'inprogress_complaints': Complaint.objects.filter(status__iexact='In_Progress').count(),
-        'resolved_complaints': Complaint.objects.filter(status__iexact='resolved').count(),
-    }
+    context = dashboard_stats('tally')
 
     return render(request, 'dashboards/tally_dashboard.html', context)
 
 @login_required
 def show_tally_complaints(request):
-    if not user_has_role(request.user, 'tally'):
+    if request.role != 'tally':
         return HttpResponseForbidden("Tally users only.")
 
-    complaints = Complaint.objects.all().order_by('-created_at')
-
     # Filters
-    search = request.GET.get('search', '')
-    status = request.GET.get('status', '')
-    from_date = request.GET.get('from_date')
-    to_date = request.GET.get('to_date')
-
-    if search:
-        complaints = complaints.filter(
-            Q(ticket_number__icontains=search) |
-            Q(customer_name__icontains=search) |
-            Q(product__model_name__icontains=search)
-        )
-
-    if status:
-        complaints = complaints.filter(status__iexact=status)
-
-    if from_date:
-        complaints = complaints.filter(created_at__date__gte=parse_date(from_date))
-    if to_date:
-        complaints = complaints.filter(created_at__date__lte=parse_date(to_date))
-
-    paginator = Paginator(complaints, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    filters = complaint_filters_from(request.GET)
+    complaints = complaints_for_role('tally', filters)
+
+    page_obj = KeysetPaginator(complaints, 10).get_page(request.GET.get('cursor'))
 
     return render(request, 'complaint/show_tally_complaints.html', {
         'page_obj': page_obj,
-        'search': search,
-        'status': status,
-        'from_date': from_date,
-        'to_date': to_date,
+        'search': filters.get('search', ''),
+        'status': filters.get('status', ''),
+        'from_date': filters.get('from_date', ''),
+        'to_date': filters.get('to_date', ''),
     })
 
 # Landing Page + Role-Based Redirection at /
 def redirect_by_role(request):
     if request.user.is_authenticated:
-        role = getattr(request.user.profile, 'role', None)
-
-        if role == 'admin':
-            return redirect('admin_dashboard')
-        elif role == 'manager':
-            return redirect('manager_dashboard')
-        elif role == 'engineer':
-            return redirect('engineer_dashboard')
-        elif role == 'accountant':
-            return redirect('accountant_dashboard')
-        elif role == 'tally':
-            return redirect('tally_dashboard')
-        elif role == 'customer':
-            return redirect('public_complaint_form')
-        else:
+        if request.role not in ROLE_DISPATCH:
             messages.error(request, "Unknown or undefined role.")
-            return redirect('login')
+        return redirect_to_dashboard(request.role)
 
     # If not logged in → go to landing page
     return render(request, 'landing.html')
@@ -738,19 +626,11 @@ def add_staff(request):
     if request.method == 'POST':
         form = AddStaffForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            
-            # Ensure single role
-            user.groups.clear()
-
-            # Assign role to Profile (Critical)
-            role = form.cleaned_data['role']
-            Profile.objects.update_or_create(user=user, defaults={'role': role})
+            with transaction.atomic():
+                user = form.save()
 
-            # Optional: Groups logic (if you're using groups)
-            user.groups.clear()
-            group, created = Group.objects.get_or_create(name=role)
-            user.groups.add(group)
+                # Assign role to Profile (Critical) and its group
+                assign_staff_role(user, form.cleaned_data['role'])
 
             messages.success(request, "Staff user created successfully.")
             return redirect('add_staff')
@@ -820,15 +700,11 @@ def edit_staff(request, user_id):
     if request.method == 'POST':
         form = EditStaffForm(request.POST, instance=user)
         if form.is_valid():
-            user = form.save()
-
-            # Ensure single role
-            user.groups.clear()
+            with transaction.atomic():
+                user = form.save()
 
-            # Assign selected role
-            role = form.cleaned_data['role']
-            group, created = Group.objects.get_or_create(name=role)
-            user.groups.add(group)
+                # Assign selected role (only written if it changed)
+                assign_staff_role(user, form.cleaned_data['role'])
 
             messages.success(request, "Staff user updated successfully.")
             return redirect('show_staff')  # or any other appropriate page
@@ -842,55 +718,21 @@ def edit_staff(request, user_id):
 @login_required
 def change_password(request):
 
-    user = request.user
-
-    is_admin = user_has_role(user, 'admin')
-    is_manager = user_has_role(user, 'manager')
-    is_accountant = user_has_role(user, 'accountant')
-    is_engineer = user_has_role(user, 'engineer')
-    is_tally = user_has_role(user, 'tally')
-
     if request.method == 'POST':
         form = PasswordChangeForm(request.user, request.POST)
         if form.is_valid():
             user = form.save()
             update_session_auth_hash(request, user)  # Prevent logout after password change
             messages.success(request, "Password changed successfully.")
-        
-            if is_admin:
-                return redirect('admin_dashboard')
-            elif is_manager:
-                return redirect('manager_dashboard')
-            elif is_accountant:
-                return redirect('accountant_dashboard')
-            elif is_engineer:
-                return redirect('engineer_dashboard')
-            elif is_tally:
-                return redirect('tally_dashboard')
-            else:
-                return redirect('login')
-            
-            
-    else:
-        form = PasswordChangeForm(request.user)
 
-    # ✅ Set base_template dynamically based on role
-    if is_admin:
-        base_template = "base.html"
-    elif is_manager:
-        base_template = "base_manager.html"
-    elif is_accountant:
-        base_template = "base_accountant.html"
-    elif is_engineer:
-        base_template = "base_engineer.html"
-    elif is_tally:
-        base_template = "base_tallyuser.html"
+            return redirect(dashboard_for(request.role) if request.role in STAFF_ROLES else 'login')
+
     else:
-        base_template = "base_public.html"
+        form = PasswordChangeForm(request.user)
 
     return render(request, 'registration/change_password.html', 
         {'form': form, 
-         'base_template': base_template}
+         'base_template': base_template_for(request.role)}
     )
 
 #from django.contrib.auth.forms import PasswordResetForm
@@ -1,6 +1,34 @@
-from django.contrib import admin
+import io
+import zipfile
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.shortcuts import redirect, render
+from django.urls import path
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .importer import import_products
 from .models import Product
 
+
+class WarrantyStatusFilter(admin.SimpleListFilter):
+    title = 'warranty status'
+    parameter_name = 'warranty'
+
+    def lookups(self, request, model_admin):
+        return (('active', 'Active'), ('expired', 'Expired'))
+
+    def queryset(self, request, queryset):
+        return queryset.with_warranty(self.value())
+
+
+class ProductImportForm(forms.Form):
+    file = forms.FileField(help_text="Dealer sales sheet (.xlsx). Existing serial numbers are updated.")
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = (
@@ -12,7 +40,52 @@ class ProductAdmin(admin.ModelAdmin):
         'assigned_engineer',
         'warranty_start',
         'warranty_end',
-        'warranty_status',
+        'warranty',
     )
     search_fields = ('serial_number', 'model_name', 'sold_to')
-    list_filter = ('sold_date', 'warranty_start', 'warranty_end', 'assigned_engineer')
+    list_filter = (WarrantyStatusFilter, 'sold_date', 'warranty_start', 'warranty_end', 'assigned_engineer')
+    change_list_template = 'admin/product/product/change_list.html'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_warranty_status()
+
+    @admin.display(description='Warranty status', ordering='warranty_end')
+    def warranty(self, obj):
+        return obj.warranty_status()
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='product_product_import'),
+        ] + super().get_urls()
+
+    # 📥 Bulk import from an XLSX sheet
+    def import_view(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            return redirect('admin:product_product_changelist')
+
+        form = ProductImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            errors = io.StringIO()
+            try:
+                read, imported, rejected = import_products(form.cleaned_data['file'], errors)
+            except (ValueError, KeyError, zipfile.BadZipFile) as exc:
+                form.add_error('file', f"Could not read the sheet: {exc}")
+            else:
+                self.message_user(request, f"Imported {imported} of {read} rows.", messages.SUCCESS)
+                if rejected:
+                    name = default_storage.save(
+                        f"imports/product-import-errors-{timezone.now():%Y%m%d-%H%M%S}.csv",
+                        ContentFile(errors.getvalue().encode('utf-8')),
+                    )
+                    self.message_user(request, format_html(
+                        '{} rows were rejected: <a href="{}">download the error report</a>.',
+                        rejected, default_storage.url(name),
+                    ), messages.WARNING)
+                return redirect('admin:product_product_changelist')
+
+        return render(request, 'admin/product/product/import.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import products',
+            'form': form,
+        })
@@ -0,0 +1,90 @@
+# product/exports.py
+"""
+Streamed product catalog exports (XLSX, CSV, gzip-compressed CSV).
+
+Rows are read as ``values_list`` tuples in id-keyset chunks, with the
+engineer's name joined in the same query, and written with the shared
+writers in complaint.exports.
+"""
+
+import tempfile
+from datetime import datetime
+
+from complaint.exports import (
+    EXPORT_CHUNK_SIZE, XLSX_CONTENT_TYPE, streaming_csv_response, streaming_file_response, write_xlsx,
+)
+
+# File formats offered by the product export (also the file extension)
+EXPORT_FORMATS = ('xlsx', 'csv', 'csv.gz')
+
+# (header, values_list field)
+PRODUCT_EXPORT_COLUMNS = [
+    ("Serial Number", 'serial_number'),
+    ("Model Name", 'model_name'),
+    ("Sold To", 'sold_to'),
+    ("Sold Date", 'sold_date'),
+    ("Installation Date", 'installation_date'),
+    ("Assigned Engineer", 'assigned_engineer__username'),
+    ("Warranty Start", 'warranty_start'),
+    ("Warranty End", 'warranty_end'),
+    ("Warranty Status", 'warranty_state'),
+]
+DATE_FIELDS = ('sold_date', 'installation_date', 'warranty_start', 'warranty_end')
+
+# Read alongside the columns to build the engineer's display name
+ENGINEER_NAME_FIELDS = ('assigned_engineer__first_name', 'assigned_engineer__last_name')
+
+
+def _engineer_name(username, first_name, last_name):
+    # Same as the User.__str__ used on screen: full name, else username
+    if not username:
+        return ''
+    return f"{first_name or ''} {last_name or ''}".strip() or username
+
+
+def iter_product_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields formatted export rows (without the header), newest product
+    first, fetching ``chunk_size`` rows per query with an id keyset.
+    """
+    fields = [field for _, field in PRODUCT_EXPORT_COLUMNS]
+    base = (
+        queryset.with_warranty_status()
+        .order_by('-id')
+        .values_list('id', *ENGINEER_NAME_FIELDS, *fields)
+    )
+    last_id = None
+    while True:
+        chunk = base if last_id is None else base.filter(id__lt=last_id)
+        rows = list(chunk[:chunk_size])
+        for row in rows:
+            first_name, last_name = row[1:3]
+            values = dict(zip(fields, row[3:]))
+            for field in DATE_FIELDS:
+                values[field] = values[field].strftime('%Y-%m-%d') if values[field] else ''
+            values['assigned_engineer__username'] = _engineer_name(
+                values['assigned_engineer__username'], first_name, last_name,
+            )
+            yield [values[field] for field in fields]
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][0]
+
+
+def export_products(queryset, file_format='xlsx'):
+    """
+    Streams the products in ``queryset`` as ``file_format`` (one of
+    EXPORT_FORMATS; anything else falls back to XLSX).
+    """
+    headers = [header for header, _ in PRODUCT_EXPORT_COLUMNS]
+    rows = iter_product_rows(queryset)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M')
+
+    if file_format in ('csv', 'csv.gz'):
+        return streaming_csv_response(
+            headers, rows, f"products_{stamp}.{file_format}", compress=file_format == 'csv.gz',
+        )
+
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(tmp, headers, rows, title="Products")
+    return streaming_file_response(tmp, f"products_{stamp}.xlsx", XLSX_CONTENT_TYPE)
@@ -1,8 +1,7 @@
 from django import forms
+from django.urls import reverse
 from product.models import Product
-from django.contrib.auth import get_user_model
-
-User = get_user_model()
+from complaint.engineers import EngineerChoiceField
 
 class ProductForm(forms.ModelForm):
     class Meta:
@@ -29,9 +28,65 @@ class ProductForm(forms.ModelForm):
             'warranty_start': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'warranty_end': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
         }
+        # ✅ Only engineers, from the cached engineer directory
+        field_classes = {'assigned_engineer': EngineerChoiceField}
+
+
+# 🔎 Product picker for complaint forms
+class ProductAutocompleteWidget(forms.Select):
+    """
+    Select that renders only the current choice; other products are fetched
+    from the product_autocomplete endpoint as the user types.
+    """
+
+    template_name = 'product/widgets/autocomplete_select.html'
+
+    def __init__(self, attrs=None, min_chars=2):
+        super().__init__(attrs)
+        self.min_chars = min_chars
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['autocomplete_url'] = reverse('product_autocomplete')
+        context['widget']['warranty_url'] = reverse('product_warranty_lookup')
+        context['widget']['min_chars'] = self.min_chars
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        choices = [('', field.empty_label)] if field.empty_label is not None else []
+        selected = [v for v in value if v]
+        if selected:
+            try:
+                choices += [(obj.pk, field.label_from_instance(obj)) for obj in field.queryset.filter(pk__in=selected)]
+            except (ValueError, TypeError):
+                pass
+
+        all_choices, self.choices = self.choices, choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+
+class ProductChoiceField(forms.ModelChoiceField):
+    """
+    Product field that never loads the product table: the widget renders
+    only the selected product and the submitted id is checked with a single
+    primary-key lookup. Set ``show_serials`` to False on forms open to the
+    public, so the selected product is labelled by model name only.
+    """
+
+    widget = ProductAutocompleteWidget
+
+    def __init__(self, show_serials=True, **kwargs):
+        kwargs.setdefault('queryset', Product.objects.all())
+        super().__init__(**kwargs)
+        self.show_serials = show_serials
+
+    def label_from_instance(self, obj):
+        return product_label(obj, self.show_serials)
+
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # ✅ Filter to show only engineers
-        if 'assigned_engineer' in self.fields:
-            self.fields['assigned_engineer'].queryset = User.objects.filter(profile__role='engineer')
+def product_label(product, show_serial=True):
+    return f"{product.model_name} ({product.serial_number})" if show_serial else product.model_name
@@ -0,0 +1,217 @@
+# product/importer.py
+"""
+Bulk product import from dealer sales sheets (XLSX).
+
+The sheet is streamed with openpyxl's read-only mode, rows are validated and
+upserted on ``serial_number`` in batches with one INSERT ... ON CONFLICT
+statement each, and rejected rows are written to a CSV side file.
+"""
+
+import csv
+from datetime import date, datetime
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from .models import Product
+
+IMPORT_BATCH_SIZE = 1000
+
+# Column header (as in the product export, or the field name) -> field
+COLUMN_ALIASES = {
+    'serial_number': 'serial_number',
+    'serial_no': 'serial_number',
+    'model_name': 'model_name',
+    'model': 'model_name',
+    'sold_to': 'sold_to',
+    'sold_date': 'sold_date',
+    'installation_date': 'installation_date',
+    'assigned_engineer': 'assigned_engineer',
+    'engineer': 'assigned_engineer',
+    'warranty_start': 'warranty_start',
+    'warranty_end': 'warranty_end',
+}
+REQUIRED_FIELDS = ('serial_number', 'model_name', 'sold_to', 'sold_date')
+DATE_FIELDS = ('sold_date', 'installation_date', 'warranty_start', 'warranty_end')
+UPDATE_FIELDS = (
+    'model_name', 'sold_to', 'sold_date', 'installation_date',
+    'assigned_engineer', 'warranty_start', 'warranty_end',
+)
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+
+MAX_LENGTHS = {name: Product._meta.get_field(name).max_length for name in ('serial_number', 'model_name', 'sold_to')}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _column_map(header):
+    columns = {}
+    for index, title in enumerate(header):
+        key = str(title or '').strip().lower().replace(' ', '_')
+        if key in COLUMN_ALIASES:
+            columns[COLUMN_ALIASES[key]] = index
+    missing = [name for name in REQUIRED_FIELDS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    return columns
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # serial numbers typed as numbers
+    return str(value).strip()
+
+
+def _date(value, field):
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise RowError(f"{field}: invalid date '{text}'")
+
+
+# Marks a full name shared by several engineers in engineer_ids_by_name()
+AMBIGUOUS_ENGINEER = -1
+
+
+def engineer_ids_by_name():
+    """
+    Preloads ``{lowercase username or full name: id}`` for every engineer in
+    one query. The product export writes full names, so both are accepted;
+    usernames win over full names, and a full name several engineers share
+    maps to AMBIGUOUS_ENGINEER.
+    """
+    engineers = User.objects.filter(profile__role='engineer').values_list('pk', 'username', 'first_name', 'last_name')
+    by_name = {}
+    usernames = {}
+    for pk, username, first_name, last_name in engineers:
+        usernames[username.lower()] = pk
+        full_name = ' '.join(f"{first_name} {last_name}".lower().split())
+        if full_name:
+            by_name[full_name] = AMBIGUOUS_ENGINEER if full_name in by_name else pk
+    by_name.update(usernames)
+    return by_name
+
+
+def parse_row(values, columns, engineers):
+    """
+    Builds an unsaved Product from one sheet row or raises RowError.
+    """
+    def cell(name):
+        index = columns.get(name)
+        return values[index] if index is not None and index < len(values) else None
+
+    data = {name: _text(cell(name)) for name in ('serial_number', 'model_name', 'sold_to')}
+    for name in REQUIRED_FIELDS:
+        if name not in DATE_FIELDS and not data[name]:
+            raise RowError(f"{name}: required")
+    for name, limit in MAX_LENGTHS.items():
+        if len(data[name]) > limit:
+            raise RowError(f"{name}: longer than {limit} characters")
+
+    for name in DATE_FIELDS:
+        data[name] = _date(cell(name), name)
+    if data['sold_date'] is None:
+        raise RowError("sold_date: required")
+    if data['warranty_start'] and data['warranty_end'] and data['warranty_end'] < data['warranty_start']:
+        raise RowError("warranty_end: before warranty_start")
+
+    engineer = _text(cell('assigned_engineer'))
+    data['assigned_engineer_id'] = None
+    if engineer:
+        data['assigned_engineer_id'] = engineers.get(' '.join(engineer.lower().split()))
+        if data['assigned_engineer_id'] is None:
+            raise RowError(f"assigned_engineer: no engineer with username or name '{engineer}'")
+        if data['assigned_engineer_id'] == AMBIGUOUS_ENGINEER:
+            raise RowError(f"assigned_engineer: several engineers are named '{engineer}'; use the username")
+
+    return Product(**data)
+
+
+def _upsert(products):
+    """
+    Writes a batch and returns the number of products written.
+    """
+    # Later rows win when a serial number repeats within the batch
+    unique = list({product.serial_number: product for product in products}.values())
+    # MySQL upserts on any unique key (ON DUPLICATE KEY UPDATE) and rejects a named target
+    if connection.features.supports_update_conflicts_with_target:
+        target = {'unique_fields': ['serial_number']}
+    else:
+        target = {}
+    with transaction.atomic():
+        Product.objects.bulk_create(
+            unique,
+            update_conflicts=True,
+            update_fields=list(UPDATE_FIELDS),
+            **target,
+        )
+        _reindex_complaints([product.serial_number for product in unique])
+    return len(unique)
+
+
+def _reindex_complaints(serial_numbers):
+    # bulk_create sends no post_save, so refresh complaint search documents here
+    from complaint.models import Complaint
+    from complaint.search import index_complaints
+    index_complaints(Complaint.objects.filter(product__serial_number__in=serial_numbers))
+
+
+def import_products(fileobj, error_file=None, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Imports products from an XLSX file (path or file object).
+
+    Rejected rows are written to ``error_file`` (a text file object) as CSV
+    with the sheet row number, serial number and reason. Returns
+    ``(rows_read, rows_imported, rows_rejected)``; a serial number repeated
+    within a batch is imported (and counted) once.
+    """
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns = _column_map(next(rows, ()))
+        engineers = engineer_ids_by_name()
+
+        errors = csv.writer(error_file) if error_file is not None else None
+        if errors:
+            errors.writerow(['row', 'serial_number', 'error'])
+
+        read = imported = rejected = 0
+        batch = []
+        for number, values in enumerate(rows, start=2):
+            if not any(value not in (None, '') for value in values):
+                continue  # blank line
+            read += 1
+            try:
+                batch.append(parse_row(values, columns, engineers))
+            except RowError as exc:
+                rejected += 1
+                if errors:
+                    serial_index = columns['serial_number']
+                    serial = _text(values[serial_index]) if serial_index < len(values) else ''
+                    errors.writerow([number, serial, str(exc)])
+                continue
+
+            if len(batch) >= batch_size:
+                imported += _upsert(batch)
+                batch = []
+
+        if batch:
+            imported += _upsert(batch)
+    finally:
+        workbook.close()
+
+    return read, imported, rejected
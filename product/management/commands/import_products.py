@@ -0,0 +1,35 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product.importer import IMPORT_BATCH_SIZE, import_products
+
+
+class Command(BaseCommand):
+    help = 'Create or update products from a dealer XLSX sheet, matching existing products on serial number.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='XLSX file to import')
+        parser.add_argument('--errors', help='CSV file for rejected rows (default: <path>.errors.csv)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows per upsert statement')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        errors_path = options['errors'] or f"{os.path.splitext(path)[0]}.errors.csv"
+
+        started = time.monotonic()
+        try:
+            with open(errors_path, 'w', newline='', encoding='utf-8') as error_file:
+                read, imported, rejected = import_products(path, error_file, options['batch_size'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+
+        if rejected:
+            self.stderr.write(f"{rejected} rows rejected; see {errors_path}")
+        else:
+            os.remove(errors_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {imported} of {read} rows in {elapsed:.1f}s ({read / elapsed if elapsed else read:.0f} rows/s)."
+        ))
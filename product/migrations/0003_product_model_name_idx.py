@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0002_alter_product_assigned_engineer_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['model_name'], name='product_model_name_idx'),
+        ),
+    ]
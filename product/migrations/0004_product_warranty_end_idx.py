@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 03:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_product_model_name_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['warranty_end'], name='product_warranty_end_idx'),
+        ),
+    ]
@@ -1,8 +1,70 @@
 from django.db import models
+from django.db.models import Case, Count, Q, Value, When
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
+WARRANTY_ACTIVE = 'Active'
+WARRANTY_EXPIRED = 'Expired'
+
+
+class ProductQuerySet(models.QuerySet):
+    """
+    Warranty status computed by the database, so it can be filtered, counted
+    and sorted on without loading products. Every condition is a range
+    on ``warranty_end``, which is indexed.
+    """
+
+    @staticmethod
+    def _active_q(today=None):
+        return Q(warranty_end__gte=today or timezone.localdate())
+
+    def warranty_active(self, today=None):
+        return self.filter(self._active_q(today))
+
+    def warranty_expired(self, today=None):
+        # A missing end date counts as expired, as in Product.warranty_status()
+        return self.filter(Q(warranty_end__lt=today or timezone.localdate()) | Q(warranty_end__isnull=True))
+
+    def with_warranty(self, status, today=None):
+        """
+        Filters on a status from the UI ('active' / 'expired'); anything else
+        leaves the queryset as it is.
+        """
+        status = (status or '').strip().lower()
+        if status == 'active':
+            return self.warranty_active(today)
+        if status == 'expired':
+            return self.warranty_expired(today)
+        return self
+
+    def with_warranty_status(self, today=None):
+        return self.annotate(warranty_state=Case(
+            When(self._active_q(today), then=Value(WARRANTY_ACTIVE)),
+            default=Value(WARRANTY_EXPIRED),
+            output_field=models.CharField(max_length=10),
+        ))
+
+    def warranty_counts(self, today=None):
+        """
+        Returns ``{'total', 'active', 'expired'}`` from one aggregate query.
+        """
+        counts = self.aggregate(
+            total=Count('pk'),
+            active=Count('pk', filter=self._active_q(today)),
+        )
+        counts['expired'] = counts['total'] - counts['active']
+        return counts
+
+    def warranty_lookup(self, serial_number, today=None):
+        """
+        Returns the product with this serial number (unique index) annotated
+        with its warranty status, or None.
+        """
+        return self.with_warranty_status(today).filter(serial_number=serial_number).first()
+
+
 class Product(models.Model):
     serial_number = models.CharField(max_length=100, unique=True)
     model_name = models.CharField(max_length=100)
@@ -20,15 +82,27 @@ class Product(models.Model):
     warranty_start = models.DateField(null=True, blank=True)
     warranty_end = models.DateField(null=True, blank=True)
 
+    objects = ProductQuerySet.as_manager()
+
     def warranty_status(self):
-        from datetime import date
-        today = date.today()
-        if self.warranty_end and self.warranty_end >= today:
-            return "Active"
-        return "Expired"
+        # Prefer the value annotated by ProductQuerySet.with_warranty_status()
+        state = getattr(self, 'warranty_state', None)
+        if state:
+            return state
+        if self.warranty_end and self.warranty_end >= timezone.localdate():
+            return WARRANTY_ACTIVE
+        return WARRANTY_EXPIRED
 
     '''def __str__(self):
         return f"{self.model_name} ({self.serial_number})"'''
     
     def __str__(self):
         return self.model_name
+
+    class Meta:
+        indexes = [
+            # serial_number already has its unique index; both back the autocomplete prefix search
+            models.Index(fields=['model_name'], name='product_model_name_idx'),
+            # Warranty filters, counts and the active/expired report
+            models.Index(fields=['warranty_end'], name='product_warranty_end_idx'),
+        ]
@@ -1,3 +1,49 @@
+from datetime import date
+from io import BytesIO
+from unittest import mock
+
+import openpyxl
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from .importer import import_products
+from .models import Product
+
+
+def make_sheet(*rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Serial Number', 'Model Name', 'Sold To', 'Sold Date'])
+    for row in rows:
+        sheet.append(list(row))
+    data = BytesIO()
+    workbook.save(data)
+    data.seek(0)
+    return data
+
+
+# 📥 Product import
+class ProductImportTests(TestCase):
+    def test_existing_serials_are_updated_and_repeats_counted_once(self):
+        Product.objects.create(serial_number='SN-1', model_name='Old', sold_to='Dealer', sold_date=date(2024, 1, 1))
+
+        read, imported, rejected = import_products(make_sheet(
+            ('SN-1', 'LED 32', 'Dealer A', '2024-05-01'),
+            ('SN-2', 'LED 40', 'Dealer A', '2024-05-01'),
+            ('SN-2', 'LED 43', 'Dealer B', '2024-05-02'),
+            ('SN-3', 'LED 50', 'Dealer B', 'not a date'),
+        ))
+
+        self.assertEqual((read, imported, rejected), (4, 2, 1))
+        self.assertEqual(
+            dict(Product.objects.values_list('serial_number', 'model_name')),
+            {'SN-1': 'LED 32', 'SN-2': 'LED 43'},
+        )
+
+    def test_import_without_a_named_conflict_target(self):
+        # As on MySQL, which upserts on any unique key and rejects unique_fields.
+        # SQLite then emits a plain INSERT, so only new serials can be checked.
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            result = import_products(make_sheet(('SN-9', 'LED 32', 'Dealer A', '2024-05-01')))
+        self.assertEqual(result, (1, 1, 0))
+        self.assertTrue(Product.objects.filter(serial_number='SN-9').exists())
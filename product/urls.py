@@ -7,4 +7,6 @@ urlpatterns = [
     path('edit/<int:product_id>/', views.edit_product, name='edit_product'),
     path('delete/<int:product_id>/', views.delete_product, name='delete_product'),
     path('export/', views.export_products_to_excel, name='export_products'),
+    path('autocomplete/', views.product_autocomplete, name='product_autocomplete'),
+    path('warranty/', views.product_warranty_lookup, name='product_warranty_lookup'),
 ]
@@ -1,43 +1,105 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden, HttpResponse
-from django.core.paginator import Paginator
+from django.http import HttpResponseForbidden, JsonResponse
 from django.db.models import Q
 from django.contrib import messages
-import openpyxl
 
 from product.models import Product
-from complaint.utils import user_has_role
-from .forms import ProductForm
+from product.exports import export_products
+from complaint.pagination import KeysetPaginator
+from complaint.roles import STAFF_ROLES
+from .forms import ProductForm, product_label
 
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_MIN_CHARS = 2
 
-@login_required
-def product_list(request):
-    if not user_has_role(request.user, 'admin'):
-        return HttpResponseForbidden("Only admins can view product list.")
 
-    query = request.GET.get('q', '')
-    products = Product.objects.all().order_by('-id')
+def filtered_products(params):
+    """
+    Products matching the product list's search (``q``) and warranty
+    (``warranty``: active / expired) parameters; shared with the export.
+    """
+    query = params.get('q', '')
+    products = Product.objects.with_warranty(params.get('warranty'))
 
     if query:
         products = products.filter(
             Q(serial_number__icontains=query) |
             Q(model_name__icontains=query)
         )
+    return products, query
+
+
+@login_required
+def product_list(request):
+    if request.role != 'admin':
+        return HttpResponseForbidden("Only admins can view product list.")
+
+    warranty = request.GET.get('warranty', '')
+    products, query = filtered_products(request.GET)
+    products = products.with_warranty_status().order_by('-id')
+
+    page_obj = KeysetPaginator(products, 10, ordering=('-id',)).get_page(request.GET.get('cursor'))
 
-    paginator = Paginator(products, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Active / expired totals for the current search, in one query
+    searched, _ = filtered_products({'q': query})
 
     return render(request, 'product/product_list.html', {
         'page_obj': page_obj,
-        'query': query
+        'query': query,
+        'warranty': warranty,
+        'warranty_counts': searched.warranty_counts(),
+    })
+
+
+# 🔎 Product autocomplete for the complaint forms (public, like the complaint form)
+def product_autocomplete(request):
+    """
+    Returns up to AUTOCOMPLETE_LIMIT products whose serial number or model
+    name starts with ``q``; both columns are indexed, so this is two range scans.
+
+    Serial numbers are only listed for staff. Anyone else gets model names,
+    as on the public form, and finds a unit by typing its full serial number.
+    """
+    query = request.GET.get('q', '').strip()[:100]
+    if len(query) < AUTOCOMPLETE_MIN_CHARS:
+        return JsonResponse({'results': []})
+
+    show_serials = request.role in STAFF_ROLES
+    serial_match = Q(serial_number__istartswith=query) if show_serials else Q(serial_number=query)
+    products = (
+        Product.objects.filter(serial_match | Q(model_name__istartswith=query))
+        .only('id', 'serial_number', 'model_name')
+        .order_by('model_name', 'serial_number')[:AUTOCOMPLETE_LIMIT]
+    )
+    results = []
+    for p in products:
+        if show_serials or p.serial_number == query:
+            results.append({'id': p.pk, 'text': product_label(p), 'serial_number': p.serial_number})
+        else:
+            results.append({'id': p.pk, 'text': product_label(p, show_serial=False)})
+    return JsonResponse({'results': results})
+
+
+# 🛡️ Warranty lookup by serial number, shown while registering a complaint
+def product_warranty_lookup(request):
+    serial_number = request.GET.get('serial', '').strip()[:100]
+    product = Product.objects.warranty_lookup(serial_number) if serial_number else None
+    if product is None:
+        return JsonResponse({'found': False})
+
+    return JsonResponse({
+        'found': True,
+        'model_name': product.model_name,
+        'serial_number': product.serial_number,
+        'warranty_end': product.warranty_end.isoformat() if product.warranty_end else None,
+        'warranty_status': product.warranty_status(),
     })
 
 
 @login_required
 def add_product(request):
-    if not user_has_role(request.user, 'admin'):
+    if request.role != 'admin':
         return HttpResponseForbidden("Only admins can add products.")
 
     if request.method == 'POST':
@@ -54,7 +116,7 @@ def add_product(request):
 
 @login_required
 def edit_product(request, product_id):
-    if not user_has_role(request.user, 'admin'):
+    if request.role != 'admin':
         return HttpResponseForbidden("Only admins can edit products.")
 
     product = get_object_or_404(Product, id=product_id)
@@ -69,7 +131,7 @@ def edit_product(request, product_id):
 
 @login_required
 def delete_product(request, product_id):
-    if not user_has_role(request.user, 'admin'):
+    if request.role != 'admin':
         return HttpResponseForbidden("Only admins can delete products.")
 
     product = get_object_or_404(Product, id=product_id)
@@ -80,47 +142,8 @@ def delete_product(request, product_id):
 
 @login_required
 def export_products_to_excel(request):
-    if not user_has_role(request.user, 'admin'):
+    if request.role != 'admin':
         return HttpResponseForbidden("Only admins can export products.")
 
-    query = request.GET.get('q', '')
-    products = Product.objects.all().order_by('-id')
-
-    if query:
-        products = products.filter(
-            Q(serial_number__icontains=query) |
-            Q(model_name__icontains=query)
-        )
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Products"
-
-    headers = [
-        "Serial Number",
-        "Model Name",
-        "Sold To",
-        "Sold Date",
-        "Installation Date",
-        "Assigned Engineer",
-        "Warranty Start",
-        "Warranty End"
-    ]
-    ws.append(headers)
-
-    for product in products:
-        ws.append([
-            product.serial_number,
-            product.model_name,
-            product.sold_to,
-            product.sold_date.strftime('%Y-%m-%d') if product.sold_date else '',
-            product.installation_date.strftime('%Y-%m-%d') if product.installation_date else '',
-            str(product.assigned_engineer) if product.assigned_engineer else '',
-            product.warranty_start.strftime('%Y-%m-%d') if product.warranty_start else '',
-            product.warranty_end.strftime('%Y-%m-%d') if product.warranty_end else ''
-        ])
-
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=products.xlsx'
-    wb.save(response)
-    return response
+    products, _ = filtered_products(request.GET)
+    return export_products(products, request.GET.get('file_format', 'xlsx'))
@@ -0,0 +1,3 @@
+@echo off
+cd /d D:\django_project
+D:\django_project\env\Scripts\python.exe manage.py auto_assign_complaints --loop